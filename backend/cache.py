@@ -0,0 +1,173 @@
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # in requirements.txt; a bare install without it still serves gzip
+    brotli = None
+
+
+class ReportCache:
+    """Bounded LRU cache of rendered /report bodies.
+
+    Keys start with (account, dataset version), so an upload or /clear (which
+    bumps that account's version) makes its older entries unreachable;
+    `invalidate(account)` also drops them right away to free the memory.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, scope: Optional[Hashable] = None) -> None:
+        """Drop every entry, or only those whose key starts with `scope`."""
+        with self._lock:
+            if scope is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[0] == scope]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups > 0 else 0.0
+            }
+
+
+# --- CONDITIONAL GET / COMPRESSION ---
+# A /report body is fully determined by the account's data (lineage, version)
+# and the query, so its ETag is a hash of those and can be checked before the
+# report is built. Each content-coding of the body is its own representation
+# with its own strong ETag ("<hash>", "<hash>-gzip", "<hash>-br"); a client
+# revalidating any of them gets a 304.
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def _encoders() -> Dict[str, Any]:
+    """Available content-codings, most preferred first."""
+    encoders = {}
+    if brotli is not None:
+        encoders['br'] = lambda body: brotli.compress(body, quality=BROTLI_QUALITY)
+    encoders['gzip'] = lambda body: gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return encoders
+
+
+ENCODERS = _encoders()
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong entity tag (quoted) for a body built from `parts`."""
+    return '"' + hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:24] + '"'
+
+
+def variant_etag(etag: str, encoding: str) -> str:
+    """The ETag of one content-coding of the body tagged `etag`."""
+    return etag if encoding == 'identity' else f'{etag[:-1]}-{encoding}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 asks) against any coding of `etag`."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    tags = {variant_etag(etag, encoding) for encoding in ['identity', *ENCODERS]}
+    return any(tag.strip().removeprefix('W/') in tags for tag in if_none_match.split(','))
+
+
+def held_coding(if_none_match: Optional[str], etag: str, encoding: str) -> str:
+    """Which coding of `etag` the client holds, among those a 200 could send it now
+    (the negotiated `encoding`, or identity for a body too small to compress)."""
+    tags = {tag.strip().removeprefix('W/') for tag in (if_none_match or '').split(',')}
+    if encoding != 'identity' and etag in tags and variant_etag(etag, encoding) not in tags:
+        return 'identity'
+    return encoding
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> str:
+    """The preferred coding the client accepts ('br', 'gzip' or 'identity')."""
+    accepted = {}
+    for item in (accept_encoding or '').split(','):
+        coding, _, params = item.strip().lower().partition(';')
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.strip()] = q
+    best, best_q = 'identity', 0.0
+    for coding in ENCODERS:
+        q = accepted.get(coding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class EncodedBody:
+    """A response body plus its compressed codings, each made on first request.
+
+    Bodies shorter than `min_bytes` are always sent as they are (compression
+    would gain less than it costs).
+    """
+
+    def __init__(self, body: bytes, min_bytes: int = 1024):
+        self.body = body
+        self.min_bytes = min_bytes
+        self._encoded: Dict[str, bytes] = {}
+
+    def coding(self, encoding: str) -> str:
+        """The coding `encode` applies for the negotiated `encoding`, without encoding."""
+        if encoding not in ENCODERS or len(self.body) < self.min_bytes:
+            return 'identity'
+        return encoding
+
+    def encode(self, encoding: str) -> Tuple[bytes, str]:
+        """(bytes, coding actually applied) for the negotiated `encoding`."""
+        encoding = self.coding(encoding)
+        if encoding == 'identity':
+            return self.body, encoding
+        data = self._encoded.get(encoding)
+        if data is None:
+            # Concurrent first requests may both compress; either result is the same
+            data = self._encoded[encoding] = ENCODERS[encoding](self.body)
+        return data, encoding
@@ -0,0 +1,288 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# --- COLUMN CONVERTERS ---
+# One FileConverter per uploaded file. The first chunk that reaches a column
+# is sampled once to pick its format; every chunk is then converted with that
+# format in one vectorized call. Dates are parsed per distinct string, and
+# strings already seen in earlier chunks of the file come from a cache.
+# Values the fast path rejects go through a per-value slow path; those still
+# unreadable become NaT / 0 but are counted, with a few examples, in
+# `summary()`, which is returned with the upload instead of being dropped silently.
+
+# Candidates in order of preference; ties go to the earlier one (Meta exports are month-first)
+DATE_FORMATS = [
+    '%m/%d/%Y %H:%M',   # Business Suite "Publish time"
+    'ISO8601',          # 2026-01-28, 2026-01-28 10:15, 2026-01-28T10:15:00(+05:30)
+    '%m/%d/%Y',
+    '%d/%m/%Y %H:%M',
+    '%d/%m/%Y',
+]
+
+# Month-first format -> its day-first twin. While no value in the file tells them
+# apart (every day <= 12), rows where the two disagree are reported as ambiguous.
+DATE_TWINS = {'%m/%d/%Y %H:%M': '%d/%m/%Y %H:%M', '%m/%d/%Y': '%d/%m/%Y'}
+DATE_TWINS.update({day: month for month, day in DATE_TWINS.items()})
+
+# Zero-padded layouts rearranged into ISO order with numpy (about 5x faster than strptime):
+# format -> source character of each ISO position (None = the ISO separator there)
+_MDY, _DMY = [6, 7, 8, 9, None, 0, 1, None, 3, 4], [6, 7, 8, 9, None, 3, 4, None, 0, 1]
+_HM = [None, 11, 12, None, 14, 15]
+FIXED_WIDTH = {
+    '%m/%d/%Y %H:%M': (16, _MDY + _HM), '%d/%m/%Y %H:%M': (16, _DMY + _HM),
+    '%m/%d/%Y': (10, _MDY), '%d/%m/%Y': (10, _DMY),
+}
+_ISO_SEPARATORS = {4: '-', 7: '-', 10: 'T', 13: ':'}
+
+# "12,345" / "1,234,567.5": comma thousands separators
+THOUSANDS = re.compile(r'^[+-]?\d{1,3}(,\d{3})+(\.\d+)?$')
+
+# Distinct non-blank values sampled per column to choose its format
+SAMPLE_SIZE = 500
+
+# Distinct date strings cached per column and file (repeats beyond this are re-parsed per chunk)
+CACHE_LIMIT = 200_000
+
+# Unreadable values kept per column for the upload response
+MAX_EXAMPLES = 5
+
+# Row outcomes, also the per-string status kept in the date cache
+OK, BLANK, FALLBACK, FAILED, AMBIGUOUS = range(5)
+OUTCOMES = ['ok', 'blank', 'fallback', 'failed', 'ambiguous']
+
+
+def _fixed_width(values: pd.Index, fmt: str) -> Tuple[np.ndarray, np.ndarray]:
+    """FIXED_WIDTH fast path: parsed values and a mask of the rows in the exact zero-padded layout."""
+    width, order = FIXED_WIDTH[fmt]
+    parsed = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[us]')
+    text = np.asarray(values, dtype=str)
+    if not len(text) or text.dtype.itemsize > width * 4:
+        return parsed, np.zeros(len(values), dtype=bool)
+    chars = np.zeros((len(text), width), dtype='uint32')
+    chars[:, :text.dtype.itemsize // 4] = text.view('uint32').reshape(len(text), -1)
+
+    # Digits where the format has fields, the format's own literals ('/', ' ', ':') elsewhere
+    layout = fmt.replace('%Y', '0000').replace('%m', '00').replace('%d', '00').replace('%H', '00').replace('%M', '00')
+    source = [i for i in order if i is not None]
+    separators = [i for i in range(width) if i not in source]
+    literals = np.array([ord(layout[i]) for i in separators], dtype='uint32')
+    fits = ((chars[:, source] - ord('0')) <= 9).all(axis=1) & (chars[:, separators] == literals).all(axis=1)
+
+    iso = np.empty((int(fits.sum()), len(order)), dtype='uint32')
+    for i, src in enumerate(order):
+        iso[:, i] = ord(_ISO_SEPARATORS[i]) if src is None else chars[fits, src]
+    try:
+        parsed[fits] = iso.reshape(-1).view(f'U{len(order)}').astype('datetime64[us]')
+    except ValueError:
+        # Month 13, February 30 ...: leave every row to pandas, which marks those NaT
+        fits[:] = False
+    return parsed, fits
+
+
+def _to_datetime(values: pd.Index, fmt: str) -> np.ndarray:
+    """Parse with one fixed format; unparseable -> NaT. Offsets are dropped, keeping the wall time."""
+    if fmt in FIXED_WIDTH:
+        parsed, fits = _fixed_width(values, fmt)
+        if not fits.all():
+            parsed[~fits] = _parse_format(values[~fits], fmt)
+        return parsed
+    return _parse_format(values, fmt)
+
+
+def _parse_format(values: pd.Index, fmt: str) -> np.ndarray:
+    """pandas strptime with `fmt`, for values outside the fixed-width layouts."""
+    try:
+        parsed = pd.to_datetime(values, format=fmt, errors='coerce')
+    except ValueError:
+        # ISO strings with different UTC offsets
+        parsed = pd.to_datetime(values, format=fmt, errors='coerce', utc=True)
+    if parsed.tz is not None:
+        parsed = parsed.tz_localize(None)
+    return np.array(parsed.to_numpy(dtype='datetime64[us]'))
+
+
+def _slow_date(text: str) -> np.datetime64:
+    """Per-value fallback: let pandas infer the format of this one string."""
+    try:
+        value = pd.Timestamp(text)
+    except (ValueError, TypeError, OverflowError):
+        return np.datetime64('NaT', 'us')
+    if value is pd.NaT:
+        return np.datetime64('NaT', 'us')
+    return np.datetime64(value.tz_localize(None) if value.tz is not None else value, 'us')
+
+
+def _slow_number(text: str) -> Optional[float]:
+    """Per-value fallback: drop spaces and any thousands separators, then read a float."""
+    cleaned = text.strip().replace('\u00a0', '').replace(' ', '').replace(',', '')
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+
+class _Column:
+    """Chosen format and running row outcomes of one column of one file."""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.format: Optional[str] = None
+        self.counts = np.zeros(len(OUTCOMES), dtype='int64')
+        self.examples: List[str] = []
+        # Dates: month-first vs day-first settled by a value only one of them reads
+        self.settled = True
+        # Dates: distinct string -> (value, outcome)
+        self.cache = pd.DataFrame({'value': pd.Series(dtype='datetime64[us]'), 'outcome': pd.Series(dtype='int8')})
+
+    def note_failures(self, values) -> None:
+        room = MAX_EXAMPLES - len(self.examples)
+        if room > 0:
+            self.examples.extend(str(v) for v in list(values)[:room])
+
+    def report(self) -> Dict[str, Any]:
+        counts = dict(zip(OUTCOMES, self.counts.tolist()))
+        if self.settled:
+            # A later value told month-first and day-first apart: the earlier rows were read correctly
+            counts['ok'] += counts['ambiguous']
+            counts['ambiguous'] = 0
+        return {"kind": self.kind, "format": self.format, "rows": int(self.counts.sum()),
+                **{k: v for k, v in counts.items() if k != 'ok'}, "examples": self.examples}
+
+    def has_issues(self) -> bool:
+        report = self.report()
+        blank_dates = self.kind == 'date' and report['blank'] > 0
+        return bool(report['fallback'] or report['failed'] or report['ambiguous'] or blank_dates)
+
+
+class FileConverter:
+    """Format-sniffing number and date conversion for the chunks of one file."""
+
+    def __init__(self):
+        self._columns: Dict[str, _Column] = {}
+
+    def _column(self, name: str, kind: str) -> _Column:
+        if name not in self._columns:
+            self._columns[name] = _Column(kind)
+        return self._columns[name]
+
+    # --- numbers ---
+
+    def numbers(self, name: str, series: pd.Series) -> pd.Series:
+        """Numeric counts; blanks become 0 (and are counted), as do unreadable values (reported)."""
+        col = self._column(name, 'number')
+        blank = series.isna()
+        if pd.api.types.is_numeric_dtype(series):
+            # The C parser already read every value (its `thousands` option covers "1,234")
+            col.format = col.format or 'numeric'
+            col.counts[OK] += int((~blank).sum())
+            col.counts[BLANK] += int(blank.sum())
+            return series.fillna(0)
+
+        text = series.astype('str')
+        blank |= text.str.strip().eq('')
+        if col.format is None:
+            sample = pd.unique(text[~blank])[:SAMPLE_SIZE]
+            col.format = 'thousands' if any(THOUSANDS.match(v) for v in sample) else 'plain'
+
+        fast = text.str.replace(',', '', regex=False) if col.format == 'thousands' else text
+        values = np.array(pd.to_numeric(fast.where(~blank), errors='coerce').to_numpy(dtype='float64', na_value=np.nan))
+        rejected = np.isnan(values) & ~blank.to_numpy()
+        if rejected.any():
+            rows = np.flatnonzero(rejected)
+            slow = [_slow_number(v) for v in text.iloc[rows].tolist()]
+            parsed = np.array([np.nan if v is None else v for v in slow], dtype='float64')
+            values[rows] = parsed
+            failed = np.isnan(parsed)
+            col.counts[FALLBACK] += int((~failed).sum())
+            col.counts[FAILED] += int(failed.sum())
+            col.note_failures(text.iloc[rows[failed]].unique())
+        col.counts[BLANK] += int(blank.sum())
+        col.counts[OK] += int(len(values) - blank.sum() - rejected.sum())
+        return pd.Series(np.nan_to_num(values), index=series.index)
+
+    # --- dates ---
+
+    def dates(self, name: str, series: pd.Series) -> pd.Series:
+        """Timestamps (datetime64[us]); blank and unreadable values become NaT and are counted."""
+        col = self._column(name, 'date')
+        if pd.api.types.is_datetime64_any_dtype(series):
+            col.format = col.format or 'datetime'
+            col.counts[BLANK] += int(series.isna().sum())
+            col.counts[OK] += int(series.notna().sum())
+            return series
+
+        codes, uniques = pd.factorize(series.astype('str'))
+        if col.format is None:
+            col.format, col.settled = self._sniff_date(uniques[:SAMPLE_SIZE])
+
+        table = col.cache
+        known = table.index.get_indexer(uniques)
+        new = uniques[known < 0]
+        if len(new):
+            fresh = self._parse_dates(col, new)
+            table = pd.concat([table, fresh]) if len(table) else fresh
+            if len(table) <= CACHE_LIMIT:
+                col.cache = table
+            known = table.index.get_indexer(uniques)
+        return self._apply(col, table, known, codes, series.index)
+
+    def _apply(self, col: _Column, table: pd.DataFrame, positions: np.ndarray,
+               codes: np.ndarray, index: pd.Index) -> pd.Series:
+        values = table['value'].to_numpy()[positions]
+        outcomes = table['outcome'].to_numpy()[positions]
+        per_unique = np.bincount(codes[codes >= 0], minlength=len(positions))
+        col.counts += np.bincount(outcomes, weights=per_unique, minlength=len(OUTCOMES)).astype('int64')
+        col.counts[BLANK] += int((codes < 0).sum())
+        result = np.full(len(codes), np.datetime64('NaT'), dtype='datetime64[us]')
+        result[codes >= 0] = values[codes[codes >= 0]]
+        return pd.Series(result, index=index)
+
+    def _sniff_date(self, sample: pd.Index) -> Tuple[str, bool]:
+        """The candidate format reading the most sampled values (the earlier one on ties),
+        and whether the sample already rules out its month/day twin."""
+        sample = sample[sample.str.strip() != '']
+        if not len(sample):
+            return DATE_FORMATS[0], False
+        read = {fmt: ~np.isnat(_to_datetime(sample, fmt)) for fmt in DATE_FORMATS}
+        best = max(DATE_FORMATS, key=lambda fmt: (read[fmt].sum(), -DATE_FORMATS.index(fmt)))
+        twin = DATE_TWINS.get(best)
+        return best, twin is None or bool((read[best] & ~read[twin]).any())
+
+    def _parse_dates(self, col: _Column, strings: pd.Index) -> pd.DataFrame:
+        """Value and outcome of each distinct string: fast path, twin check, slow path."""
+        values = _to_datetime(strings, col.format)
+        outcomes = np.full(len(strings), OK, dtype='int8')
+        # Only strings the format rejected can be blank
+        blank = np.zeros(len(strings), dtype=bool)
+        unread = np.flatnonzero(np.isnat(values))
+        blank[unread] = np.asarray(strings[unread].str.strip() == '')
+        outcomes[blank] = BLANK
+
+        if not col.settled:
+            twin = _to_datetime(strings, DATE_TWINS[col.format])
+            read = ~np.isnat(values)
+            if (read & np.isnat(twin)).any():
+                # Some value only reads one way: the file's format is proven
+                col.settled = True
+            else:
+                outcomes[read & ~np.isnat(twin) & (values != twin)] = AMBIGUOUS
+
+        rejected = np.flatnonzero(np.isnat(values) & ~blank)
+        if len(rejected):
+            values[rejected] = [_slow_date(s) for s in strings[rejected]]
+            failed = np.isnat(values[rejected])
+            outcomes[rejected] = np.where(failed, FAILED, FALLBACK)
+            col.note_failures(strings[rejected[failed]])
+        return pd.DataFrame({'value': values, 'outcome': outcomes}, index=strings)
+
+    # --- report ---
+
+    def summary(self) -> Dict[str, Any]:
+        """Chosen format per column, plus the columns with slow-path, failed, ambiguous or blank-date rows."""
+        return {
+            "formats": {name: col.format for name, col in self._columns.items() if col.format},
+            "issues": {name: col.report() for name, col in self._columns.items() if col.has_issues()}
+        }
@@ -0,0 +1,150 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from convert import FileConverter
+from engine import DAILY_METRICS, narrow_ints
+
+# --- DAILY METRICS TABLE ---
+# The per-day Facebook export ('facebook_daily' schema) carries one row per
+# post per Date. It is kept apart from the post tables, in a compact form:
+#   post_id / account_id -> categoricals (small integer codes into the id list)
+#   day                  -> int32 days since 1970-01-01
+#   metrics              -> the narrowest integer dtype that holds each column
+# Rows are ordered by (post_id, day). Series are computed with bincount /
+# cumsum over this table, never by looping over posts or days.
+
+DAILY_TABLE = 'facebook_daily'
+
+# total_engagement of a day, as for posts (the export has no saves)
+DAILY_ENGAGEMENT = ['likes', 'comments', 'shares']
+
+EPOCH_DAY = np.datetime64('1970-01-01', 'D')
+
+
+def compact_daily(df: pd.DataFrame, converter: Optional[FileConverter] = None) -> pd.DataFrame:
+    """Turn an ingested 'facebook_daily' frame into the compact table.
+
+    Text dates go through FileConverter (pass the upload's `converter` to
+    have unreadable ones counted in its summary). Rows whose Date is not a
+    real date (e.g. 'Lifetime' totals) are dropped. Frames that already
+    carry a `day` column are re-coded as they are.
+    """
+    if 'day' in df.columns:
+        days = df['day'].to_numpy(dtype='int64')
+    else:
+        if 'date' not in df.columns:
+            df = df.assign(date=pd.Series(dtype='str'))
+        dates = df['date']
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = (converter or FileConverter()).dates('date', dates)
+        dates = dates.to_numpy().astype('datetime64[D]')
+        valid = ~np.isnat(dates)
+        df = df[valid]
+        days = (dates[valid] - EPOCH_DAY).astype('int64')
+
+    table = pd.DataFrame({
+        'post_id': pd.Categorical(df['post_id'].astype(str)),
+        'account_id': pd.Categorical(df['account_id'].astype(str) if 'account_id' in df.columns else [''] * len(df)),
+        'day': days.astype('int32'),
+    })
+    for col in DAILY_METRICS:
+        table[col] = narrow_ints(df[col].to_numpy() if col in df.columns else np.zeros(len(df)))
+    # Same (post, day) twice: the later row wins
+    table = table.drop_duplicates(subset=['post_id', 'day'], keep='last')
+    return table.sort_values(['post_id', 'day'], kind='mergesort').reset_index(drop=True)
+
+
+def load_daily(snapshot) -> pd.DataFrame:
+    """The snapshot's daily table, or an empty compact table before the first upload."""
+    table = snapshot.load(DAILY_TABLE)
+    return table if not table.empty else compact_daily(pd.DataFrame({'post_id': pd.Series(dtype='str')}))
+
+
+def merge_daily(current: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """Upsert compact rows: (post_id, day) pairs in `new` replace those in `current`."""
+    if current.empty:
+        return new
+    if new.empty:
+        return current
+    frames = [frame.astype({'post_id': str, 'account_id': str}) for frame in (current, new)]
+    return compact_daily(pd.concat(frames, ignore_index=True))
+
+
+@metrics.timed('aggregate')
+def time_series(table: pd.DataFrame, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                post_id: Optional[str] = None, account_id: Optional[str] = None, window: int = 7) -> Dict[str, Any]:
+    """Per-day and trailing `window`-day sums of every metric for one post or a whole page.
+
+    With neither post_id nor account_id, every post in the table is summed.
+    Days without data count as 0. Output is columnar: `days` plus one list
+    per metric under `daily` and `rolling`.
+    """
+    mask = np.ones(len(table), dtype=bool)
+    if post_id is not None:
+        mask &= _code_mask(table['post_id'], post_id)
+    if account_id is not None:
+        mask &= _code_mask(table['account_id'], account_id)
+    days = table['day'].to_numpy()[mask].astype('int64')
+
+    if start is not None:
+        lo = int((np.datetime64(start.date()) - EPOCH_DAY).astype('int64'))
+    else:
+        lo = int(days.min()) if len(days) else 0
+    if end is not None:
+        hi = int((np.datetime64(end.date()) - EPOCH_DAY).astype('int64'))
+    else:
+        hi = int(days.max()) if len(days) else -1
+    size = max(hi - lo + 1, 0)
+
+    # Bin from window - 1 days before lo, so the first rolling sums of the range include the days before it
+    lead = max(window - 1, 0) if size else 0
+    base = lo - lead
+    in_range = (days >= base) & (days <= hi)
+    idx = days[in_range] - base
+    binned = {}
+    for col in DAILY_METRICS:
+        weights = table[col].to_numpy()[mask][in_range].astype('int64')
+        binned[col] = np.bincount(idx, weights=weights, minlength=size + lead).astype('int64')
+    binned['total_engagement'] = sum(binned[col] for col in DAILY_ENGAGEMENT)
+    binned['posts'] = np.bincount(idx, minlength=size + lead)
+
+    rolling = {}
+    for col in DAILY_METRICS + ['total_engagement']:
+        cum = np.concatenate(([0], np.cumsum(binned[col])))
+        ends = np.arange(lead + 1, lead + size + 1)
+        rolling[col] = cum[ends] - cum[np.maximum(ends - window, 0)]
+    daily = {col: arr[lead:] for col, arr in binned.items()}
+
+    labels = np.datetime_as_string(EPOCH_DAY + np.arange(lo, lo + size), unit='D')
+    return {
+        "days": labels.tolist(),
+        "window": window,
+        "daily": {col: arr.tolist() for col, arr in daily.items()},
+        "rolling": {col: arr.tolist() for col, arr in rolling.items()}
+    }
+
+
+def _code_mask(column: pd.Series, value: str) -> np.ndarray:
+    """Rows equal to `value`, compared on the categorical codes rather than the strings."""
+    categories = column.cat.categories
+    position = categories.get_indexer([value])[0]
+    if position < 0:
+        return np.zeros(len(column), dtype=bool)
+    return column.cat.codes.to_numpy() == position
+
+
+def daily_summary(table: pd.DataFrame) -> Dict[str, Any]:
+    """Row/post counts and the covered date span of the table."""
+    if table.empty:
+        return {"rows": 0, "posts": 0, "first_day": None, "last_day": None}
+    days = table['day'].to_numpy()
+    return {
+        "rows": int(len(table)),
+        "posts": int(table['post_id'].nunique()),
+        "first_day": str(EPOCH_DAY + int(days.min())),
+        "last_day": str(EPOCH_DAY + int(days.max()))
+    }
@@ -0,0 +1,482 @@
+import argparse
+import os
+import re
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from xml.sax.saxutils import escape, unescape
+
+import pandas as pd
+
+from engine import AnalyticsEngine, period_buckets
+from export import StreamSink
+
+# --- WEEKLY DECK ---
+# The weekly PowerPoint is a copy of the brand's template with its
+# {{PLACEHOLDER}} texts replaced (the brand's own template is last week's deck,
+# whose numbers are turned into placeholders while it is parsed, see LITERAL
+# TEMPLATE below). A template is read once per process and
+# cached (keyed on path, mtime and size): every part's bytes are kept, and
+# each slide's XML is pre-split around its placeholders. Rendering is then a
+# join of those pieces plus a fresh zip, written part by part to the response
+# or file. Batches of decks (many weeks and/or brands) are rendered in worker
+# processes, each with its own cached copy of the template.
+
+# Parsed templates kept per process
+TEMPLATE_CACHE_SIZE = 8
+
+# zlib level for the XML parts of a rendered deck
+DECK_COMPRESSLEVEL = 6
+
+# Parts that are already compressed: stored as they are instead of deflated again
+STORED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.wdp', '.mp4', '.m4v', '.mov', '.mp3', '.m4a'}
+
+PLACEHOLDER = re.compile(r'\{\{([A-Z0-9_]+)\}\}')
+_SLIDE = re.compile(r'^ppt/slides/slide\d+\.xml$')
+_PARAGRAPH = re.compile(r'<a:p\b[^>]*>.*?</a:p>', re.S)
+_TEXT = re.compile(r'(<a:t(?:\s[^>]*)?>)(.*?)(</a:t>)', re.S)
+
+# Ranking keys of generate_report -> placeholder infix
+RANKINGS = {'best_reach': 'BEST_REACH', 'least_reach': 'LEAST_REACH',
+            'best_engagement': 'BEST_ENGAGEMENT', 'least_engagement': 'LEAST_ENGAGEMENT'}
+
+# aggregated[platform] keys -> placeholder suffix, and whether the value is a percentage
+PARTICULARS = {
+    'total_reach': ('TOTAL_REACH', False),
+    'total_engagement': ('TOTAL_ENGAGEMENT', False),
+    'total_views': ('TOTAL_VIEWS', False),
+    'interactions_wo_views': ('INTERACTIONS', False),
+    'average_interaction': ('AVG_INTERACTION', False),
+    'eng_rate_with_views': ('ENG_RATE_WITH_VIEWS', True),
+    'eng_rate_wo_views': ('ENG_RATE_WO_VIEWS', True),
+    'video_view_rate': ('VIDEO_VIEW_RATE', True),
+}
+
+STORY_ENGAGEMENT = ['likes', 'shares', 'replies', 'link_clicks', 'profile_visits', 'sticker_taps', 'follows']
+
+# --- LITERAL TEMPLATE ---
+# "Westside Weekly Report - TEMPLATE.pptx" only has {{IG_FOLLOWER_GROWTH}} and
+# {{REPORT_DATE_RANGE}}; every other number is last week's, typed in as text
+# (see ppt_analysis.txt). While a template is parsed, those texts are found by
+# the labels next to them and replaced with placeholders:
+#   - 'Date: <range>' boxes (except on month-on-month charts) -> REPORT_DATE_RANGE
+#   - rows of the '<Platform> Page Analysis Summary' tables, by Particulars
+#     label -> PREV_<NAME> | <NAME> | <NAME>_CHANGE
+#   - 'Label: value' lines of the best/least performing post and story slides;
+#     the platform is that of the last 'Instagram' / 'Facebook' divider slide
+# Inferences and the other tables stay as they are.
+
+# Divider slide text -> placeholder prefix (other platforms' sections are left alone)
+DIVIDERS = {'instagram': 'IG', 'facebook': 'FB', 'linkedin': None, 'youtube': None}
+
+# Particulars label (without the platform name) -> placeholder names, joined by '|'
+SUMMARY_ROWS = {
+    'posts | stories': ('POSTS', 'STORIES'),
+    'page followers': ('FOLLOWERS',),
+    'total reach': ('TOTAL_REACH',),
+    'total engagement': ('TOTAL_ENGAGEMENT',),
+    'video views': ('TOTAL_VIEWS',),
+    'total views': ('TOTAL_VIEWS',),
+    'story views': ('STORY_VIEWS',),
+    'engagement rate without video views': ('ENG_RATE_WO_VIEWS',),
+    'engagement rate with video views': ('ENG_RATE_WITH_VIEWS',),
+}
+
+# 'Best Performing Post on the basis of Reach', 'Least Performing Story Basis Reach', ...
+_RANKED_TITLE = re.compile(r'^(best|least) performing (post|story) (?:on the )?basis (?:of )?(reach|engagement)$')
+
+# 'Label: value' label on those slides -> placeholder suffix
+RANKED_LABELS = {
+    'video views': 'VIEWS', 'views': 'VIEWS', 'likes': 'LIKES', 'comments': 'COMMENTS',
+    'shares': 'SHARES', 'saves': 'SAVES', 'engagement': 'ENGAGEMENT', 'reach': 'REACH',
+    'eng. rate w/o vv': 'ENG_RATE', 'eng rate w vv': 'ENG_RATE_WITH_VIEWS',
+    'engagement rate': 'ENG_RATE', 'eng. rate': 'ENG_RATE',
+}
+
+_DATE_RANGE = r'\d{1,2}(?:st|nd|rd|th)\s+[A-Z][a-z]{2}(?:\s+\d{4})?\s*-\s*\d{1,2}(?:st|nd|rd|th)\s+[A-Z][a-z]{2}(?:\s+\d{4})?'
+_DATE_BOX = re.compile(r'^(Date:\s*)?(' + _DATE_RANGE + r')$')
+_LABELLED = re.compile(r'^([^:]+?)\s*:\s*([-+]?[\d,.]+%?)$')
+_MONTH_CHART = re.compile(r'month[\s-]+on[\s-]+month', re.I)
+_ROW = re.compile(r'<a:tr\b.*?</a:tr>', re.S)
+_CELL = re.compile(r'<a:tc\b.*?</a:tc>', re.S)
+
+
+def _merge_split_placeholders(xml: str) -> str:
+    """PowerPoint may split '{{NAME}}' over several runs of a paragraph; move such a paragraph's text into its first run."""
+    def merge(match: re.Match) -> str:
+        paragraph = match.group(0)
+        texts = [m.group(2) for m in _TEXT.finditer(paragraph)]
+        joined = ''.join(texts)
+        if len(PLACEHOLDER.findall(joined)) == sum(len(PLACEHOLDER.findall(t)) for t in texts):
+            return paragraph
+        runs = iter([joined])
+        return _TEXT.sub(lambda m: m.group(1) + next(runs, '') + m.group(3), paragraph)
+    return _PARAGRAPH.sub(merge, xml)
+
+
+def _paragraph_text(paragraph: str) -> str:
+    return unescape(''.join(m.group(2) for m in _TEXT.finditer(paragraph))).strip()
+
+
+def _label(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+
+def _replace_in_paragraph(paragraph: str, old: str, new: str) -> str:
+    """`old` -> `new` in the run holding it, or across the paragraph's runs merged into the first."""
+    runs = list(_TEXT.finditer(paragraph))
+    for run in reversed(runs):
+        if old in run.group(2):
+            start, end = run.span(2)
+            return paragraph[:start] + run.group(2).replace(old, new) + paragraph[end:]
+    merged = iter([''.join(run.group(2) for run in runs).replace(old, new)])
+    return _TEXT.sub(lambda m: m.group(1) + next(merged, '') + m.group(3), paragraph)
+
+
+def _blank(paragraph: str) -> str:
+    return _TEXT.sub(lambda m: m.group(1) + m.group(3), paragraph)
+
+
+def _bind_summary_table(xml: str, code: str) -> str:
+    def row(match: re.Match) -> str:
+        cells = _CELL.findall(match.group(0))
+        label = _label(re.sub(r'^(instagram|facebook)\s+', '', _paragraph_text(cells[0]) if cells else '', flags=re.I))
+        if label == 'particulars':
+            # Date headers: '(Previous Week)' under the range stays
+            names, values_only = ['{{PREV_DATE_RANGE}}', '{{REPORT_DATE_RANGE}}'], False
+        elif label in SUMMARY_ROWS:
+            names = ['|'.join('{{' + prefix + code + '_' + name + suffix + '}}' for name in SUMMARY_ROWS[label])
+                     for prefix, suffix in (('PREV_', ''), ('', ''), ('', '_CHANGE'))]
+            values_only = True
+        else:
+            return match.group(0)
+        out = match.group(0)
+        for cell, name in zip(cells[1:], names):
+            paragraphs = [p for p in _PARAGRAPH.findall(cell) if _paragraph_text(p)]
+            if not paragraphs or '{{' in cell:
+                continue
+            bound = cell.replace(paragraphs[0], _replace_in_paragraph(paragraphs[0], escape(_paragraph_text(paragraphs[0])), name), 1)
+            for rest in paragraphs[1:] if values_only else []:
+                bound = bound.replace(rest, _blank(rest), 1)
+            out = out.replace(cell, bound, 1)
+        return out
+    return _ROW.sub(row, xml)
+
+
+def _bind_literals(xml: str, platform: Optional[str]) -> str:
+    """A slide of the brand's literal template with its known numbers turned into placeholders.
+
+    `platform` is the placeholder prefix (IG/FB) of the section the slide is in, if any.
+    """
+    paragraphs = [_label(_paragraph_text(p)) for p in _PARAGRAPH.findall(xml)]
+    text = ' '.join(paragraphs)
+    if 'page analysis summary' in text:
+        code = next((c for name, c in DIVIDERS.items() if c and name + ' page analysis summary' in text), platform)
+        if code:
+            xml = _bind_summary_table(xml, code)
+    title = next((m for m in map(_RANKED_TITLE.match, paragraphs) if m), None)
+    prefix = None
+    if title and platform:
+        rank, kind, metric = title.groups()
+        prefix = f"{platform}_{rank.upper()}_STORY" if kind == 'story' else f"{platform}_{rank.upper()}_{metric.upper()}"
+    month_chart = bool(_MONTH_CHART.search(text))
+
+    def paragraph(match: re.Match) -> str:
+        p = match.group(0)
+        value = _paragraph_text(p)
+        if '{{' in value:
+            return p
+        date = _DATE_BOX.match(value)
+        if date and not month_chart:
+            return _replace_in_paragraph(p, date.group(2), '{{REPORT_DATE_RANGE}}')
+        labelled = _LABELLED.match(value)
+        if prefix and labelled and _label(labelled.group(1)) in RANKED_LABELS:
+            return _replace_in_paragraph(p, labelled.group(2), '{{' + prefix + '_' + RANKED_LABELS[_label(labelled.group(1))] + '}}')
+        return p
+    return _PARAGRAPH.sub(paragraph, xml)
+
+
+def _slide_platforms(slides: Dict[str, bytes]) -> Dict[str, Optional[str]]:
+    """Slide part name -> prefix of the platform section it is in, following the divider slides in slide order."""
+    platforms, platform = {}, None
+    for name in sorted(slides, key=lambda n: int(re.search(r'(\d+)\.xml$', n).group(1))):
+        texts = [t for t in map(_paragraph_text, _PARAGRAPH.findall(slides[name].decode('utf-8'))) if t]
+        if len(texts) == 1 and _label(texts[0]) in DIVIDERS:
+            platform = DIVIDERS[_label(texts[0])]
+        platforms[name] = platform
+    return platforms
+
+
+class DeckTemplate:
+    """A .pptx read once: every part's bytes, with slide XML (literal numbers bound) pre-split around its placeholders."""
+
+    def __init__(self, path: str):
+        # (part name, bytes) or, for slides with placeholders, (part name, [text, NAME, text, NAME, ..., text])
+        self.parts: List[Tuple[str, Any]] = []
+        self.placeholders: Set[str] = set()
+        with zipfile.ZipFile(path) as archive:
+            entries = [(info.filename, archive.read(info)) for info in archive.infolist()]
+        platforms = _slide_platforms({name: data for name, data in entries if _SLIDE.match(name)})
+        for name, data in entries:
+            if _SLIDE.match(name):
+                xml = _bind_literals(_merge_split_placeholders(data.decode('utf-8')), platforms[name])
+                pieces = PLACEHOLDER.split(xml)
+                if len(pieces) > 1:
+                    self.placeholders.update(pieces[1::2])
+                    self.parts.append((name, pieces))
+                    continue
+            self.parts.append((name, data))
+
+    def unused(self, values: Dict[str, str]) -> List[str]:
+        """Names in `values` that no placeholder of the template takes."""
+        return sorted(set(values) - self.placeholders)
+
+    def _fill(self, pieces: List[str], values: Dict[str, str]) -> bytes:
+        out = []
+        for i, piece in enumerate(pieces):
+            if i % 2 == 0:
+                out.append(piece)
+            else:
+                # Placeholders without a value stay visible in the deck
+                out.append(escape(values[piece]) if piece in values else '{{' + piece + '}}')
+        return ''.join(out).encode('utf-8')
+
+    def render(self, values: Dict[str, str]) -> Iterator[bytes]:
+        """The filled-in deck, yielded part by part as the zip is written."""
+        sink = StreamSink()
+        with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED, compresslevel=DECK_COMPRESSLEVEL) as archive:
+            for name, part in self.parts:
+                data = self._fill(part, values) if isinstance(part, list) else part
+                stored = os.path.splitext(name)[1].lower() in STORED_EXTENSIONS
+                archive.writestr(name, data, compress_type=zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED)
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+        yield sink.drain()
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _parse_template(path: str, mtime_ns: int, size: int) -> DeckTemplate:
+    return DeckTemplate(path)
+
+
+def load_template(path: str) -> DeckTemplate:
+    """The parsed template at `path`, re-read only when the file changes."""
+    stat = os.stat(path)
+    return _parse_template(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def render_deck_file(template_path: str, values: Dict[str, str], out_path: str) -> str:
+    """Write one deck to `out_path`. Module-level so process pools can pickle it."""
+    with open(out_path, 'wb') as f:
+        for chunk in load_template(template_path).render(values):
+            f.write(chunk)
+    return out_path
+
+
+def render_deck_files(jobs: List[Tuple[str, Dict[str, str], str]], workers: int = 0) -> List[str]:
+    """render_deck_file for every (template_path, values, out_path), fanned out over `workers` processes."""
+    if workers <= 0 or len(jobs) < 2:
+        return [render_deck_file(*job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        return list(pool.map(render_deck_file, *zip(*jobs)))
+
+
+def iter_archive(files: List[Tuple[str, str]], chunk_bytes: int = 1024 * 1024) -> Iterator[bytes]:
+    """A zip of (archive name, path) files, stored uncompressed (decks already are), yielded as it is written."""
+    sink = StreamSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as archive:
+        for name, path in files:
+            with open(path, 'rb') as src, archive.open(name, 'w', force_zip64=True) as dst:
+                for block in iter(lambda: src.read(chunk_bytes), b''):
+                    dst.write(block)
+                    yield sink.drain()
+    yield sink.drain()
+
+
+# --- VALUES ---
+
+def _count(value: float) -> str:
+    return f"{int(round(value)):,}"
+
+
+def _rate(value: float) -> str:
+    return f"{value:.2f}%"
+
+
+def _ordinal(day: int) -> str:
+    suffix = 'th' if 10 <= day % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(day % 10, 'th')
+    return f"{day}{suffix}"
+
+
+def date_range_label(start: datetime, end: datetime) -> str:
+    """'14th Jan- 20th Jan 2026', as the template's date boxes read."""
+    first = f"{_ordinal(start.day)} {start:%b}" + (f" {start:%Y}" if start.year != end.year else '')
+    return f"{first}- {_ordinal(end.day)} {end:%b %Y}"
+
+
+def previous_period(start: datetime, end: datetime) -> Tuple[datetime, datetime]:
+    """The period of the same length right before (start, end): last week for a weekly deck."""
+    days = (end.date() - start.date()).days + 1
+    return start - timedelta(days=days), start - timedelta(seconds=1)
+
+
+def _post_values(prefix: str, post: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    fields = ['REACH', 'VIEWS', 'LIKES', 'COMMENTS', 'SHARES', 'SAVES', 'ENGAGEMENT',
+              'ENG_RATE', 'ENG_RATE_WITH_VIEWS', 'DATE', 'LINK', 'DESCRIPTION']
+    if post is None:
+        return {f"{prefix}_{field}": '' for field in fields}
+    reach, engagement = post['reach'], post['total_engagement']
+    return {
+        f"{prefix}_REACH": _count(reach),
+        f"{prefix}_VIEWS": _count(post['views']),
+        f"{prefix}_LIKES": _count(post['likes']),
+        f"{prefix}_COMMENTS": _count(post['comments']),
+        f"{prefix}_SHARES": _count(post['shares']),
+        f"{prefix}_SAVES": _count(post['saves']),
+        f"{prefix}_ENGAGEMENT": _count(engagement),
+        f"{prefix}_ENG_RATE": _rate(engagement / reach * 100 if reach else 0.0),
+        f"{prefix}_ENG_RATE_WITH_VIEWS": _rate((engagement + post['views']) / reach * 100 if reach else 0.0),
+        f"{prefix}_DATE": post['publish_time'].split(' ')[0],
+        f"{prefix}_LINK": post['permalink'],
+        f"{prefix}_DESCRIPTION": post['description']
+    }
+
+
+def _story_values(prefix: str, story: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    fields = ['REACH', 'VIEWS', 'ENGAGEMENT', 'DATE', 'LINK']
+    if story is None:
+        return {f"{prefix}_{field}": '' for field in fields}
+    return {
+        f"{prefix}_REACH": _count(story['reach']),
+        f"{prefix}_VIEWS": _count(story['views']),
+        f"{prefix}_ENGAGEMENT": _count(sum(story[col] for col in STORY_ENGAGEMENT)),
+        f"{prefix}_DATE": story['publish_time'].split(' ')[0],
+        f"{prefix}_LINK": story['permalink']
+    }
+
+
+def deck_values(report: Dict[str, Any], previous: Optional[Dict[str, Any]] = None,
+                extra: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+    """Placeholder texts from a generate_report result.
+
+    `previous` (a generate_period_reports entry for the week before) adds
+    PREV_* values and *_CHANGE differences; `extra` supplies (or overrides)
+    hand-entered values such as IG_FOLLOWER_GROWTH.
+    """
+    start = datetime.strptime(report['period']['start'], '%Y-%m-%d')
+    end = datetime.strptime(report['period']['end'], '%Y-%m-%d')
+    values = {"REPORT_DATE_RANGE": date_range_label(start, end)}
+    if previous is not None:
+        prev_start = datetime.strptime(previous['period']['start'], '%Y-%m-%d')
+        prev_end = datetime.strptime(previous['period']['end'], '%Y-%m-%d')
+        values["PREV_DATE_RANGE"] = date_range_label(prev_start, prev_end)
+
+    for platform, code in (('instagram', 'IG'), ('facebook', 'FB')):
+        current = dict(report['aggregated'][platform], posts=report[platform]['stats']['total_posts'])
+        before = dict(previous['aggregated'][platform], posts=previous[platform]['stats']['total_posts']) if previous else None
+        for key, (name, is_rate) in list(PARTICULARS.items()) + [('posts', ('POSTS', False))]:
+            fmt = _rate if is_rate else _count
+            values[f"{code}_{name}"] = fmt(current[key])
+            if before is not None:
+                values[f"PREV_{code}_{name}"] = fmt(before[key])
+                if not is_rate:
+                    values[f"{code}_{name}_CHANGE"] = f"{int(round(current[key])) - int(round(before[key])):+,}"
+        for key, infix in RANKINGS.items():
+            values.update(_post_values(f"{code}_{infix}", report[platform]['rankings'][key]))
+
+    stories = report['stories']
+    story_stats = stories['stats']
+    values.update({
+        "IG_STORIES": _count(story_stats['total_stories']),
+        "IG_STORY_VIEWS": _count(story_stats['total_views']),
+        "IG_STORY_REACH": _count(story_stats['total_reach']),
+        "IG_STORY_INTERACTIONS": _count(story_stats['total_interactions']),
+    })
+    if previous is not None:
+        prev_stats = previous['stories']['stats']
+        for name, key in (('STORIES', 'total_stories'), ('STORY_VIEWS', 'total_views'),
+                          ('STORY_REACH', 'total_reach'), ('STORY_INTERACTIONS', 'total_interactions')):
+            values[f"PREV_IG_{name}"] = _count(prev_stats[key])
+            values[f"IG_{name}_CHANGE"] = f"{story_stats[key] - prev_stats[key]:+,}"
+    # Least reach skips stories without reach data, unless that is all there is (as for posts)
+    data = stories['data']
+    reached = [s for s in data if s['reach'] > 0] or data
+    values.update(_story_values("IG_BEST_STORY", max(data, key=lambda s: s['reach']) if data else None))
+    values.update(_story_values("IG_LEAST_STORY", min(reached, key=lambda s: s['reach']) if reached else None))
+
+    values.update({name: str(value) for name, value in (extra or {}).items()})
+    return values
+
+
+def report_deck_values(engine: AnalyticsEngine, fb: pd.DataFrame, ig: pd.DataFrame, stories: pd.DataFrame,
+                       start: datetime, end: datetime, manual_fb_views: int = 0,
+                       rollups: Optional[Dict[str, Any]] = None,
+                       cold: Optional[Callable[[str, pd.DataFrame], pd.DataFrame]] = None,
+                       extra: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+    """deck_values for (start, end), with the same-length period before it as the previous week.
+
+    The tables must cover both periods. Hand-entered FB story views only apply to the current week.
+    """
+    report = engine.generate_report(fb, ig, stories, start, end, manual_fb_views, rollups=rollups, cold=cold)
+    previous = engine.generate_period_reports(fb, ig, stories, [previous_period(start, end)], rollups=rollups)[0]
+    return deck_values(report, previous, extra)
+
+
+# --- CLI ---
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Render weekly decks from Meta exports and a .pptx template.")
+    parser.add_argument('--template', required=True, help="template .pptx with {{PLACEHOLDER}} texts")
+    parser.add_argument('--facebook', help="Facebook posts export (CSV)")
+    parser.add_argument('--instagram', help="Instagram posts export (CSV)")
+    parser.add_argument('--stories', help="Instagram stories export (CSV)")
+    parser.add_argument('--start', required=True, help="YYYY-MM-DD")
+    parser.add_argument('--end', required=True, help="YYYY-MM-DD")
+    parser.add_argument('--granularity', default='week', help="one deck per day, week (Mon-Sun) or month of the range")
+    parser.add_argument('--fb-story-views', type=int, default=0)
+    parser.add_argument('--value', action='append', default=[], metavar='NAME=TEXT',
+                        help="hand-entered placeholder value, e.g. IG_FOLLOWER_GROWTH=+3,621 (repeatable)")
+    parser.add_argument('--out', default='decks', help="output directory")
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args(argv)
+
+    extra = dict(item.split('=', 1) for item in args.value)
+    unknown = load_template(args.template).unused(extra)
+    if unknown:
+        parser.error(f"the template has no placeholder for: {', '.join(unknown)}")
+    engine = AnalyticsEngine()
+    tables = {}
+    for platform, path in (('facebook', args.facebook), ('instagram', args.instagram), ('stories', args.stories)):
+        if path:
+            with open(path, 'rb') as f:
+                tables[platform] = engine.ingest_stream(platform, f, os.path.basename(path))
+        else:
+            tables[platform] = engine.combine([], platform)
+
+    start = datetime.strptime(args.start, '%Y-%m-%d')
+    end = datetime.strptime(args.end, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
+    os.makedirs(args.out, exist_ok=True)
+    jobs = []
+    for period_start, period_end in period_buckets(start, end, args.granularity):
+        values = report_deck_values(engine, tables['facebook'], tables['instagram'], tables['stories'],
+                                    period_start, period_end, args.fb_story_views, extra=extra)
+        out_path = os.path.join(args.out, f"deck_{period_start:%Y-%m-%d}_{period_end:%Y-%m-%d}.pptx")
+        jobs.append((args.template, values, out_path))
+
+    for path in render_deck_files(jobs, args.workers):
+        print(path)
+    missing = load_template(args.template).placeholders - set(jobs[0][1]) if jobs else set()
+    if missing:
+        print(f"Placeholders left unfilled: {', '.join(sorted(missing))}", file=sys.stderr)
+    unused = load_template(args.template).unused(jobs[0][1]) if jobs else []
+    if unused:
+        print(f"Values the template has no placeholder for: {', '.join(unused)}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,21 @@
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import Callable, List, Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta
+from functools import partial
 import io
+import json
+
+import metrics
+from convert import FileConverter
+from rollup import DailyRollup, ROLLUP_METRICS, covers_whole_days
 
 # --- CONFIGURATION & MAPPINGS ---
 
 FB_POST_COLS = {
     'Post ID': 'post_id',
+    'Page ID': 'account_id',
+    'Page name': 'account_name',
     'Publish time': 'publish_time',
     'Description': 'description',
     'Permalink': 'permalink',
@@ -21,6 +29,8 @@ FB_POST_COLS = {
 
 IG_POST_COLS = {
     'Post ID': 'post_id',
+    'Account ID': 'account_id',
+    'Account username': 'account_name',
     'Publish time': 'publish_time',
     'Description': 'description',
     'Permalink': 'permalink',
@@ -34,8 +44,26 @@ IG_POST_COLS = {
     'Follows': 'follows'
 }
 
+# Per-day breakdown export ("facebook daily.csv"): one row per post per Date
+FB_DAILY_COLS = {
+    'Post ID': 'post_id',
+    'Page ID': 'account_id',
+    'Page name': 'account_name',
+    'Publish time': 'publish_time',
+    'Date': 'date',
+    'Reach': 'reach',
+    'Views': 'views',
+    'Reactions': 'likes',
+    'Comments': 'comments',
+    'Shares': 'shares',
+    'Seconds viewed': 'seconds_viewed',
+    'Ad impressions': 'ad_impressions'
+}
+
 IG_STORY_COLS = {
     'Post ID': 'post_id',
+    'Account ID': 'account_id',
+    'Account username': 'account_name',
     'Publish time': 'publish_time',
     'Permalink': 'permalink',
     'Reach': 'reach',
@@ -50,131 +78,364 @@ IG_STORY_COLS = {
     'Follows': 'follows'
 }
 
+# Numeric columns every normalized table must carry (missing ones are zero-filled)
+POST_METRICS = ['reach', 'views', 'likes', 'comments', 'shares', 'saves', 'follows']
+DAILY_METRICS = ['reach', 'views', 'likes', 'comments', 'shares', 'seconds_viewed', 'ad_impressions']
+STORY_METRICS = ['reach', 'views', 'likes', 'shares', 'replies', 'link_clicks', 'navigation', 'profile_visits', 'sticker_taps', 'follows']
+
+# Columns summed into total_engagement (and the engagement rate numerator)
+POST_ENGAGEMENT = ['likes', 'comments', 'shares', 'saves']
+
+# --- PLATFORM SCHEMA REGISTRY ---
+# One entry per upload pipeline. Adding a platform only needs a new entry here:
+#   columns    -> CSV header to internal name (only these columns are parsed)
+#   label      -> value written to the 'platform' column
+#   metrics    -> numeric columns guaranteed to exist after normalization
+#   engagement -> columns summed into total_engagement, or None to skip derived metrics
+#   key        -> (optional) columns identifying a row for dedup; defaults to post_id
+
+PLATFORM_SCHEMAS = {
+    'facebook': {
+        'label': 'Facebook',
+        'columns': FB_POST_COLS,
+        'metrics': POST_METRICS,
+        'engagement': POST_ENGAGEMENT
+    },
+    'instagram': {
+        'label': 'Instagram',
+        'columns': IG_POST_COLS,
+        'metrics': POST_METRICS,
+        'engagement': POST_ENGAGEMENT
+    },
+    'stories': {
+        'label': 'Instagram Story',
+        'columns': IG_STORY_COLS,
+        'metrics': STORY_METRICS,
+        'engagement': None
+    },
+    # Not a report platform: kept as a separate per-day table (see daily.py)
+    'facebook_daily': {
+        'label': 'Facebook',
+        'columns': FB_DAILY_COLS,
+        'metrics': DAILY_METRICS,
+        'engagement': None,
+        'key': ['post_id', 'date']
+    }
+}
+
+# Rows parsed per chunk by ingest_stream (override with UPLOAD_CHUNK_ROWS in main.py)
+DEFAULT_CHUNK_ROWS = 50_000
+
+# Bucket sizes accepted by period_buckets (and POST /report/batch)
+GRANULARITIES = ['day', 'week', 'month']
+
+# --- REPORT SECTIONS ---
+# generate_report can be narrowed to some of these (`include`); sections left
+# out are not computed at all. A platform name stands for all its sections.
+REPORT_SECTIONS = ['aggregated', 'facebook.stats', 'facebook.rankings', 'facebook.posts',
+                   'instagram.stats', 'instagram.rankings', 'instagram.posts', 'stories.stats', 'stories.data']
+# Row lists that can be projected (`fields`), sorted and paged -> their platform table
+LIST_SECTIONS = {'facebook.posts': 'facebook', 'instagram.posts': 'instagram', 'stories.data': 'stories'}
+# Sections read from the period's totals (one _period_summary)
+SUMMARY_SECTIONS = {'aggregated', 'facebook.stats', 'instagram.stats', 'stories.stats'}
+
+# Text columns are pinned to str while parsing so pandas never guesses (compact_frame decides later)
+TEXT_COLS = ['post_id', 'account_id', 'account_name', 'publish_time', 'date', 'description', 'permalink', 'post_type']
+# Text columns holding dates, converted by FileConverter in every schema that has them
+DATE_COLS = ['publish_time', 'date']
+
+# --- COMPACT COLUMNS ---
+# Combined tables (uploads and stored partitions) are kept in the smallest
+# representation that holds their values exactly:
+#   COUNT_COLS    -> narrowest integer dtype (uint8..uint32; float only if a value is fractional)
+#   post_id       -> int64 when every id is a plain number (Meta ids are), else str
+#   CATEGORY_COLS -> categoricals (a handful of distinct values per table)
+# COLD_COLS are long free text only read to serialize posts; the stores keep
+# them apart from the hot columns scanned by filters, totals and rankings.
+
+COUNT_COLS = set(POST_METRICS + STORY_METRICS + DAILY_METRICS + ['total_engagement'])
+CATEGORY_COLS = ['platform', 'post_type', 'account_id', 'account_name']
+COLD_COLS = ['description', 'permalink']
+
+# Powers of ten up to 10**18: digit counts of int64 ids by binary search
+_DIGIT_BOUNDS = 10 ** np.arange(1, 19, dtype='int64')
+
+
+def narrow_ints(values: np.ndarray) -> np.ndarray:
+    """Smallest integer dtype holding every value (counts are whole numbers; NaN -> 0)."""
+    values = np.rint(np.nan_to_num(np.asarray(values, dtype='float64'))).astype('int64')
+    if len(values) == 0:
+        return values.astype('uint8')
+    lo, hi = int(values.min()), int(values.max())
+    for dtype in ('uint8', 'uint16', 'uint32') if lo >= 0 else ('int8', 'int16', 'int32'):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return values.astype(dtype)
+    return values
+
+
+def _int_ids(ids: pd.Series) -> Optional[pd.Series]:
+    """Text ids as int64 if every one is a plain non-negative number that prints back identically, else None."""
+    if ids.empty or ids.isna().any():
+        return None
+    try:
+        values = ids.astype('int64')
+    except (ValueError, TypeError, OverflowError):
+        return None
+    numbers = values.to_numpy()
+    # Same digit count as the text: no sign, spaces or leading zeros were parsed away
+    digits = np.searchsorted(_DIGIT_BOUNDS, numbers, side='right') + 1
+    if (numbers < 0).any() or not np.array_equal(digits, ids.astype(str).str.len().to_numpy()):
+        return None
+    return values
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """`df` with every column in the compact representation above; values are unchanged."""
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if col in COUNT_COLS and pd.api.types.is_numeric_dtype(series):
+            values = series.to_numpy(dtype='float64', na_value=np.nan)
+            if np.isfinite(values).all() and (values == np.rint(values)).all():
+                columns[col] = narrow_ints(values)
+        elif col == 'post_id' and not pd.api.types.is_integer_dtype(series):
+            ids = _int_ids(series)
+            if ids is not None:
+                columns[col] = ids
+        elif col in CATEGORY_COLS and not isinstance(series.dtype, pd.CategoricalDtype):
+            columns[col] = series.astype('category')
+    return df.assign(**columns) if columns else df
+
+
+def combine_frames(frames: List[pd.DataFrame], key: Optional[List[str]] = None) -> pd.DataFrame:
+    """Concat, dedup on `key` (default post_id; last wins), stable-sort on publish_time (NaT last), compact."""
+    key = key or ['post_id']
+    frames = [f for f in frames if not f.empty] or frames[:1]
+    if not frames:
+        return pd.DataFrame()
+    if len({str(f['post_id'].dtype) for f in frames if 'post_id' in f.columns}) > 1:
+        # int64 ids next to text ids: compare them all as text
+        frames = [f.astype({'post_id': str}) if 'post_id' in f.columns else f for f in frames]
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    if all(col in df.columns for col in key):
+        df = df.drop_duplicates(subset=key, keep='last')
+    if 'publish_time' in df.columns:
+        # Stable sort keeps upload order for posts published in the same minute
+        df = df.sort_values('publish_time', kind='mergesort', na_position='last')
+    return compact_frame(df.reset_index(drop=True))
+
+
+def metric_columns(df: pd.DataFrame) -> List[str]:
+    """Numeric columns a table can be ranked, sorted or filtered on (post_id is numeric but an id)."""
+    return [c for c in df.columns if c != 'post_id' and pd.api.types.is_numeric_dtype(df[c])]
+
+
+def top_k_positions(values: np.ndarray, k: int, largest: bool = True) -> np.ndarray:
+    """Row positions of the k largest (or smallest) values, best first.
+
+    np.partition finds the k-th value in O(n); only the rows at or past it
+    are ordered, so the cost is O(n + k log k) instead of a full sort. Ties
+    go to the earlier row (tables are in publish_time order); NaN ranks last.
+    """
+    values = np.asarray(values, dtype='float64')
+    n = len(values)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype='int64')
+    keys = -values if largest else values.copy()
+    keys[np.isnan(keys)] = np.inf
+    if k < n:
+        kth = np.partition(keys, k - 1)[k - 1]
+        candidates = np.flatnonzero(keys <= kth)
+    else:
+        candidates = np.arange(n)
+    order = np.lexsort((candidates, keys[candidates]))
+    return candidates[order[:k]]
+
+
+def resolve_sections(include: Optional[List[str]] = None) -> List[str]:
+    """The REPORT_SECTIONS named by `include` ('aggregated', 'facebook', 'stories.data', ...); None -> all."""
+    if include is None:
+        return list(REPORT_SECTIONS)
+    sections = []
+    for name in include:
+        matched = [s for s in REPORT_SECTIONS if s == name or s.startswith(name + '.')]
+        if not matched:
+            raise ValueError(f"Unknown section '{name}'. Expected one of: {', '.join(REPORT_SECTIONS)}")
+        sections.extend(s for s in matched if s not in sections)
+    return sections
+
+
+def search_bounds(times: np.ndarray, periods: List[Tuple[datetime, datetime]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Row ranges [lo, hi) of every (start, end) period in a sorted publish_time array."""
+    starts = np.array([np.datetime64(start) for start, _ in periods], dtype='datetime64[us]')
+    ends = np.array([np.datetime64(end) for _, end in periods], dtype='datetime64[us]')
+    # Cast the bounds, not the column, to the column's resolution (start rounds up, end down)
+    lo_keys = starts.astype(times.dtype)
+    lo_keys[lo_keys < starts] += 1
+    lo = np.searchsorted(times, lo_keys, side='left')
+    hi = np.searchsorted(times, ends.astype(times.dtype), side='right')
+    return lo, hi
+
+
+def period_buckets(start_date: datetime, end_date: datetime, granularity: str) -> List[Tuple[datetime, datetime]]:
+    """Split start_date..end_date (whole days) into calendar days, Monday-Sunday weeks or months.
+
+    The first and last bucket are clipped to the range; each bucket ends at 23:59:59.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity '{granularity}'. Expected one of: {', '.join(GRANULARITIES)}")
+    day = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    last = end_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    buckets = []
+    while day <= last:
+        if granularity == 'day':
+            nxt = day + timedelta(days=1)
+        elif granularity == 'week':
+            nxt = day + timedelta(days=7 - day.weekday())
+        else:
+            nxt = (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+        bucket_end = min(nxt, last + timedelta(days=1)) - timedelta(seconds=1)
+        buckets.append((day, bucket_end))
+        day = nxt
+    return buckets
+
+
 class AnalyticsEngine:
     def __init__(self):
         pass
 
-    def _clean_numeric(self, series: pd.Series) -> pd.Series:
-        return pd.to_numeric(series.astype(str).str.replace(',', ''), errors='coerce').fillna(0)
+    def _get_schema(self, platform: str) -> Dict[str, Any]:
+        if platform not in PLATFORM_SCHEMAS:
+            raise ValueError(f"Unknown platform '{platform}'. Expected one of: {', '.join(PLATFORM_SCHEMAS)}")
+        return PLATFORM_SCHEMAS[platform]
 
-    def _parse_date(self, series: pd.Series) -> pd.Series:
-        # Use flexible parsing. 
-        # Note: If dayfirst is ambiguous (e.g. 01/02/2024), pandas defaults to Month-First (US) usually.
-        # Given the user's CSV had 01/28/2026, it is definitely Month-First or YYYY-MM-DD.
-        return pd.to_datetime(series, errors='coerce')
+    def _read_csv(self, platform: str, source, **kwargs):
+        """Parse only the schema's columns, with text dtypes fixed up front.
 
-    def process_facebook_posts(self, file_contents: bytes, filename: str) -> pd.DataFrame:
-        """Process Facebook Posts CSV."""
-        try:
-            df = pd.read_csv(io.BytesIO(file_contents))
-        except Exception as e:
-            raise ValueError(f"Failed to parse CSV: {str(e)}")
+        Numbers like "1,234" are handled by the C parser via `thousands`, so
+        clean exports never reach FileConverter's string path.
+        """
+        mapping = self._get_schema(platform)['columns']
+        dtypes = {src: str for src, dst in mapping.items() if dst in TEXT_COLS}
+        return pd.read_csv(
+            source,
+            usecols=lambda c: c in mapping,
+            dtype=dtypes,
+            thousands=',',
+            **kwargs
+        )
+
+    @metrics.timed('clean')
+    def normalize(self, platform: str, df: pd.DataFrame, converter: Optional[FileConverter] = None) -> pd.DataFrame:
+        """Rename, type and derive metrics for a raw platform frame.
+
+        Pass the same `converter` for every chunk of a file, so formats are
+        sniffed once and its summary covers the whole file.
+        """
+        schema = self._get_schema(platform)
+        mapping = schema['columns']
+        converter = converter or FileConverter()
 
-        mapping = FB_POST_COLS
-        available_cols = [c for c in mapping.keys() if c in df.columns]
-        df = df[available_cols].copy()
         df = df.rename(columns=mapping)
-        df['platform'] = 'Facebook'
-        
-        # Ensure all required numeric cols exist
-        required_nums = ['reach', 'views', 'likes', 'comments', 'shares', 'saves', 'follows']
-        for col in required_nums:
+        df['platform'] = schema['label']
+
+        for col in schema['metrics']:
             if col not in df.columns:
                 df[col] = 0
             else:
-                df[col] = self._clean_numeric(df[col])
+                df[col] = converter.numbers(col, df[col])
 
-        if 'publish_time' in df.columns:
-            df['publish_time'] = self._parse_date(df['publish_time'])
+        for col in DATE_COLS:
+            if col in df.columns:
+                df[col] = converter.dates(col, df[col])
 
         if 'post_id' in df.columns:
             df['post_id'] = df['post_id'].astype(str)
-            df = df.drop_duplicates(subset=['post_id'], keep='last')
+            key = schema.get('key', ['post_id'])
+            if all(col in df.columns for col in key):
+                df = df.drop_duplicates(subset=key, keep='last')
 
-        # Metrics
-        df['total_engagement'] = df['likes'] + df['comments'] + df['shares'] + df['saves']
-        df['rate_numerator'] = df['likes'] + df['comments'] + df['shares'] + df['saves']
-        df['engagement_rate_reach'] = df.apply(
-            lambda x: (x['rate_numerator'] / x['reach']) if x['reach'] > 0 else 0, axis=1
-        )
-        df['engagement_rate_views'] = df.apply(
-            lambda x: (x['rate_numerator'] / x['views']) if x['views'] > 0 else 0, axis=1
-        )
+        if schema['engagement']:
+            df = self._add_engagement_metrics(df, schema['engagement'])
 
         return df
 
-    def process_instagram_posts(self, file_contents: bytes, filename: str) -> pd.DataFrame:
-        """Process Instagram Posts CSV."""
+    def _add_engagement_metrics(self, df: pd.DataFrame, engagement_cols: List[str]) -> pd.DataFrame:
+        """Columnar total_engagement + rates; rows with zero reach/views get 0."""
+        total = df[engagement_cols].to_numpy().sum(axis=1)
+        numerator = total.astype('float64')
+        reach = df['reach'].to_numpy(dtype='float64')
+        views = df['views'].to_numpy(dtype='float64')
+
+        df['total_engagement'] = total
+        df['engagement_rate_reach'] = np.divide(numerator, reach, out=np.zeros(len(df)), where=reach > 0)
+        df['engagement_rate_views'] = np.divide(numerator, views, out=np.zeros(len(df)), where=views > 0)
+        return df
+
+    def ingest(self, platform: str, file_contents: bytes, filename: str,
+               converter: Optional[FileConverter] = None) -> pd.DataFrame:
+        """Parse and normalize one uploaded CSV for the given platform."""
+        self._get_schema(platform)
         try:
-            df = pd.read_csv(io.BytesIO(file_contents))
+            with metrics.span('parse'):
+                df = self._read_csv(platform, io.BytesIO(file_contents))
         except Exception as e:
             raise ValueError(f"Failed to parse CSV: {str(e)}")
 
-        mapping = IG_POST_COLS
-        available_cols = [c for c in mapping.keys() if c in df.columns]
-        df = df[available_cols].copy()
-        df = df.rename(columns=mapping)
-        df['platform'] = 'Instagram'
+        return self.combine([self.normalize(platform, df, converter)], platform)
 
-        # Ensure all required numeric cols exist
-        required_nums = ['reach', 'views', 'likes', 'comments', 'shares', 'saves', 'follows']
-        for col in required_nums:
-            if col not in df.columns:
-                df[col] = 0
-            else:
-                df[col] = self._clean_numeric(df[col])
-
-        if 'publish_time' in df.columns:
-            df['publish_time'] = self._parse_date(df['publish_time'])
+    def ingest_stream(self, platform: str, source, filename: str, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                      converter: Optional[FileConverter] = None) -> pd.DataFrame:
+        """Parse a file-like CSV in fixed-size row chunks.
 
-        if 'post_id' in df.columns:
-            df['post_id'] = df['post_id'].astype(str)
-            df = df.drop_duplicates(subset=['post_id'], keep='last')
-
-        # Metrics
-        df['total_engagement'] = df['likes'] + df['comments'] + df['shares'] + df['saves']
-        df['rate_numerator'] = df['likes'] + df['comments'] + df['shares'] + df['saves']
-        df['engagement_rate_reach'] = df.apply(
-            lambda x: (x['rate_numerator'] / x['reach']) if x['reach'] > 0 else 0, axis=1
-        )
-        df['engagement_rate_views'] = df.apply(
-            lambda x: (x['rate_numerator'] / x['views']) if x['views'] > 0 else 0, axis=1
-        )
-
-        return df
-
-    def process_stories_upload(self, file_contents: bytes, filename: str) -> pd.DataFrame:
-        """Process Instagram Stories CSV."""
+        Each chunk is normalized (and so shrunk to the schema columns) before
+        the next one is read, so the raw text held at any time is bounded by
+        `chunk_rows` rather than by the size of the file. One converter serves
+        all chunks (pass one in to read its summary afterwards).
+        """
+        self._get_schema(platform)
+        converter = converter or FileConverter()
+        parts = []
         try:
-            df = pd.read_csv(io.BytesIO(file_contents))
+            for chunk in metrics.timed_iter('parse', self._read_csv(platform, source, chunksize=chunk_rows)):
+                parts.append(self.normalize(platform, chunk, converter))
         except Exception as e:
             raise ValueError(f"Failed to parse CSV: {str(e)}")
 
-        mapping = IG_STORY_COLS
-        available_cols = [c for c in mapping.keys() if c in df.columns]
-        df = df[available_cols].copy()
-        df = df.rename(columns=mapping)
-        df['platform'] = 'Instagram Story'
+        if not parts:
+            return self.normalize(platform, pd.DataFrame())
+        return self.combine(parts, platform)
 
-        numeric_cols = ['reach', 'views', 'likes', 'shares', 'replies', 'link_clicks', 'navigation', 'profile_visits', 'sticker_taps', 'follows']
-        for col in numeric_cols:
-            if col not in df.columns:
-                df[col] = 0
-            else:
-                df[col] = self._clean_numeric(df[col])
-        
-        if 'publish_time' in df.columns:
-            df['publish_time'] = self._parse_date(df['publish_time'])
+    # --- TIME INDEX ---
+    # Every stored platform table is kept sorted on publish_time (NaT last).
+    # combine() establishes that order; slice_range() relies on it.
 
-        if 'post_id' in df.columns:
-            df['post_id'] = df['post_id'].astype(str)
-            df = df.drop_duplicates(subset=['post_id'], keep='last')
-        
-        return df
+    @metrics.timed('dedup')
+    def combine(self, frames: List[pd.DataFrame], platform: Optional[str] = None) -> pd.DataFrame:
+        """Merge normalized frames: later frames win on post_id (or the platform's key), result sorted by time."""
+        key = self._get_schema(platform).get('key') if platform else None
+        return combine_frames(frames, key)
 
-    def _get_platform_stats(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Calculate stats for a single platform DataFrame."""
-        if df.empty:
+    @metrics.timed('filter')
+    def slice_range(self, df: pd.DataFrame, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        """Rows with start_date <= publish_time <= end_date, as a zero-copy slice.
+
+        Two binary searches over the sorted publish_time column replace a full
+        boolean mask, so the cost depends on the window, not the history.
+        """
+        if df.empty or 'publish_time' not in df.columns:
+            return pd.DataFrame()
+        lo, hi = self._search_bounds(df['publish_time'].to_numpy(), [(start_date, end_date)])
+        return df.iloc[lo[0]:hi[0]]
+
+    def _search_bounds(self, times: np.ndarray, periods: List[Tuple[datetime, datetime]]) -> Tuple[np.ndarray, np.ndarray]:
+        return search_bounds(times, periods)
+
+    def _get_platform_stats(self, totals: Dict[str, int]) -> Dict[str, Any]:
+        """Calculate stats for a single platform from its summed totals."""
+        if totals['posts'] == 0:
             return {
                 "total_posts": 0,
                 "total_reach": 0,
@@ -184,18 +445,12 @@ class AnalyticsEngine:
                 "avg_engagement_rate_views": 0.0,
                 "total_follows": 0
             }
-        
-        # Robust summation
-        def safe_sum(col_name: str) -> int:
-            if col_name in df.columns:
-                return int(df[col_name].sum())
-            return 0
-
-        total_posts = int(len(df))
-        total_reach = safe_sum('reach')
-        total_views = safe_sum('views')
-        total_engagement = safe_sum('total_engagement')
-        total_follows = safe_sum('follows')
+
+        total_posts = totals['posts']
+        total_reach = totals['reach']
+        total_views = totals['views']
+        total_engagement = totals['total_engagement']
+        total_follows = totals['follows']
         
         # Strict Formula: (Total Engagement / Total Reach)
         avg_eng_rate_reach = (total_engagement / total_reach) if total_reach > 0 else 0.0
@@ -211,132 +466,242 @@ class AnalyticsEngine:
             "total_follows": total_follows
         }
 
-    def _get_rankings(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Get best and worst performers."""
+    # --- RANKINGS ---
+    # Best/worst posts come from top_k_positions, never from sorting the table.
+
+    def _ranking_records(self, df: pd.DataFrame) -> List[Dict]:
+        return self._zip_records({
+            "post_id": self._text_col(df, 'post_id'),
+            "platform": self._text_col(df, 'platform'),
+            "reach": self._int_col(df, 'reach'),
+            "views": self._int_col(df, 'views'),
+            "likes": self._int_col(df, 'likes'),
+            "comments": self._int_col(df, 'comments'),
+            "shares": self._int_col(df, 'shares'),
+            "saves": self._int_col(df, 'saves'),
+            "total_engagement": self._int_col(df, 'total_engagement'),
+            "permalink": self._text_col(df, 'permalink'),
+            "description": self._text_col(df, 'description', max_len=80),
+            "publish_time": self._time_col(df)
+        })
+
+    def _pick(self, df: pd.DataFrame, col: str, largest: bool,
+              cold: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None) -> Optional[Dict]:
+        positions = top_k_positions(df[col].to_numpy(), 1, largest)
+        if not len(positions):
+            return None
+        rows = df.iloc[positions]
+        return self._ranking_records(cold(rows) if cold is not None else rows)[0]
+
+    @metrics.timed('rank')
+    def _get_rankings(self, df: pd.DataFrame,
+                      cold: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None) -> Dict[str, Any]:
+        """Get best and worst performers. `cold(rows)` adds the COLD_COLS of just the picked rows."""
+        rankings = {
+            "best_reach": None,
+            "least_reach": None,
+            "best_engagement": None,
+            "least_engagement": None
+        }
         if df.empty:
-            return {
-                "best_reach": None,
-                "least_reach": None,
-                "best_engagement": None,
-                "least_engagement": None
-            }
-
-        def row_to_dict(row):
-            return {
-                "post_id": row['post_id'],
-                "platform": row['platform'],
-                "reach": int(row['reach']),
-                "views": int(row['views']),
-                "likes": int(row['likes']),
-                "comments": int(row['comments']),
-                "shares": int(row['shares']),
-                "saves": int(row.get('saves', 0)),
-                "total_engagement": int(row['total_engagement']),
-                "permalink": row.get('permalink', ''),
-                "description": str(row.get('description', ''))[:80] if pd.notna(row.get('description')) else "",
-                "publish_time": row['publish_time'].strftime('%Y-%m-%d %H:%M') if pd.notna(row.get('publish_time')) else ''
-            }
+            return rankings
 
-        # Sort by reach
         if 'reach' in df.columns:
+            rankings['best_reach'] = self._pick(df, 'reach', largest=True, cold=cold)
+            # Least reach ignores posts with no reach data, unless that is all there is
             valid_reach_df = df[df['reach'] > 0]
-            by_reach = df.sort_values('reach', ascending=False)
-            best_reach = row_to_dict(by_reach.iloc[0]) if len(by_reach) > 0 else None
-            
-            if not valid_reach_df.empty:
-                by_reach_valid = valid_reach_df.sort_values('reach', ascending=True)
-                least_reach = row_to_dict(by_reach_valid.iloc[0])
-            else:
-                least_reach = row_to_dict(by_reach.iloc[-1]) if len(by_reach) > 0 else None
-        else:
-            best_reach = None
-            least_reach = None
+            rankings['least_reach'] = self._pick(valid_reach_df if not valid_reach_df.empty else df, 'reach',
+                                                 largest=False, cold=cold)
 
-        # Sort by engagement
         if 'total_engagement' in df.columns:
-            by_engagement = df.sort_values('total_engagement', ascending=False)
-            best_engagement = row_to_dict(by_engagement.iloc[0]) if len(by_engagement) > 0 else None
-            least_engagement = row_to_dict(by_engagement.iloc[-1]) if len(by_engagement) > 0 else None
-        else:
-            best_engagement = None
-            least_engagement = None
+            rankings['best_engagement'] = self._pick(df, 'total_engagement', largest=True, cold=cold)
+            rankings['least_engagement'] = self._pick(df, 'total_engagement', largest=False, cold=cold)
+
+        return rankings
 
+    @metrics.timed('rank')
+    def leaderboard(self, df: pd.DataFrame, metric: str, n: int = 10,
+                    cold: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None) -> Dict[str, Any]:
+        """Top and bottom `n` posts of a (date-sliced) table on any numeric column.
+
+        `cold(rows)` adds the COLD_COLS of just the 2n picked rows (see Snapshot.attach_cold).
+        """
+        if df.empty:
+            return {"metric": metric, "count": 0, "top": [], "bottom": []}
+        numeric = metric_columns(df)
+        if metric not in numeric:
+            raise ValueError(f"Unknown metric '{metric}'. Expected one of: {', '.join(numeric)}")
+
+        values = df[metric].to_numpy()
+        top = df.iloc[top_k_positions(values, n, largest=True)]
+        bottom = df.iloc[top_k_positions(values, n, largest=False)]
+        if cold is not None:
+            top, bottom = cold(top), cold(bottom)
         return {
-            "best_reach": best_reach,
-            "least_reach": least_reach,
-            "best_engagement": best_engagement,
-            "least_engagement": least_engagement
+            "metric": metric,
+            "count": int(len(df)),
+            "top": self._leaderboard_records(top, metric),
+            "bottom": self._leaderboard_records(bottom, metric)
         }
 
-    def _df_to_post_list(self, df: pd.DataFrame) -> List[Dict]:
+    def _leaderboard_records(self, df: pd.DataFrame, metric: str) -> List[Dict]:
+        records = self._ranking_records(df)
+        values = self._int_col(df, metric) if pd.api.types.is_integer_dtype(df[metric]) else self._float_col(df, metric)
+        for record, value in zip(records, values):
+            record["value"] = value
+        return records
+
+    # --- COLUMNAR SERIALIZATION ---
+    # Each helper converts a whole column to plain Python values in one pass;
+    # rows are only assembled at the end by zipping the columns together.
+
+    def _time_col(self, df: pd.DataFrame, col: str = 'publish_time') -> List[str]:
+        if col not in df.columns:
+            return [''] * len(df)
+        # numpy formats the whole array in C; far cheaper than Series.dt.strftime
+        values = df[col].to_numpy(dtype='datetime64[m]')
+        text = np.char.replace(np.datetime_as_string(values, unit='m'), 'T', ' ')
+        text[np.isnat(values)] = ''
+        return text.tolist()
+
+    def _int_col(self, df: pd.DataFrame, col: str) -> List[int]:
+        if col not in df.columns:
+            return [0] * len(df)
+        return df[col].fillna(0).to_numpy().astype('int64').tolist()
+
+    def _float_col(self, df: pd.DataFrame, col: str) -> List[float]:
+        if col not in df.columns:
+            return [0.0] * len(df)
+        return df[col].fillna(0).to_numpy(dtype='float64').tolist()
+
+    def _text_col(self, df: pd.DataFrame, col: str, max_len: Optional[int] = None) -> List[str]:
+        if col not in df.columns:
+            return [''] * len(df)
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype(object)
+        elif pd.api.types.is_integer_dtype(series):
+            # Numeric post_ids are stored as int64 but always served as text
+            series = series.astype(str)
+        if max_len is not None:
+            series = series.astype(str).str.slice(0, max_len).where(series.notna(), '')
+        return series.fillna('').tolist()
+
+    def _zip_records(self, columns: Dict[str, List]) -> List[Dict]:
+        keys = list(columns.keys())
+        return [dict(zip(keys, values)) for values in zip(*columns.values())]
+
+    def _project(self, df: pd.DataFrame, columns: Dict[str, Tuple[Callable, str]],
+                 fields: Optional[List[str]]) -> List[Dict]:
+        """Rows of `df` keyed as in `columns` (record key -> (column helper, df column)); only `fields` if given."""
+        if df.empty:
+            return []
+        return self._zip_records({
+            key: convert(df, col) for key, (convert, col) in columns.items() if fields is None or key in fields
+        })
+
+    def _post_columns(self) -> Dict[str, Tuple[Callable, str]]:
+        return {
+            "post_id": (self._text_col, 'post_id'),
+            "publish_time": (self._time_col, 'publish_time'),
+            "post_type": (self._text_col, 'post_type'),
+            "reach": (self._int_col, 'reach'),
+            "views": (self._int_col, 'views'),
+            "likes": (self._int_col, 'likes'),
+            "comments": (self._int_col, 'comments'),
+            "shares": (self._int_col, 'shares'),
+            "saves": (self._int_col, 'saves'),
+            "follows": (self._int_col, 'follows'),
+            "total_engagement": (self._int_col, 'total_engagement'),
+            "engagement_rate": (self._float_col, 'engagement_rate_reach'),
+            "permalink": (self._text_col, 'permalink'),
+            "description": (lambda df, col: self._text_col(df, col, max_len=50), 'description')
+        }
+
+    def _story_columns(self) -> Dict[str, Tuple[Callable, str]]:
+        return {
+            "post_id": (self._text_col, 'post_id'),
+            "publish_time": (self._time_col, 'publish_time'),
+            "reach": (self._int_col, 'reach'),
+            "views": (self._int_col, 'views'),
+            "likes": (self._int_col, 'likes'),
+            "shares": (self._int_col, 'shares'),
+            "replies": (self._int_col, 'replies'),
+            "link_clicks": (self._int_col, 'link_clicks'),
+            "profile_visits": (self._int_col, 'profile_visits'),
+            "follows": (self._int_col, 'follows'),
+            "sticker_taps": (self._int_col, 'sticker_taps'),
+            "permalink": (self._text_col, 'permalink')
+        }
+
+    @metrics.timed('serialize')
+    def _df_to_post_list(self, df: pd.DataFrame, fields: Optional[List[str]] = None) -> List[Dict]:
         """Convert DataFrame to list of post dicts for the table."""
-        posts = []
-        for _, row in df.iterrows():
-            posts.append({
-                "post_id": row['post_id'],
-                "publish_time": row['publish_time'].strftime('%Y-%m-%d %H:%M') if pd.notna(row['publish_time']) else '',
-                "post_type": row.get('post_type', ''),
-                "reach": int(row['reach']),
-                "views": int(row['views']),
-                "likes": int(row['likes']),
-                "comments": int(row['comments']),
-                "shares": int(row['shares']),
-                "saves": int(row.get('saves', 0)),
-                "follows": int(row.get('follows', 0)),
-                "total_engagement": int(row['total_engagement']),
-                "engagement_rate": float(row.get('engagement_rate_reach', 0)),
-                "permalink": row.get('permalink', ''),
-                "description": str(row.get('description', ''))[:50] if pd.notna(row.get('description')) else ""
-            })
-        return posts
-
-    def _story_df_to_list(self, df: pd.DataFrame) -> List[Dict]:
+        return self._project(df, self._post_columns(), fields)
+
+    @metrics.timed('serialize')
+    def _story_df_to_list(self, df: pd.DataFrame, fields: Optional[List[str]] = None) -> List[Dict]:
         """Convert Story DataFrame to list."""
-        stories = []
-        for _, row in df.iterrows():
-            stories.append({
-                "post_id": row['post_id'],
-                "publish_time": row['publish_time'].strftime('%Y-%m-%d %H:%M') if pd.notna(row['publish_time']) else '',
-                "reach": int(row['reach']),
-                "views": int(row['views']),
-                "likes": int(row.get('likes', 0)),
-                "shares": int(row.get('shares', 0)),
-                "replies": int(row.get('replies', 0)),
-                "link_clicks": int(row.get('link_clicks', 0)),
-                "profile_visits": int(row.get('profile_visits', 0)),
-                "follows": int(row.get('follows', 0)),
-                "sticker_taps": int(row.get('sticker_taps', 0)),
-                "permalink": row.get('permalink', '')
-            })
-        return stories
-
-    def _calculate_split_particulars(self, fb_df: pd.DataFrame, ig_df: pd.DataFrame, stories_df: pd.DataFrame, fb_manual_views: int = 0) -> Dict[str, Any]:
+        return self._project(df, self._story_columns(), fields)
+
+    def rows_to_records(self, platform: str, df: pd.DataFrame, fields: Optional[List[str]] = None) -> List[Dict]:
+        """Rows of a platform table as /report post records (story records for 'stories')."""
+        if platform == 'stories':
+            return self._story_df_to_list(df, fields)
+        return self._df_to_post_list(df, fields)
+
+    def row_fields(self) -> List[str]:
+        """Keys of post and story rows, as accepted by generate_report's `fields`."""
+        return list(dict.fromkeys([*self._post_columns(), *self._story_columns()]))
+
+    # --- PAGING ---
+    # List sections are paged by offset into their (stably) sorted order:
+    # top_k_positions ranks only offset + limit rows, never the whole table.
+
+    def _sort_keys(self, df: pd.DataFrame, sort: str) -> np.ndarray:
+        if sort == 'publish_time':
+            times = df['publish_time'].to_numpy(dtype='datetime64[ns]')
+            keys = times.view('int64').astype('float64')
+            keys[np.isnat(times)] = np.nan
+            return keys
+        numeric = metric_columns(df)
+        if sort not in numeric:
+            raise ValueError(f"Unknown sort column '{sort}'. Expected publish_time or one of: {', '.join(numeric)}")
+        return df[sort].to_numpy()
+
+    def page_positions(self, df: pd.DataFrame, sort: Optional[str] = None, descending: bool = True,
+                       offset: int = 0, limit: Optional[int] = None) -> np.ndarray:
+        """Row positions of one page of `df`, ordered on `sort` (None: publish_time order as stored)."""
+        n = len(df)
+        end = n if limit is None else min(offset + limit, n)
+        if sort is None or df.empty:
+            return np.arange(min(offset, end), end)
+        return top_k_positions(self._sort_keys(df, sort), end, largest=descending)[offset:]
+
+    def _calculate_split_particulars(self, fb: Dict[str, int], ig: Dict[str, int], stories: Dict[str, int], fb_manual_views: int = 0) -> Dict[str, Any]:
         """
         Calculate 'Particulars' SEPARATELY for Facebook and Instagram.
+        Takes the summed totals of each platform (see _totals).
         """
-        def safe_sum(df, col):
-            if df.empty or col not in df.columns: return 0
-            return int(df[col].sum())
-
         # ------------------------------------------
         # 1. INSTAGRAM (Posts + Stories)
         # ------------------------------------------
-        ig_posts_reach = safe_sum(ig_df, 'reach')
-        story_reach = safe_sum(stories_df, 'reach')
+        ig_posts_reach = ig['reach']
+        story_reach = stories['reach']
         ig_total_reach = ig_posts_reach + story_reach
         
-        ig_total_views = safe_sum(ig_df, 'views')
+        ig_total_views = ig['views']
 
         # Interactions w/o Views
         ig_post_interactions = (
-           safe_sum(ig_df, 'likes') + safe_sum(ig_df, 'comments') + 
-           safe_sum(ig_df, 'shares') + safe_sum(ig_df, 'saves')
+           ig['likes'] + ig['comments'] + 
+           ig['shares'] + ig['saves']
         )
         story_interactions = (
-            safe_sum(stories_df, 'likes') + safe_sum(stories_df, 'shares') + 
-            safe_sum(stories_df, 'replies') + safe_sum(stories_df, 'link_clicks') +
-            safe_sum(stories_df, 'profile_visits') + safe_sum(stories_df, 'sticker_taps') +
-            safe_sum(stories_df, 'follows')
+            stories['likes'] + stories['shares'] + 
+            stories['replies'] + stories['link_clicks'] +
+            stories['profile_visits'] + stories['sticker_taps'] +
+            stories['follows']
         )
         ig_interactions_only = ig_post_interactions + story_interactions
 
@@ -350,18 +715,18 @@ class AnalyticsEngine:
         else:
             ig_eng_rate_with_views = ig_eng_rate_wo_views = ig_video_view_rate = 0.0
 
-        ig_count = len(ig_df)
+        ig_count = ig['posts']
         ig_avg_interaction = (ig_interactions_only / ig_count) if ig_count > 0 else 0.0
 
         # ------------------------------------------
         # 2. FACEBOOK (Posts Only + Manual Story Views)
         # ------------------------------------------
-        fb_total_reach = safe_sum(fb_df, 'reach')
-        fb_total_views = safe_sum(fb_df, 'views') + fb_manual_views
+        fb_total_reach = fb['reach']
+        fb_total_views = fb['views'] + fb_manual_views
         
         fb_interactions_only = (
-            safe_sum(fb_df, 'likes') + safe_sum(fb_df, 'comments') + 
-            safe_sum(fb_df, 'shares') + safe_sum(fb_df, 'saves')
+            fb['likes'] + fb['comments'] + 
+            fb['shares'] + fb['saves']
         )
 
         fb_total_engagement = fb_interactions_only + fb_total_views
@@ -373,7 +738,7 @@ class AnalyticsEngine:
         else:
             fb_eng_rate_with_views = fb_eng_rate_wo_views = fb_video_view_rate = 0.0
 
-        fb_count = len(fb_df)
+        fb_count = fb['posts']
         fb_avg_interaction = (fb_interactions_only / fb_count) if fb_count > 0 else 0.0
 
         return {
@@ -399,26 +764,167 @@ class AnalyticsEngine:
             }
         }
 
-    def generate_report(self, fb_df: pd.DataFrame, ig_df: pd.DataFrame, stories_df: pd.DataFrame, 
-                       start_date: datetime, end_date: datetime, manual_fb_views: int = 0) -> Dict[str, Any]:
-        """Generate the final JSON report with SEPARATE + AGGREGATED platform data."""
+    def _totals(self, df: pd.DataFrame) -> Dict[str, int]:
+        """Sum every ROLLUP_METRICS column of a (filtered) frame in one pass per column."""
+        totals = {col: int(df[col].sum()) if col in df.columns else 0 for col in ROLLUP_METRICS}
+        totals['posts'] = int(len(df))
+        return totals
+
+    @metrics.timed('aggregate')
+    def _range_totals(self, df: pd.DataFrame, rollup: Optional[DailyRollup],
+                      start_date: datetime, end_date: datetime) -> Dict[str, int]:
+        """Prefix-sum lookup when a rollup covers the window, else sum the sliced rows."""
+        if rollup is not None and covers_whole_days(start_date, end_date):
+            return rollup.totals(start_date, end_date)
+        return self._totals(df)
+
+    def _totals_many(self, df: pd.DataFrame, periods: List[Tuple[datetime, datetime]]) -> List[Dict[str, int]]:
+        """_totals of every period from one cumulative sum per column over a sorted table.
+
+        Each period is then two binary searches and a subtraction, so the cost
+        is O(rows + periods log rows) however many periods overlap.
+        """
+        if df.empty or 'publish_time' not in df.columns:
+            return [self._totals(df.iloc[0:0]) for _ in periods]
+        lo, hi = self._search_bounds(df['publish_time'].to_numpy(), periods)
+        sums = {}
+        for col in ROLLUP_METRICS:
+            if col not in df.columns:
+                continue
+            dtype = 'int64' if pd.api.types.is_integer_dtype(df[col]) else 'float64'
+            cum = np.concatenate(([0], np.cumsum(df[col].to_numpy(dtype=dtype))))
+            sums[col] = cum[hi] - cum[lo]
+        return [
+            {**{col: int(sums[col][i]) if col in sums else 0 for col in ROLLUP_METRICS}, 'posts': int(hi[i] - lo[i])}
+            for i in range(len(periods))
+        ]
+
+    @metrics.timed('aggregate')
+    def _period_totals(self, df: pd.DataFrame, rollup: Optional[DailyRollup],
+                       periods: List[Tuple[datetime, datetime]]) -> List[Dict[str, int]]:
+        """_range_totals for many periods: rollup lookups when every period is whole days, else one row pass."""
+        if rollup is not None and all(covers_whole_days(start, end) for start, end in periods):
+            return rollup.totals_many(periods)
+        return self._totals_many(df, periods)
+
+    def _get_story_stats(self, totals: Dict[str, int]) -> Dict[str, Any]:
+        s_views = totals['views']
+        s_count = totals['posts']
         
-        # Filter Dates
-        def filter_date(df):
-            if not df.empty and 'publish_time' in df.columns:
-                mask = (df['publish_time'] >= start_date) & (df['publish_time'] <= end_date)
-                return df.loc[mask].copy()
-            return pd.DataFrame()
+        s_interactions = (
+            totals['likes'] + totals['shares'] + 
+            totals['replies'] + totals['link_clicks'] +
+            totals['profile_visits'] + totals['sticker_taps'] +
+            totals['follows']
+        )
 
-        fb_filtered = filter_date(fb_df)
-        ig_filtered = filter_date(ig_df)
-        s_filtered = filter_date(stories_df)
+        return {
+            "total_stories": int(s_count),
+            "total_reach": totals['reach'],
+            "total_views": s_views,
+            "avg_views_per_story": float(s_views / s_count) if s_count > 0 else 0.0,
+            "total_link_clicks": totals['link_clicks'],
+            "total_replies": totals['replies'],
+            "total_profile_visits": totals['profile_visits'],
+            "total_follows": totals['follows'],
+            "total_interactions": s_interactions
+        }
+
+    def generate_report(self, fb_df: pd.DataFrame, ig_df: pd.DataFrame, stories_df: pd.DataFrame, 
+                       start_date: datetime, end_date: datetime, manual_fb_views: int = 0,
+                       rollups: Optional[Dict[str, DailyRollup]] = None,
+                       cold: Optional[Callable[[str, pd.DataFrame], pd.DataFrame]] = None,
+                       include: Optional[List[str]] = None, fields: Optional[List[str]] = None,
+                       sort: Optional[str] = None, descending: bool = True,
+                       offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Generate the final JSON report with SEPARATE + AGGREGATED platform data.
+
+        `rollups` ({'facebook': ..., 'instagram': ..., 'stories': ...}) lets the
+        totals come from prefix sums; raw rows are then only read for the
+        rankings and post lists. `cold(platform, rows)` adds the COLD_COLS of
+        the rows about to be serialized when the tables were loaded without them.
+
+        `include` (see resolve_sections) limits the report to some sections;
+        the others are not computed. `fields` keeps only those keys of post
+        and story rows. With `sort`, `offset` or `limit` the LIST_SECTIONS hold
+        one page each and `pages` gives every list's total row count and the
+        offset of its next page (None on the last one).
+        """
+        sections = resolve_sections(include)
+        if fields is not None:
+            unknown = [f for f in fields if f not in self.row_fields()]
+            if unknown:
+                raise ValueError(f"Unknown field '{unknown[0]}'. Expected any of: {', '.join(self.row_fields())}")
+        rollups = rollups or {}
+
+        # Filter Dates (tables are sorted on publish_time, so this is a binary search)
+        filtered = {
+            'facebook': self.slice_range(fb_df, start_date, end_date),
+            'instagram': self.slice_range(ig_df, start_date, end_date),
+            'stories': self.slice_range(stories_df, start_date, end_date)
+        }
 
+        report: Dict[str, Any] = {"period": {"start": start_date.strftime('%Y-%m-%d'),
+                                             "end": end_date.strftime('%Y-%m-%d')}}
+        if SUMMARY_SECTIONS.intersection(sections):
+            totals = {platform: self._range_totals(df, rollups.get(platform), start_date, end_date)
+                      for platform, df in filtered.items()}
+            summary = self._period_summary(start_date, end_date, totals['facebook'], totals['instagram'],
+                                           totals['stories'], manual_fb_views)
+            if 'aggregated' in sections:
+                report["aggregated"] = summary["aggregated"]
+            for platform in ('facebook', 'instagram', 'stories'):
+                if f"{platform}.stats" in sections:
+                    report.setdefault(platform, {})["stats"] = summary[platform]["stats"]
+
+        # Rankings and post lists need the rows themselves, descriptions and permalinks included
+        for platform in ('facebook', 'instagram'):
+            if f"{platform}.rankings" in sections:
+                report.setdefault(platform, {})["rankings"] = self._get_rankings(
+                    filtered[platform], partial(cold, platform) if cold is not None else None)
+
+        paged = sort is not None or offset > 0 or limit is not None
+        needs_cold = cold is not None and (fields is None or bool(set(fields) & set(COLD_COLS)))
+        for section, platform in LIST_SECTIONS.items():
+            if section not in sections:
+                continue
+            df = filtered[platform]
+            rows = df.iloc[self.page_positions(df, sort, descending, offset, limit)] if paged else df
+            if needs_cold:
+                rows = cold(platform, rows)
+            report.setdefault(platform, {})[section.split('.')[1]] = self.rows_to_records(platform, rows, fields)
+            if paged:
+                after = offset + len(rows)
+                report.setdefault("pages", {})[section] = {"total": int(len(df)),
+                                                           "next_offset": after if after < len(df) else None}
+        return report
+
+    def row_platforms(self, start_date: datetime, end_date: datetime,
+                      rollups: Optional[Dict[str, DailyRollup]] = None,
+                      include: Optional[List[str]] = None) -> List[str]:
+        """Platforms whose rows generate_report reads for `include`; the others can be passed empty.
+
+        Rankings and lists always need rows; totals only when no rollup
+        answers them (a missing rollup, or a window that is not whole days).
+        """
+        sections = resolve_sections(include)
+        rollups = rollups or {}
+        needed = {platform for section, platform in LIST_SECTIONS.items() if section in sections}
+        needed.update(platform for platform in ('facebook', 'instagram') if f"{platform}.rankings" in sections)
+        if SUMMARY_SECTIONS.intersection(sections):
+            whole_days = covers_whole_days(start_date, end_date)
+            needed.update(platform for platform in ('facebook', 'instagram', 'stories')
+                          if rollups.get(platform) is None or not whole_days)
+        return [platform for platform in ('facebook', 'instagram', 'stories') if platform in needed]
+
+    def _period_summary(self, start_date: datetime, end_date: datetime, fb_totals: Dict[str, int],
+                        ig_totals: Dict[str, int], s_totals: Dict[str, int], manual_fb_views: int = 0) -> Dict[str, Any]:
+        """Particulars and per-platform stats of one period, from its summed totals."""
         # SPLIT STATS
-        split_particulars = self._calculate_split_particulars(fb_filtered, ig_filtered, s_filtered, manual_fb_views)
+        split_particulars = self._calculate_split_particulars(fb_totals, ig_totals, s_totals, manual_fb_views)
 
         # FACEBOOK Section
-        fb_stats = self._get_platform_stats(fb_filtered)
+        fb_stats = self._get_platform_stats(fb_totals)
         
         # Add Manual FB Views
         if manual_fb_views > 0:
@@ -428,60 +934,55 @@ class AnalyticsEngine:
                 fb_stats['video_view_rate'] = (fb_stats['total_views'] / fb_stats['total_reach']) * 100
                 fb_stats['eng_rate_with_views'] = (fb_stats['total_engagement'] / fb_stats['total_reach']) * 100
 
-        fb_rankings = self._get_rankings(fb_filtered)
-        fb_posts = self._df_to_post_list(fb_filtered)
-
-        # INSTAGRAM Section
-        ig_stats = self._get_platform_stats(ig_filtered)
-        ig_rankings = self._get_rankings(ig_filtered)
-        ig_posts = self._df_to_post_list(ig_filtered)
-
-        # STORIES Section
-        def safe_sum(df, col):
-            if df.empty or col not in df.columns: return 0
-            return int(df[col].sum())
-
-        s_views = safe_sum(s_filtered, 'views')
-        s_count = len(s_filtered)
-        
-        s_interactions = (
-            safe_sum(s_filtered, 'likes') + safe_sum(s_filtered, 'shares') + 
-            safe_sum(s_filtered, 'replies') + safe_sum(s_filtered, 'link_clicks') +
-            safe_sum(s_filtered, 'profile_visits') + safe_sum(s_filtered, 'sticker_taps') +
-            safe_sum(s_filtered, 'follows')
-        )
-
-        story_stats = {
-            "total_stories": int(s_count),
-            "total_reach": safe_sum(s_filtered, 'reach'),
-            "total_views": s_views,
-            "avg_views_per_story": float(s_views / s_count) if s_count > 0 else 0.0,
-            "total_link_clicks": safe_sum(s_filtered, 'link_clicks'),
-            "total_replies": safe_sum(s_filtered, 'replies'),
-            "total_profile_visits": safe_sum(s_filtered, 'profile_visits'),
-            "total_follows": safe_sum(s_filtered, 'follows'),
-            "total_interactions": s_interactions
-        }
-        story_list = self._story_df_to_list(s_filtered)
-
         return {
             "period": {
                 "start": start_date.strftime('%Y-%m-%d'),
                 "end": end_date.strftime('%Y-%m-%d')
             },
             "aggregated": split_particulars,  # Using 'aggregated' key for now, containing {instagram:..., facebook:...}
-            "facebook": {
-                "stats": fb_stats,
-                "rankings": fb_rankings,
-                "posts": fb_posts
-            },
-            "instagram": {
-                "stats": ig_stats,
-                "rankings": ig_rankings,
-                "posts": ig_posts
-            },
-            "stories": {
-                "stats": story_stats,
-                "data": story_list
-            }
+            "facebook": {"stats": fb_stats},
+            "instagram": {"stats": self._get_platform_stats(ig_totals)},
+            "stories": {"stats": self._get_story_stats(s_totals)}
         }
+
+    def generate_period_reports(self, fb_df: pd.DataFrame, ig_df: pd.DataFrame, stories_df: pd.DataFrame,
+                                periods: List[Tuple[datetime, datetime]], manual_fb_views: int = 0,
+                                rollups: Optional[Dict[str, DailyRollup]] = None) -> List[Dict[str, Any]]:
+        """The stats and particulars of generate_report for every (start, end) period at once.
+
+        Each platform table is scanned once for all periods (see _totals_many),
+        instead of being re-filtered and re-summed per period. Rankings and
+        post lists are left out; fetch those per period with generate_report.
+        """
+        rollups = rollups or {}
+        fb = self._period_totals(fb_df, rollups.get('facebook'), periods)
+        ig = self._period_totals(ig_df, rollups.get('instagram'), periods)
+        stories = self._period_totals(stories_df, rollups.get('stories'), periods)
+        return [
+            self._period_summary(start, end, fb[i], ig[i], stories[i], manual_fb_views)
+            for i, (start, end) in enumerate(periods)
+        ]
+
+
+def ingest_file(platform: str, path: str, filename: str, chunk_rows: int = DEFAULT_CHUNK_ROWS
+                ) -> Tuple[pd.DataFrame, List[Tuple[str, float]], Dict[str, Any]]:
+    """Parse one upload that was spooled to `path`. Module-level so process pools can pickle it.
+
+    Returns the frame, its stage spans and the converter summary (formats
+    found, rows that failed or are ambiguous). The caller replays the spans
+    with metrics.replay(), since a worker process has its own (unscraped) registry.
+    """
+    converter = FileConverter()
+    with metrics.deferred() as spans, open(path, 'rb') as f:
+        df = AnalyticsEngine().ingest_stream(platform, f, filename, chunk_rows=chunk_rows, converter=converter)
+    return df, spans, converter.summary()
+
+
+@metrics.timed('serialize')
+def dumps_report(report: Dict[str, Any]) -> bytes:
+    """Encode a report straight to a UTF-8 JSON body.
+
+    Matches FastAPI's JSONResponse encoding but skips `jsonable_encoder`,
+    which walks every value of the (already plain-Python) post lists again.
+    """
+    return json.dumps(report, ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode('utf-8')
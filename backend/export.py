@@ -0,0 +1,410 @@
+import csv
+import io
+import re
+import zipfile
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+# --- REPORT EXPORT ---
+# The report's particulars, post and story tables as a CSV or XLSX download,
+# laid out like the sheets google_apps_script.js writes: one week block per
+# sheet with a header row, the rows, a totals row and the Post ID key column.
+# Rows are built `batch_rows` at a time straight from the sliced columnar
+# tables (cold columns attached per batch), and every batch is encoded and
+# handed to the response before the next one is read. Memory stays flat in
+# the number of rows, and the first bytes go out before the last row is built.
+
+# Data rows encoded per batch
+EXPORT_BATCH_ROWS = 5_000
+
+# zlib level of the XLSX parts: 1 is ~3x faster than the default for a ~10% larger file
+XLSX_COMPRESSLEVEL = 1
+
+# Weekday names indexed by (days since 1970-01-01 + 3) % 7; the last entry is for NaT
+DAY_NAMES = np.array(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday', ''])
+
+# Control characters XML 1.0 cannot carry (exports occasionally contain them in captions)
+_XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+# --- COLUMNS ---
+# Each helper turns one column of a batch into a whole array or list at once.
+
+def _ints(df: pd.DataFrame, col: str) -> np.ndarray:
+    if col not in df.columns:
+        return np.zeros(len(df), dtype='int64')
+    return df[col].fillna(0).to_numpy().astype('int64')
+
+
+def _text(df: pd.DataFrame, col: str) -> List[str]:
+    if col not in df.columns:
+        return [''] * len(df)
+    series = df[col]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    elif pd.api.types.is_integer_dtype(series):
+        series = series.astype(str)
+    return series.fillna('').tolist()
+
+
+def _times(df: pd.DataFrame, unit: str) -> List[str]:
+    """publish_time as 'YYYY-MM-DD' (unit 'D') or 'YYYY-MM-DD HH:MM' (unit 'm'); NaT -> ''."""
+    if 'publish_time' not in df.columns:
+        return [''] * len(df)
+    values = df['publish_time'].to_numpy(dtype=f'datetime64[{unit}]')
+    text = np.char.replace(np.datetime_as_string(values, unit=unit), 'T', ' ')
+    text[np.isnat(values)] = ''
+    return text.tolist()
+
+
+def _days(df: pd.DataFrame) -> List[str]:
+    if 'publish_time' not in df.columns:
+        return [''] * len(df)
+    days = df['publish_time'].to_numpy(dtype='datetime64[D]')
+    index = (days.astype('int64') + 3) % 7
+    index[np.isnat(days)] = 7
+    return DAY_NAMES[index].tolist()
+
+
+def _blank(df: pd.DataFrame) -> List[str]:
+    return [''] * len(df)
+
+
+# --- SHEET LAYOUTS ---
+# Mirrors LAYOUTS in google_apps_script.js. `cells(rows)` returns every column
+# after Week; column numbers in `sum_cols` / `total_label_col` are 1-based, as there.
+
+def _instagram_post_cells(df: pd.DataFrame) -> List[Any]:
+    likes, comments, shares, saves = (_ints(df, col) for col in ['likes', 'comments', 'shares', 'saves'])
+    return [_times(df, 'D'), _days(df), _text(df, 'post_type'),
+            _ints(df, 'views'), likes, comments, shares, saves, likes + comments + shares + saves, _ints(df, 'reach'),
+            _blank(df), _blank(df), _blank(df), _text(df, 'permalink')]
+
+
+def _instagram_story_cells(df: pd.DataFrame) -> List[Any]:
+    likes, taps, replies = (_ints(df, col) for col in ['likes', 'sticker_taps', 'replies'])
+    return [_days(df), _times(df, 'm'),
+            _ints(df, 'views'), _ints(df, 'reach'), likes, taps, replies, likes + replies + taps,
+            _blank(df)]
+
+
+def _facebook_post_cells(df: pd.DataFrame) -> List[Any]:
+    likes, comments, shares, clicks = (_ints(df, col) for col in ['likes', 'comments', 'shares', 'link_clicks'])
+    return [_days(df), _times(df, 'D'), _text(df, 'post_type'),
+            _ints(df, 'reach'), likes, comments, shares, clicks, likes + comments + shares + clicks, _ints(df, 'views'),
+            _blank(df), _blank(df), _text(df, 'permalink')]
+
+
+SHEET_LAYOUTS = {
+    'instagram_posts': {
+        'sheet': 'Instagram',
+        'platform': 'instagram',
+        'headers': ['Week', 'Date', 'Day', 'Type', 'Views', 'Likes', 'Comments', 'Shares', 'Saves', 'Total Interactions',
+                    'Reach', 'Profile Visits', 'Website', 'Categorywise', 'Link'],
+        'total_label_col': 4,
+        'sum_cols': [5, 6, 7, 8, 9, 10, 11],
+        'cells': _instagram_post_cells
+    },
+    'instagram_stories': {
+        'sheet': 'Instagram stories',
+        'platform': 'stories',
+        'headers': ['Week', 'Day', 'Date', 'Views', 'Reach', 'Likes', 'Sticker taps', 'Replies', 'Total Interactions', 'Remarks'],
+        'total_label_col': 3,
+        'sum_cols': [4, 5, 6, 7, 8, 9],
+        'cells': _instagram_story_cells
+    },
+    'facebook_posts': {
+        'sheet': 'Facebook',
+        'platform': 'facebook',
+        'headers': ['Week', 'Day', 'Date', 'Type', 'Reach', 'Likes', 'Comments', 'Share', 'Link clicks', 'Engagement',
+                    'Video views', 'Brandwise', 'Category', 'Link'],
+        'total_label_col': 4,
+        'sum_cols': [5, 6, 7, 8, 9, 10, 11],
+        'cells': _facebook_post_cells
+    }
+}
+
+# Rows of the Particulars sheet: label, key in report['aggregated'][platform], rounded to 2 places
+PARTICULARS = [
+    ('Total Reach', 'total_reach', False),
+    ('Total Engagement', 'total_engagement', False),
+    ('Total Views', 'total_views', False),
+    ('Interactions (w/o Views)', 'interactions_wo_views', False),
+    ('Eng Rate (with Views) %', 'eng_rate_with_views', True),
+    ('Eng Rate (w/o Views) %', 'eng_rate_wo_views', True),
+    ('Video View Rate %', 'video_view_rate', True),
+    ('Avg Interaction', 'average_interaction', True),
+]
+
+
+class ExportSheet:
+    """One sheet: its header row, data rows in column batches, then an optional totals row.
+
+    Each batch is a list of equally long columns: numpy arrays for numbers,
+    lists of str for text. `totals()` is only called once `batches` is
+    exhausted, so it can report sums accumulated while the rows went out.
+    `rows` is the number of data rows, when known up front.
+    """
+
+    def __init__(self, name: str, headers: List[str], batches: Iterator[List[list]],
+                 totals: Optional[Callable[[], list]] = None, rows: Optional[int] = None):
+        self.name = name
+        self.headers = headers
+        self.batches = batches
+        self.totals = totals
+        self.rows = rows
+
+
+def particulars_sheet(aggregated: Dict[str, Dict[str, Any]]) -> ExportSheet:
+    """The Instagram and Facebook particulars of the period side by side."""
+    columns = [[label for label, _, _ in PARTICULARS]]
+    for platform in ('instagram', 'facebook'):
+        values = [aggregated[platform][key] for _, key, _ in PARTICULARS]
+        columns.append(np.array([round(float(v), 2) if rate else v for v, (_, _, rate) in zip(values, PARTICULARS)],
+                                dtype=object))
+    return ExportSheet('Particulars', ['Particular', 'Instagram', 'Facebook'], iter([columns]), rows=len(PARTICULARS))
+
+
+def table_sheet(layout: Dict[str, Any], df: pd.DataFrame, week_label: str,
+                cold: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+                batch_rows: int = EXPORT_BATCH_ROWS) -> ExportSheet:
+    """One week block of a SHEET_LAYOUTS table, built `batch_rows` rows at a time.
+
+    `cold(rows)` adds the COLD_COLS (permalinks) of each batch when the table
+    was loaded without them.
+    """
+    sums = np.zeros(len(layout['sum_cols']), dtype='int64')
+
+    def batches() -> Iterator[List[list]]:
+        for start in range(0, len(df), batch_rows):
+            part = df.iloc[start:start + batch_rows]
+            if cold is not None:
+                part = cold(part)
+            columns = layout['cells'](part)
+            for i, col in enumerate(layout['sum_cols']):
+                sums[i] += columns[col - 2].sum()
+            week = [week_label if start == 0 else ''] + [''] * (len(part) - 1)
+            yield [week] + columns + [_text(part, 'post_id')]
+
+    def totals() -> list:
+        row: list = [''] * (len(layout['headers']) + 1)
+        row[layout['total_label_col'] - 1] = 'Total'
+        for i, col in enumerate(layout['sum_cols']):
+            row[col - 1] = int(sums[i])
+        return row
+
+    return ExportSheet(layout['sheet'], layout['headers'] + ['Post ID'], batches(), totals, rows=len(df))
+
+
+def report_sheets(aggregated: Dict[str, Dict[str, Any]], tables: Dict[str, pd.DataFrame], week_label: str,
+                  cold: Optional[Callable[[str, pd.DataFrame], pd.DataFrame]] = None,
+                  batch_rows: int = EXPORT_BATCH_ROWS) -> List[ExportSheet]:
+    """Particulars plus one sheet per SHEET_LAYOUTS table, from the period's sliced platform tables."""
+    sheets = [particulars_sheet(aggregated)]
+    for layout in SHEET_LAYOUTS.values():
+        platform = layout['platform']
+        platform_cold = (lambda rows, p=platform: cold(p, rows)) if cold is not None else None
+        sheets.append(table_sheet(layout, tables[platform], week_label, platform_cold, batch_rows))
+    return sheets
+
+
+# --- CSV ---
+
+def _values(column) -> list:
+    return column.tolist() if isinstance(column, np.ndarray) else column
+
+
+def iter_csv(sheets: List[ExportSheet], title_rows: List[list]) -> Iterator[bytes]:
+    """All sheets in one CSV, one titled section after another (like the dashboard's download)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+
+    def drain() -> bytes:
+        data = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer.writerows(title_rows)
+    for sheet in sheets:
+        writer.writerow([])
+        writer.writerow([sheet.name.upper()])
+        writer.writerow(sheet.headers)
+        for columns in sheet.batches:
+            writer.writerows(zip(*(_values(col) for col in columns)))
+            yield drain()
+        if sheet.totals is not None:
+            writer.writerow(sheet.totals())
+    yield drain()
+
+
+# --- XLSX ---
+# Worksheets are written as inline-string SpreadsheetML straight into a
+# deflate stream (zipfile switches to data descriptors on an unseekable
+# sink). openpyxl's write-only mode keeps rows in temp files and only builds
+# the zip on save(), after the last row, so nothing could be sent before the
+# whole workbook is written; it is also ~18x slower on 3 sheets of 100k rows
+# (benchmarks/bench_export.py). Text is always an inline string, so values
+# starting with '=' stay text, never formulas.
+
+# Rows per worksheet in Excel (header and totals row included)
+XLSX_MAX_ROWS = 1_048_576
+
+_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_XML_HEAD = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+# Cell styles (index into cellXfs): 1 = header (bold on orange), 2 = totals (bold on grey), as the script formats them
+HEADER_STYLE, TOTAL_STYLE = 1, 2
+
+_STYLES = (
+    _XML_HEAD + f'<styleSheet xmlns="{_MAIN_NS}">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="4"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="FFFF9900"/></patternFill></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="FFEEEEEE"/></patternFill></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="2" borderId="0" xfId="0" applyFont="1" applyFill="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="3" borderId="0" xfId="0" applyFont="1" applyFill="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles></styleSheet>'
+)
+
+
+def _package_parts(names: List[str]) -> Dict[str, str]:
+    """Every part of the workbook except the worksheets themselves."""
+    sheets = ''.join(f'<sheet name="{escape(name, {chr(34): "&quot;"})}" sheetId="{i}" r:id="rId{i}"/>'
+                     for i, name in enumerate(names, 1))
+    sheet_rels = ''.join(f'<Relationship Id="rId{i}" Type="{_REL_NS}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+                         for i in range(1, len(names) + 1))
+    overrides = ''.join(f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+                        f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                        for i in range(1, len(names) + 1))
+    return {
+        '[Content_Types].xml': (
+            _XML_HEAD + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            + overrides + '</Types>'),
+        '_rels/.rels': (
+            _XML_HEAD + f'<Relationships xmlns="{_PKG_REL_NS}">'
+            f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/></Relationships>'),
+        'xl/workbook.xml': (
+            _XML_HEAD + f'<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}"><sheets>{sheets}</sheets></workbook>'),
+        'xl/_rels/workbook.xml.rels': (
+            _XML_HEAD + f'<Relationships xmlns="{_PKG_REL_NS}">{sheet_rels}'
+            f'<Relationship Id="rId{len(names) + 1}" Type="{_REL_NS}/styles" Target="styles.xml"/></Relationships>'),
+        'xl/styles.xml': _STYLES
+    }
+
+
+def _column_letter(n: int) -> str:
+    letters = ''
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _cell(value: Any, style: str = '') -> str:
+    if isinstance(value, str):
+        if not value:
+            return f'<c{style}/>'
+        text = escape(_XML_ILLEGAL.sub('', value))
+        return f'<c t="inlineStr"{style}><is><t xml:space="preserve">{text}</t></is></c>'
+    return f'<c{style}><v>{value!r}</v></c>'
+
+
+def _xml_column(column) -> List[str]:
+    """Cells of one batch column, formatted in one pass for its type."""
+    if isinstance(column, np.ndarray):
+        return [f'<c><v>{v!r}</v></c>' for v in column.tolist()]
+    return [_cell(v) for v in column]
+
+
+def _xml_rows(columns: list, first: int) -> str:
+    cells = [_xml_column(col) for col in columns]
+    return ''.join(f'<row r="{first + i}">' + ''.join(row) + '</row>' for i, row in enumerate(zip(*cells)))
+
+
+def _header_row(headers: List[str]) -> str:
+    style = f' s="{HEADER_STYLE}"'
+    return '<row r="1">' + ''.join(_cell(v, style) for v in headers) + '</row>'
+
+
+def _totals_row(row: list, number: int) -> str:
+    """Totals as SUM formulas over the rows above (with their values cached), like the script's totals row."""
+    style = f' s="{TOTAL_STYLE}"'
+    cells = []
+    for i, value in enumerate(row):
+        if isinstance(value, str) or number <= 2:
+            cells.append(_cell(value, style))
+        else:
+            col = _column_letter(i + 1)
+            cells.append(f'<c{style}><f>SUM({col}2:{col}{number - 1})</f><v>{value!r}</v></c>')
+    return f'<row r="{number}">' + ''.join(cells) + '</row>'
+
+
+class StreamSink:
+    """Write-only file object for zipfile: keeps what was written until drained."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def iter_xlsx(sheets: List[ExportSheet]) -> Iterator[bytes]:
+    """The sheets as one workbook, yielded as the zip is written.
+
+    Raises ValueError at once (before any byte) if a sheet has more rows
+    than a worksheet holds.
+    """
+    for sheet in sheets:
+        if sheet.rows is not None and sheet.rows + 2 > XLSX_MAX_ROWS:
+            raise ValueError(f"Sheet '{sheet.name}' has {sheet.rows:,} rows; an XLSX sheet holds at most "
+                             f"{XLSX_MAX_ROWS - 2:,}. Export a shorter period or use format=csv")
+    return _xlsx_chunks(sheets)
+
+
+def _xlsx_chunks(sheets: List[ExportSheet]) -> Iterator[bytes]:
+    sink = StreamSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED, compresslevel=XLSX_COMPRESSLEVEL) as archive:
+        for name, content in _package_parts([sheet.name for sheet in sheets]).items():
+            archive.writestr(name, content)
+        yield sink.drain()
+
+        for i, sheet in enumerate(sheets, 1):
+            with archive.open(f'xl/worksheets/sheet{i}.xml', 'w') as part:
+                part.write((_XML_HEAD + f'<worksheet xmlns="{_MAIN_NS}"><sheetData>').encode('utf-8'))
+                part.write(_header_row(sheet.headers).encode('utf-8'))
+                number = 2
+                for columns in sheet.batches:
+                    part.write(_xml_rows(columns, number).encode('utf-8'))
+                    number += len(columns[0])
+                    data = sink.drain()
+                    if data:
+                        yield data
+                if sheet.totals is not None:
+                    part.write(_totals_row(sheet.totals(), number).encode('utf-8'))
+                part.write(b'</sheetData></worksheet>')
+    yield sink.drain()
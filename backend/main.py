@@ -1,13 +1,36 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Body, Query
+from fastapi import FastAPI, UploadFile, File, HTTPException, Body, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import uvicorn
 import pandas as pd
+import base64
+import hashlib
 import io
-import requests
+import json
+import os
+import shutil
+import asyncio
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from engine import AnalyticsEngine
+from functools import partial
+from engine import AnalyticsEngine, dumps_report, ingest_file, period_buckets, DEFAULT_CHUNK_ROWS, COLD_COLS
+from query import PostIndex, parse_where
+from cache import (ReportCache, EncodedBody, make_etag, variant_etag, etag_matches, held_coding,
+                   negotiate_encoding)
+from export import report_sheets, iter_csv, iter_xlsx
+from deck import DeckTemplate, load_template, previous_period, render_deck_file, report_deck_values, iter_archive
+from daily import DAILY_TABLE, compact_daily, merge_daily, load_daily, time_series, daily_summary
+import metrics
+from workspace import WorkspaceRegistry, Workspace, DEFAULT_ACCOUNT
+from store import Snapshot
+from sync import (SheetSyncer, build_sync_sections, build_overall_stats, section_checksums,
+                  delta_sections, removed_keys, plan_chunks, chunk_checksums, encode_chunk, DEFAULT_CHUNK_BYTES)
 
 app = FastAPI(title="Meta Insights Analytics")
 
@@ -17,160 +40,718 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Deck-Unfilled"],
 )
 
 engine = AnalyticsEngine()
 
-# Separate storage for each platform
-FACEBOOK_DF = pd.DataFrame()
-INSTAGRAM_DF = pd.DataFrame()
-STORIES_DF = pd.DataFrame()
+PLATFORMS = ['facebook', 'instagram', 'stories']
+
+# One workspace per account (brand): a separate table for each platform held by the
+# configured storage backend, plus its per-day rollups, sync ledger and dataset version.
+# STORE_BACKEND=disk persists them under STORE_PATH/<account> so restarts keep the data,
+# and lets several uvicorn workers share one copy of it (see workspace.py).
+# Every request reads from one pinned snapshot, never from a table an upload is replacing.
+workspaces = WorkspaceRegistry(os.environ.get("STORE_BACKEND", "memory"), os.environ.get("STORE_PATH", "data"), PLATFORMS)
+
+# Rows parsed per chunk when streaming uploads; bounds peak memory per file
+UPLOAD_CHUNK_ROWS = int(os.environ.get("UPLOAD_CHUNK_ROWS", DEFAULT_CHUNK_ROWS))
+
+# Worker processes used to parse uploaded files in parallel (0 = parse in-process)
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", min(4, os.cpu_count() or 1)))
+_ingest_pool = None
+
+# Background Google Sheet syncs over a pooled keep-alive HTTP client
+syncer = SheetSyncer(
+    retries=int(os.environ.get("SYNC_RETRIES", 3)),
+    backoff=float(os.environ.get("SYNC_BACKOFF_SECONDS", 1.0)),
+    timeout=float(os.environ.get("SYNC_TIMEOUT_SECONDS", 60))
+)
+SYNC_CHUNK_BYTES = int(os.environ.get("SYNC_CHUNK_BYTES", DEFAULT_CHUNK_BYTES))
+
+# Rendered /report bodies, keyed on (account, dataset version, query).
+# Every upload/clear publishes a new version of that account's data.
+report_cache = ReportCache(int(os.environ.get("REPORT_CACHE_SIZE", 64)))
+
+# /report bodies shorter than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", 1024))
+
+# Part of every /report ETag, so a deploy that changes the report's shape invalidates clients' copies
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'engine.py'), 'rb') as _f:
+    REPORT_BUILD = hashlib.sha1(_f.read()).hexdigest()[:12]
+
+# Upper bound on periods per POST /report/batch (a year of days plus change)
+MAX_REPORT_PERIODS = int(os.environ.get("MAX_REPORT_PERIODS", 400))
+
+# Weekly PowerPoint template filled in by /deck ({{PLACEHOLDER}} texts, see deck.py)
+DECK_TEMPLATE = os.environ.get("DECK_TEMPLATE", os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Westside Weekly Report - TEMPLATE.pptx"))
+
+# Upper bound on decks per POST /deck/batch (a quarter of weeks for several brands)
+MAX_DECK_BATCH = int(os.environ.get("MAX_DECK_BATCH", 100))
+
+def _workspace(account: str, create: bool = False) -> Workspace:
+    """Resolve the `account` a request is scoped to (400 if malformed, 404 if unknown)."""
+    try:
+        ws = workspaces.get(account, create=create)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if ws is None:
+        raise HTTPException(status_code=404, detail=f"Unknown account '{account}'")
+    return ws
+
+@app.middleware("http")
+async def _instrument(request: Request, call_next):
+    """Observe request latency per route; add a Server-Timing header when the client asks for one.
+
+    Opt in per request with the `X-Server-Timing: 1` header. The header then
+    lists the time spent in each engine stage (summed over calls) plus the total.
+    """
+    start = time.perf_counter()
+    with metrics.collect() as spans:
+        response = await call_next(request)
+    elapsed = time.perf_counter() - start
+    route = request.scope.get('route')
+    metrics.REQUEST_SECONDS.observe(
+        (request.method, route.path if route is not None else 'unmatched', str(response.status_code)), elapsed)
+    if request.headers.get('x-server-timing') == '1':
+        response.headers['Server-Timing'] = metrics.server_timing(spans, elapsed)
+    return response
 
 @app.get("/")
 def read_root():
     return {"status": "System Operational"}
 
-@app.post("/upload/facebook")
-async def upload_facebook(files: List[UploadFile] = File(...)):
-    """Upload Facebook Posts CSV."""
-    global FACEBOOK_DF
-    
-    dfs = []
-    # Data is overwritten by new upload
+def _get_ingest_pool():
+    """Process pool for CSV parsing and deck rendering, created on first use. None -> in-process threads."""
+    global _ingest_pool
+    if _ingest_pool is None and INGEST_WORKERS > 0:
+        _ingest_pool = ProcessPoolExecutor(max_workers=INGEST_WORKERS)
+    return _ingest_pool
 
+@app.on_event("shutdown")
+def _shutdown_ingest_pool():
+    if _ingest_pool is not None:
+        _ingest_pool.shutdown(cancel_futures=True)
 
-    for file in files:
-        content = await file.read()
-        try:
-            df = engine.process_facebook_posts(content, file.filename)
-            dfs.append(df)
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Error processing {file.filename}: {str(e)}")
-            
-    if dfs:
-        combined = pd.concat(dfs)
-        if 'post_id' in combined.columns:
-            FACEBOOK_DF = combined.drop_duplicates(subset=['post_id'], keep='last')
-        else:
-            FACEBOOK_DF = combined
-            
-    return {"message": "Facebook posts processed", "total_records": len(FACEBOOK_DF)}
+def _spool_to_disk(file: UploadFile) -> str:
+    """Copy an upload to a named temp file so a worker process can open it."""
+    file.file.seek(0)
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    with os.fdopen(fd, 'wb') as out:
+        shutil.copyfileobj(file.file, out, 1024 * 1024)
+    return path
 
-@app.post("/upload/instagram")
-async def upload_instagram(files: List[UploadFile] = File(...)):
-    """Upload Instagram Posts CSV."""
-    global INSTAGRAM_DF
-    
-    dfs = []
-    # Data is overwritten by new upload
+async def _ingest_files(platform: str, files: List[UploadFile], chunk_rows: int):
+    """Parse every file in parallel, then dedup and sort once across the ones that parsed.
 
+    Each file is streamed through the engine in row chunks inside a worker
+    process, so the event loop stays free. Files that fail are reported in
+    `errors` without discarding the others; `conversion` lists, per file,
+    the formats detected and any values that could not be read cleanly.
+    """
+    paths = await run_in_threadpool(lambda: [_spool_to_disk(file) for file in files])
+    try:
+        loop = asyncio.get_running_loop()
+        pool = _get_ingest_pool()
+        results = await asyncio.gather(
+            *[loop.run_in_executor(pool, ingest_file, platform, path, file.filename, chunk_rows)
+              for file, path in zip(files, paths)],
+            return_exceptions=True
+        )
+    finally:
+        for path in paths:
+            os.remove(path)
 
-    for file in files:
-        content = await file.read()
-        try:
-            df = engine.process_instagram_posts(content, file.filename)
-            dfs.append(df)
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Error processing {file.filename}: {str(e)}")
-            
-    if dfs:
-        combined = pd.concat(dfs)
-        if 'post_id' in combined.columns:
-            INSTAGRAM_DF = combined.drop_duplicates(subset=['post_id'], keep='last')
+    dfs, errors, conversion = [], [], []
+    for file, result in zip(files, results):
+        if isinstance(result, Exception):
+            errors.append({"filename": file.filename, "error": str(result)})
         else:
-            INSTAGRAM_DF = combined
-            
-    return {"message": "Instagram posts processed", "total_records": len(INSTAGRAM_DF)}
+            df, spans, summary = result
+            metrics.replay(spans)
+            dfs.append(df)
+            conversion.append({"filename": file.filename, **summary})
+
+    if not dfs:
+        raise HTTPException(status_code=400, detail={"message": "No files could be processed", "errors": errors})
+    return await run_in_threadpool(engine.combine, dfs, platform), errors, conversion
+
+def _store_upload(ws: Workspace, platform: str, df: pd.DataFrame, mode: str) -> Dict[str, int]:
+    """Publish an ingested upload as the account's next dataset version."""
+    counts = ws.write(platform, df, mode)
+    if mode == 'replace' or counts["inserted"] or counts["updated"]:
+        report_cache.invalidate(ws.name)
+    return counts
+
+async def _handle_upload(platform: str, files: List[UploadFile], chunk_rows: int, mode: str, account: str) -> Dict[str, Any]:
+    ws = _workspace(account, create=True)
+    df, errors, conversion = await _ingest_files(platform, files, chunk_rows)
+    counts = await run_in_threadpool(_store_upload, ws, platform, df, mode)
+    return {"account": ws.name, "mode": mode, **counts, "total_records": ws.snapshot().count(platform),
+            "errors": errors, "conversion": conversion}
+
+@app.post("/upload/facebook")
+async def upload_facebook(files: List[UploadFile] = File(...), chunk_rows: int = Query(UPLOAD_CHUNK_ROWS, gt=0),
+                          mode: str = Query("replace", pattern="^(append|replace)$"),
+                          account: str = Query(DEFAULT_ACCOUNT)):
+    """Upload Facebook Posts CSV. mode=replace overwrites the table, mode=append upserts by post_id."""
+    result = await _handle_upload('facebook', files, chunk_rows, mode, account)
+    return {"message": "Facebook posts processed", **result}
+
+@app.post("/upload/instagram")
+async def upload_instagram(files: List[UploadFile] = File(...), chunk_rows: int = Query(UPLOAD_CHUNK_ROWS, gt=0),
+                           mode: str = Query("replace", pattern="^(append|replace)$"),
+                          account: str = Query(DEFAULT_ACCOUNT)):
+    """Upload Instagram Posts CSV. mode=replace overwrites the table, mode=append upserts by post_id."""
+    result = await _handle_upload('instagram', files, chunk_rows, mode, account)
+    return {"message": "Instagram posts processed", **result}
 
 @app.post("/upload/stories")
-async def upload_stories(files: List[UploadFile] = File(...)):
-    """Upload Instagram Stories CSV."""
-    global STORIES_DF
-    
-    dfs = []
-    # Data is overwritten by new upload
+async def upload_stories(files: List[UploadFile] = File(...), chunk_rows: int = Query(UPLOAD_CHUNK_ROWS, gt=0),
+                         mode: str = Query("replace", pattern="^(append|replace)$"),
+                          account: str = Query(DEFAULT_ACCOUNT)):
+    """Upload Instagram Stories CSV. mode=replace overwrites the table, mode=append upserts by post_id."""
+    result = await _handle_upload('stories', files, chunk_rows, mode, account)
+    return {"message": "Stories processed", **result}
 
+@app.post("/upload/facebook-daily")
+async def upload_facebook_daily(files: List[UploadFile] = File(...), chunk_rows: int = Query(UPLOAD_CHUNK_ROWS, gt=0),
+                                mode: str = Query("append", pattern="^(append|replace)$"),
+                                account: str = Query(DEFAULT_ACCOUNT)):
+    """Upload the per-day Facebook export. mode=append upserts by (post, day), mode=replace overwrites it.
 
-    for file in files:
-        content = await file.read()
-        try:
-            df = engine.process_stories_upload(content, file.filename)
-            dfs.append(df)
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Error processing {file.filename}: {str(e)}")
-            
-    if dfs:
-        combined = pd.concat(dfs)
-        if 'post_id' in combined.columns:
-            STORIES_DF = combined.drop_duplicates(subset=['post_id'], keep='last')
-        else:
-            STORIES_DF = combined
-            
-    return {"message": "Stories processed", "total_records": len(STORIES_DF)}
+    Kept in its own compact table for GET /timeseries; /report is unaffected.
+    Rows without a readable Date (e.g. 'Lifetime' totals) are counted in
+    `dropped_rows`; each file's unreadable dates are listed under `conversion`.
+    """
+    ws = _workspace(account, create=True)
+    df, errors, conversion = await _ingest_files('facebook_daily', files, chunk_rows)
+    rows = await run_in_threadpool(compact_daily, df)
+    update = (lambda current: merge_daily(current, rows)) if mode == 'append' else (lambda current: rows)
+    table = await run_in_threadpool(ws.write_table, DAILY_TABLE, update)
+    report_cache.invalidate(ws.name)
+    return {"message": "Facebook daily metrics processed", "account": ws.name, "mode": mode,
+            "uploaded_rows": len(rows), "dropped_rows": len(df) - len(rows), **daily_summary(table),
+            "errors": errors, "conversion": conversion}
 
 @app.post("/clear")
-def clear_data():
-    global FACEBOOK_DF, INSTAGRAM_DF, STORIES_DF
-    FACEBOOK_DF = pd.DataFrame()
-    INSTAGRAM_DF = pd.DataFrame()
-    STORIES_DF = pd.DataFrame()
-    return {"message": "All data cleared"}
+def clear_data(account: str = Query(DEFAULT_ACCOUNT)):
+    """Clear one account's data; other accounts are untouched."""
+    ws = _workspace(account)
+    ws.clear()
+    report_cache.invalidate(ws.name)
+    return {"message": "All data cleared", "account": ws.name}
 
-@app.get("/report")
-def get_report(start_date: str = Query(...), end_date: str = Query(...), fb_story_views: int = 0):
-    """Get report with SEPARATE Facebook and Instagram data."""
-    global FACEBOOK_DF, INSTAGRAM_DF, STORIES_DF
-    
+@app.get("/accounts")
+def list_accounts():
+    """Every workspace with its record counts and the Page/IG accounts seen in its exports."""
+    return {"accounts": [
+        {
+            "account": name,
+            "records": {platform: ws.snapshot().count(platform) for platform in PLATFORMS},
+            "profiles": ws.profiles()
+        }
+        for name, ws in ((name, workspaces.get(name)) for name in workspaces.names())
+    ]}
+
+def _parse_period(start_date: str, end_date: str):
     try:
         start = datetime.strptime(start_date, "%Y-%m-%d")
         end = datetime.strptime(end_date, "%Y-%m-%d")
         end = end.replace(hour=23, minute=59, second=59)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    return start, end
+
+def _compute_report(snapshot: Snapshot, start: datetime, end: datetime, fb_story_views: int,
+                    **shape: Any) -> Dict[str, Any]:
+    # Only the partitions overlapping the window are read, and only for the platforms whose rows the
+    # requested sections use (totals come from the rollups); the engine applies the exact filter
+    needed = engine.row_platforms(start, end, snapshot.rollups, shape.get('include'))
+    tables = [snapshot.load_range(platform, start, end) if platform in needed else pd.DataFrame()
+              for platform in ('facebook', 'instagram', 'stories')]
+    return engine.generate_report(
+        *tables, start, end, manual_fb_views=fb_story_views, rollups=snapshot.rollups, cold=snapshot.attach_cold, **shape
+    )
+
+def _csv_param(value: str) -> Optional[List[str]]:
+    return [item.strip() for item in value.split(',') if item.strip()] if value else None
 
-    report = engine.generate_report(FACEBOOK_DF, INSTAGRAM_DF, STORIES_DF, start, end, manual_fb_views=fb_story_views)
-    return report
+def _encode_cursor(snapshot: Snapshot, page: Dict[str, Any]) -> str:
+    data = json.dumps({"v": snapshot.version, "g": snapshot.lineage, **page}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii').rstrip('=')
 
-@app.post("/sync-sheet")
+def _decode_cursor(cursor: str, snapshot: Snapshot) -> Dict[str, Any]:
+    """The page a `next_cursor` points at (400 if malformed, 409 if the data changed since)."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        page = {"sort": data["sort"], "descending": bool(data["descending"]),
+                "offset": int(data["offset"]), "limit": int(data["limit"])}
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if (data.get("v"), data.get("g")) != (snapshot.version, snapshot.lineage):
+        raise HTTPException(status_code=409, detail="The data changed since this cursor was issued; start again from the first page")
+    return page
+
+@app.get("/report")
+def get_report(request: Request, start_date: str = Query(...), end_date: str = Query(...), fb_story_views: int = 0,
+               account: str = Query(DEFAULT_ACCOUNT), include: str = Query(None), fields: str = Query(None),
+               sort: str = Query(None), order: str = Query("desc"), limit: int = Query(None, gt=0, le=10000),
+               cursor: str = Query(None)):
+    """Get report with SEPARATE Facebook and Instagram data, for one account.
+
+    `include` (e.g. `aggregated,facebook.stats`) returns only those sections
+    and skips computing the rest; `fields` keeps only those keys of post and
+    story rows. `sort` (publish_time or a numeric column, `order` desc/asc)
+    and `limit` page the post and story lists: `pages` then gives each list's
+    total and a `next_cursor` to pass back as `cursor` for the next page.
+
+    The ETag names the account's dataset version and the query, so a client
+    sending it back in If-None-Match gets a 304 (without the report being
+    built) until the next upload. Bodies are gzip/brotli compressed when the
+    client accepts it.
+    """
+    ws = _workspace(account)
+    start, end = _parse_period(start_date, end_date)
+    if order not in ('asc', 'desc'):
+        raise HTTPException(status_code=400, detail="'order' must be 'asc' or 'desc'")
+
+    snapshot = ws.snapshot()
+    if cursor:
+        page = _decode_cursor(cursor, snapshot)
+    else:
+        page = {"sort": sort, "descending": order == 'desc', "offset": 0, "limit": limit}
+    shape = dict(page, include=_csv_param(include), fields=_csv_param(fields))
+
+    cache_key = (ws.name, snapshot.version, start_date, end_date, fb_story_views,
+                 json.dumps(shape, sort_keys=True))
+    etag = make_etag(REPORT_BUILD, snapshot.lineage, *cache_key)
+    encoding = negotiate_encoding(request.headers.get('accept-encoding'))
+    headers = {"Vary": "Accept-Encoding", "Cache-Control": "private, no-cache"}
+    cached = report_cache.get(cache_key)
+    if_none_match = request.headers.get('if-none-match')
+    if etag_matches(if_none_match, etag):
+        # The tag a 200 would carry (RFC 9110 15.4.5). Without the body to tell whether it would be
+        # compressed, the client's own tag says: the coding is fixed by the body and the negotiation.
+        coding = cached.coding(encoding) if cached is not None else held_coding(if_none_match, etag, encoding)
+        headers["ETag"] = variant_etag(etag, coding)
+        return Response(status_code=304, headers=headers)
+
+    if cached is None:
+        try:
+            report = _compute_report(snapshot, start, end, fb_story_views, **shape)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        for info in report.get("pages", {}).values():
+            after = info.pop("next_offset")
+            info["next_cursor"] = _encode_cursor(snapshot, dict(page, offset=after)) if after is not None else None
+        cached = EncodedBody(dumps_report(report), COMPRESS_MIN_BYTES)
+        report_cache.put(cache_key, cached)
+    with metrics.span('compress'):
+        body, applied = cached.encode(encoding)
+    # Tag and header follow the coding applied: small bodies go out as identity whatever was negotiated
+    headers["ETag"] = variant_etag(etag, applied)
+    if applied != 'identity':
+        headers["Content-Encoding"] = applied
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.post("/report/batch")
+def get_report_batch(payload: Dict[str, Any] = Body(...)):
+    """Stats and particulars for many periods at once, e.g. every week of a month plus the month.
+
+    Payload: either `periods` ([{"start_date", "end_date"}, ...], may overlap)
+    or `start_date`, `end_date` and `granularity` (day, week or month), plus
+    optional account (default 'default') and fb_story_views. Each entry of
+    `reports` matches the `period`, `aggregated` and `stats` parts of /report
+    for that period; rankings and post lists are not included.
+    """
+    ws = _workspace(payload.get('account') or DEFAULT_ACCOUNT)
+    try:
+        if payload.get('periods'):
+            periods = [_parse_period(p['start_date'], p['end_date']) for p in payload['periods']]
+        elif payload.get('start_date') and payload.get('end_date') and payload.get('granularity'):
+            start, end = _parse_period(payload['start_date'], payload['end_date'])
+            periods = period_buckets(start, end, payload['granularity'])
+        else:
+            raise HTTPException(status_code=400, detail="Send 'periods', or 'start_date', 'end_date' and 'granularity'")
+    except (KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Each period needs 'start_date' and 'end_date'")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not periods:
+        raise HTTPException(status_code=400, detail="No periods: 'end_date' is before 'start_date'")
+    if len(periods) > MAX_REPORT_PERIODS:
+        raise HTTPException(status_code=400, detail=f"Too many periods ({len(periods)}). Max is {MAX_REPORT_PERIODS}")
+
+    # One read of the window spanning every period, then one grouped pass per platform
+    snapshot = ws.snapshot()
+    first = min(start for start, _ in periods)
+    last = max(end for _, end in periods)
+    reports = engine.generate_period_reports(
+        snapshot.load_range('facebook', first, last),
+        snapshot.load_range('instagram', first, last),
+        snapshot.load_range('stories', first, last),
+        periods, manual_fb_views=int(payload.get('fb_story_views') or 0), rollups=snapshot.rollups
+    )
+    return Response(content=dumps_report({"account": ws.name, "reports": reports}), media_type="application/json")
+
+@app.get("/leaderboard")
+def get_leaderboard(platform: str = Query(...), metric: str = Query("total_engagement"),
+                    start_date: str = Query(...), end_date: str = Query(...), n: int = Query(10, gt=0, le=500),
+                    account: str = Query(DEFAULT_ACCOUNT)):
+    """Top/bottom `n` posts of one platform on any numeric metric (e.g. reach, engagement_rate_reach)."""
+    ws = _workspace(account)
+    if platform not in PLATFORMS:
+        raise HTTPException(status_code=400, detail=f"Unknown platform '{platform}'. Expected one of: {', '.join(PLATFORMS)}")
+    start, end = _parse_period(start_date, end_date)
+    snapshot = ws.snapshot()
+    df = engine.slice_range(snapshot.load_range(platform, start, end), start, end)
+    try:
+        board = engine.leaderboard(df, metric, n, cold=partial(snapshot.attach_cold, platform))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"account": ws.name, "platform": platform, "period": {"start": start_date, "end": end_date}, **board}
+
+@app.get("/posts")
+def query_posts(platform: str = Query(...), post_type: str = Query(None), start_date: str = Query(None),
+                end_date: str = Query(None), where: List[str] = Query([]), sort: str = Query("publish_time"),
+                order: str = Query("desc"), limit: int = Query(100, gt=0, le=10000), fields: str = Query(None),
+                account: str = Query(DEFAULT_ACCOUNT)):
+    """Posts of one platform matching every filter, e.g. IG reels with reach > 20k and saves > 100 in January.
+
+    `post_type` takes a comma-separated list (case-insensitive); each
+    `where` is <column><op><number> on a numeric column (reach>20000,
+    engagement_rate_reach>=0.05); `sort` is publish_time or a numeric column.
+    `count` is the number of matches, `scanned` the rows the indexes could
+    not rule out (see query.py).
+    """
+    ws = _workspace(account)
+    if platform not in PLATFORMS:
+        raise HTTPException(status_code=400, detail=f"Unknown platform '{platform}'. Expected one of: {', '.join(PLATFORMS)}")
+    if order not in ('asc', 'desc'):
+        raise HTTPException(status_code=400, detail="'order' must be 'asc' or 'desc'")
+    start = _parse_period(start_date, start_date)[0] if start_date else None
+    end = _parse_period(end_date, end_date)[1] if end_date else None
+    field_list = _csv_param(fields)
+
+    snapshot = ws.snapshot()
+    with metrics.span('index'):
+        index = snapshot.derived(('posts', platform), lambda: PostIndex(snapshot.load(platform)))
+    try:
+        with metrics.span('filter'):
+            positions, count, scanned = index.query(start, end, _csv_param(post_type), parse_where(where),
+                                                    sort, order == 'desc', limit)
+        if field_list is not None:
+            unknown = [f for f in field_list if f not in engine.row_fields()]
+            if unknown:
+                raise ValueError(f"Unknown field '{unknown[0]}'. Expected any of: {', '.join(engine.row_fields())}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    rows = index.df.iloc[positions]
+    if field_list is None or set(field_list) & set(COLD_COLS):
+        rows = snapshot.attach_cold(platform, rows)
+    return Response(content=dumps_report({
+        "account": ws.name, "platform": platform, "count": count, "scanned": scanned, "rows": index.rows,
+        "posts": engine.rows_to_records(platform, rows, field_list)
+    }), media_type="application/json")
+
+# GET /export formats: streaming body -> media type
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
+
+@app.get("/export")
+def export_report(start_date: str = Query(...), end_date: str = Query(...), format: str = Query("xlsx"),
+                  fb_story_views: int = 0, account: str = Query(DEFAULT_ACCOUNT)):
+    """Download the period's particulars, post and story tables as CSV or XLSX.
+
+    Sheets follow the Google Sheet layout (google_apps_script.js). The body
+    is streamed: rows are encoded in batches while the response is sent.
+    """
+    ws = _workspace(account)
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{format}'. Expected one of: {', '.join(EXPORT_FORMATS)}")
+    start, end = _parse_period(start_date, end_date)
+
+    # Rows are read from this snapshot even if an upload lands mid-download
+    snapshot = ws.snapshot()
+    tables = {platform: engine.slice_range(snapshot.load_range(platform, start, end), start, end) for platform in PLATFORMS}
+    summary = engine.generate_period_reports(tables['facebook'], tables['instagram'], tables['stories'], [(start, end)],
+                                             manual_fb_views=fb_story_views, rollups=snapshot.rollups)[0]
+    week_label = f"{start_date} to {end_date}"
+    sheets = report_sheets(summary['aggregated'], tables, week_label, cold=snapshot.attach_cold)
+    try:
+        body = iter_csv(sheets, [["Report Period", week_label]]) if format == 'csv' else iter_xlsx(sheets)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    filename = f"meta_report_{ws.name}_{start_date}_{end_date}.{format}"
+    return StreamingResponse(metrics.timed_iter('serialize', body), media_type=EXPORT_FORMATS[format],
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+PPTX_MEDIA_TYPE = 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+
+def _deck_template():
+    """The parsed DECK_TEMPLATE (503 when it is not deployed)."""
+    try:
+        return load_template(DECK_TEMPLATE)
+    except FileNotFoundError:
+        raise HTTPException(status_code=503, detail="No deck template. Set DECK_TEMPLATE to the .pptx path")
+    except (ValueError, zipfile.BadZipFile) as e:
+        raise HTTPException(status_code=503, detail=f"Deck template is not a valid .pptx: {e}")
+
+def _deck_extra(payload: Dict[str, Any], template: DeckTemplate) -> Dict[str, str]:
+    values = payload.get('values') or {}
+    if not isinstance(values, dict) or any(isinstance(v, (dict, list)) for v in values.values()):
+        raise HTTPException(status_code=400, detail="'values' must map placeholder names to text")
+    values = {str(name): str(value) for name, value in values.items()}
+    # A hand-entered value the template has no place for would silently go nowhere
+    unused = template.unused(values)
+    if unused:
+        raise HTTPException(status_code=400, detail=f"The deck template has no placeholder for: {', '.join(unused)}")
+    return values
+
+def _deck_values(ws: Workspace, start: datetime, end: datetime, fb_story_views: int,
+                 extra: Dict[str, str]) -> Dict[str, str]:
+    # The deck compares with the week before, so the read spans both
+    snapshot = ws.snapshot()
+    first, _ = previous_period(start, end)
+    return report_deck_values(
+        engine, *(snapshot.load_range(platform, first, end) for platform in PLATFORMS),
+        start, end, fb_story_views, rollups=snapshot.rollups, cold=snapshot.attach_cold, extra=extra
+    )
+
+@app.post("/deck")
+def render_deck(payload: Dict[str, Any] = Body(...)):
+    """The weekly PowerPoint for one period, filled in from its report.
+
+    Payload: start_date, end_date, optional account, fb_story_views and
+    `values` (hand-entered placeholders, e.g. {"IG_FOLLOWER_GROWTH": "+3,621"}).
+    Placeholders left without a value are listed in `X-Deck-Unfilled`, report
+    values the template has no placeholder for in `X-Deck-Unused`; a hand-entered
+    value the template has no placeholder for is a 400.
+    """
+    ws = _workspace(payload.get('account') or DEFAULT_ACCOUNT)
+    if not payload.get('start_date') or not payload.get('end_date'):
+        raise HTTPException(status_code=400, detail="Send 'start_date' and 'end_date'")
+    start, end = _parse_period(payload['start_date'], payload['end_date'])
+    template = _deck_template()
+    values = _deck_values(ws, start, end, int(payload.get('fb_story_views') or 0), _deck_extra(payload, template))
+
+    filename = f"weekly_report_{ws.name}_{payload['start_date']}_{payload['end_date']}.pptx"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    unfilled = sorted(template.placeholders - set(values))
+    if unfilled:
+        headers["X-Deck-Unfilled"] = ",".join(unfilled)
+    unused = template.unused(values)
+    if unused:
+        headers["X-Deck-Unused"] = ",".join(unused)
+    return StreamingResponse(metrics.timed_iter('serialize', template.render(values)),
+                             media_type=PPTX_MEDIA_TYPE, headers=headers)
+
+@app.post("/deck/batch")
+async def render_deck_batch(payload: Dict[str, Any] = Body(...)):
+    """Weekly decks for many periods and/or accounts, as one zip.
+
+    Payload: `periods` or start_date, end_date and granularity (as in
+    /report/batch), `accounts` (default ['default']), fb_story_views and
+    `values`. Decks are rendered in parallel across the worker processes.
+    """
+    try:
+        if payload.get('periods'):
+            periods = [_parse_period(p['start_date'], p['end_date']) for p in payload['periods']]
+        elif payload.get('start_date') and payload.get('end_date') and payload.get('granularity'):
+            start, end = _parse_period(payload['start_date'], payload['end_date'])
+            periods = period_buckets(start, end, payload['granularity'])
+        else:
+            raise HTTPException(status_code=400, detail="Send 'periods', or 'start_date', 'end_date' and 'granularity'")
+    except (KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Each period needs 'start_date' and 'end_date'")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not periods:
+        raise HTTPException(status_code=400, detail="No periods: 'end_date' is before 'start_date'")
+    spaces = [_workspace(account) for account in (payload.get('accounts') or [DEFAULT_ACCOUNT])]
+    if len(periods) * len(spaces) > MAX_DECK_BATCH:
+        raise HTTPException(status_code=400, detail=f"Too many decks ({len(periods) * len(spaces)}). Max is {MAX_DECK_BATCH}")
+    extra = _deck_extra(payload, _deck_template())
+    fb_story_views = int(payload.get('fb_story_views') or 0)
+
+    jobs = await run_in_threadpool(lambda: [
+        (f"{ws.name}/weekly_report_{ws.name}_{start:%Y-%m-%d}_{end:%Y-%m-%d}.pptx",
+         _deck_values(ws, start, end, fb_story_views, extra))
+        for ws in spaces for start, end in periods
+    ])
+    out_dir = tempfile.mkdtemp(prefix='decks_')
+    try:
+        loop = asyncio.get_running_loop()
+        pool = _get_ingest_pool()
+        paths = await asyncio.gather(*[
+            loop.run_in_executor(pool, render_deck_file, DECK_TEMPLATE, values, os.path.join(out_dir, f"{i}.pptx"))
+            for i, (_, values) in enumerate(jobs)
+        ])
+    except BaseException:
+        shutil.rmtree(out_dir, ignore_errors=True)
+        raise
+
+    def body():
+        try:
+            yield from iter_archive([(name, path) for (name, _), path in zip(jobs, paths)])
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+
+    return StreamingResponse(metrics.timed_iter('serialize', body()), media_type="application/zip",
+                             headers={"Content-Disposition": 'attachment; filename="weekly_reports.zip"'})
+
+# Longest span GET /timeseries returns, in days
+MAX_SERIES_DAYS = 3660
+
+@app.get("/timeseries")
+def get_timeseries(post_id: str = Query(None), page_id: str = Query(None),
+                   start_date: str = Query(None), end_date: str = Query(None),
+                   window: int = Query(7, gt=0, le=366), account: str = Query(DEFAULT_ACCOUNT)):
+    """Per-day and rolling `window`-day reach/views/engagement from the daily Facebook export.
+
+    Give `post_id` for one post, `page_id` (the Page ID) for a whole page, or
+    neither for every page in the account. Without dates the series spans all
+    uploaded days.
+    """
+    ws = _workspace(account)
+    start = end = None
+    if start_date or end_date:
+        if not (start_date and end_date):
+            raise HTTPException(status_code=400, detail="Send both 'start_date' and 'end_date', or neither")
+        start, end = _parse_period(start_date, end_date)
+        if (end - start).days >= MAX_SERIES_DAYS:
+            raise HTTPException(status_code=400, detail=f"Range too long. Max is {MAX_SERIES_DAYS} days")
+    series = time_series(load_daily(ws.snapshot()), start, end, post_id=post_id, account_id=page_id, window=window)
+    return {"account": ws.name, "post_id": post_id, "page_id": page_id, **series}
+
+# --- METRICS ---
+# Table gauges are read from each account's current snapshot when /metrics is
+# scraped. Byte sizes (deep=True walks text columns) are cached per dataset version and
+# cover the hot columns; GET /stats/memory also shows the lazily loaded cold ones.
+TABLES = PLATFORMS + [DAILY_TABLE]
+_table_bytes: Dict[tuple, int] = {}
+
+def _table_samples():
+    for name in workspaces.names():
+        snapshot = workspaces.get(name).snapshot()
+        for table in TABLES:
+            key = (name, table, snapshot.version)
+            if key not in _table_bytes:
+                usage = snapshot.memory_usage(table)
+                _table_bytes[key] = sum(usage['hot'].values())
+            yield (name, table), snapshot.count(table), _table_bytes[key]
+    # Entries for superseded versions are never read again
+    live = {(name, workspaces.get(name).snapshot().version) for name in workspaces.names()}
+    for key in [k for k in _table_bytes if (k[0], k[2]) not in live]:
+        del _table_bytes[key]
+
+metrics.registry.callback('table_rows', 'Rows held per account and table.', 'gauge', ['account', 'table'],
+                          lambda: [(labels, rows) for labels, rows, _ in _table_samples()])
+metrics.registry.callback('table_bytes', 'In-memory bytes of the hot columns per account and table (memory-mapped ones included).',
+                          'gauge', ['account', 'table'],
+                          lambda: [(labels, size) for labels, _, size in _table_samples()])
+metrics.registry.callback('report_cache_entries', 'Rendered /report bodies held.', 'gauge', [],
+                          lambda: [((), report_cache.stats()['entries'])])
+metrics.registry.callback('report_cache_hits_total', 'Report cache hits.', 'counter', [],
+                          lambda: [((), report_cache.hits)])
+metrics.registry.callback('report_cache_misses_total', 'Report cache misses.', 'counter', [],
+                          lambda: [((), report_cache.misses)])
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus text exposition: stage and request latency histograms, table and cache gauges."""
+    return Response(content=metrics.registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/stats/memory")
+def memory_stats(account: str = Query(DEFAULT_ACCOUNT)):
+    """Bytes per column of every table of an account, hot and cold (see store.py)."""
+    ws = _workspace(account)
+    snapshot = ws.snapshot()
+    tables = {}
+    for table in TABLES:
+        usage = snapshot.memory_usage(table)
+        tables[table] = {
+            "rows": snapshot.count(table),
+            "hot_bytes": sum(usage['hot'].values()),
+            "cold_bytes": sum(usage['cold'].values()),
+            **usage
+        }
+    return {"account": ws.name, "version": snapshot.version, "tables": tables}
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Report cache hit/miss counters, for sizing REPORT_CACHE_SIZE."""
+    return {"dataset_versions": {name: workspaces.get(name).version for name in workspaces.names()}, **report_cache.stats()}
+
+@app.post("/sync-sheet", status_code=202)
 async def sync_sheet(payload: Dict[str, Any]):
+    """Queue a Google Sheet sync for a period. Poll GET /sync-sheet/{job_id} for the outcome.
+
+    The sheet rows are built here from the stored data. Rows are pushed in
+    size-bounded gzip chunks, and a re-sync of a week only sends rows whose
+    checksum changed since that week's last successful sync (unless
+    `full_resync` is set), plus the keys of rows it no longer has.
+
+    Payload: script_url, week_label, start_date, end_date, plus optional
+    account (default 'default'), fb_story_views, facebook_stories (manual rows),
+    post_reach ({post_id: reach} edited on the dashboard), ig_followers,
+    fb_followers, fb_total_reach, fb_total_engagement, full_resync.
+    """
     script_url = payload.get('script_url')
     if not script_url:
         raise HTTPException(status_code=400, detail="Missing 'script_url' in payload")
-        
+    week_label = payload.get('week_label')
+    if not week_label or not payload.get('start_date') or not payload.get('end_date'):
+        raise HTTPException(status_code=400, detail="Missing 'week_label', 'start_date' or 'end_date' in payload")
+
+    ws = _workspace(payload.get('account') or DEFAULT_ACCOUNT)
+    start, end = _parse_period(payload['start_date'], payload['end_date'])
+    report = await run_in_threadpool(_compute_report, ws.snapshot(), start, end, int(payload.get('fb_story_views') or 0))
     try:
-        print(f"--- STARTING SYNC ---")
-        print(f"Target URL: {script_url}")
-        print(f"Payload Size: {len(str(payload))} chars")
-
-        # Set a 60-second timeout to prevent hanging
-        # ALLOW REDIRECTS = TRUE (Default) but let's see if we get a 302
-        response = requests.post(script_url, json=payload, timeout=60)
-        
-        print(f"Response Code: {response.status_code}")
-        if response.history:
-            print("Redirect History:")
-            for resp in response.history:
-                print(f" - {resp.status_code} : {resp.url}")
-        
-        print(f"Final Response Preview: {response.text[:200]}")
-
-        # Check if response is valid JSON
-        try:
-            return response.json()
-        except ValueError:
-            # If Google returns HTML (Sign-in page? Error page?), show it.
-            error_msg = f"Google Script returned Invalid JSON. Code: {response.status_code}. Content: {response.text[:500]}..."
-            print(error_msg)
-            raise HTTPException(status_code=400, detail=error_msg)
-            
-    except requests.exceptions.Timeout:
-        msg = "Request to Google Timed Out (60s). The script might be running but taking too long."
-        print(msg)
-        raise HTTPException(status_code=504, detail=msg)
-        
-    except Exception as e:
-        print(f"FATAL SYNC ERROR: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Sync Failed: {str(e)}")
+        sections = build_sync_sections(report, payload.get('facebook_stories'), payload.get('post_reach'))
+    except (TypeError, ValueError, AttributeError):
+        raise HTTPException(status_code=400, detail="'post_reach' must map post ids to whole numbers")
+    overall = build_overall_stats(report, payload['start_date'], payload['end_date'], payload)
+    checksums = {**section_checksums(sections), '_overall': overall}
+
+    previous = None if payload.get('full_resync') else ws.ledger.get(week_label)
+    removed = {}
+    if previous is None:
+        mode = 'append'
+    else:
+        mode = 'upsert'
+        # Rows of posts that are gone since the last sync are deleted from the week block
+        removed = removed_keys(sections, previous)
+        sections = delta_sections(sections, previous)
+        if previous.get('_overall') == overall:
+            overall = None
+
+    chunks = plan_chunks(week_label, mode, sections, overall, max_bytes=SYNC_CHUNK_BYTES, removed=removed)
+    # Each accepted chunk is recorded at once: after a failed chunk the next sync only sends the rest
+    job = syncer.submit(
+        script_url,
+        [encode_chunk(chunk) for chunk in chunks],
+        on_success=lambda: ws.ledger.commit(week_label, checksums),
+        on_chunk=lambda i: ws.ledger.update(week_label, chunk_checksums(chunks[i]))
+    )
+    return {**job, "account": ws.name, "mode": mode, "rows": {name: len(rows) for name, rows in sections.items()},
+            "removed": {name: len(keys) for name, keys in removed.items()}}
+
+@app.get("/sync-sheet/{job_id}")
+def sync_status(job_id: str):
+    job = syncer.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown sync job '{job_id}'")
+    return job
+
+@app.on_event("shutdown")
+async def _close_syncer():
+    await syncer.close()
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,204 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# --- INSTRUMENTATION ---
+# Engine stages are wrapped in spans (`span`, `@timed`). Each span is observed
+# in the engine_stage_seconds histogram and, while a request is collecting
+# (`collect`), appended to that request's span list for the Server-Timing
+# header. Everything registered here is rendered in the Prometheus text
+# format by `registry.render()` for GET /metrics.
+
+# Seconds; spans cover sub-millisecond slices up to multi-second CSV parses
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[str, ...]
+
+
+def _label_text(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Prometheus-style histogram: cumulative bucket counts, sum and count per label set."""
+
+    def __init__(self, name: str, help_text: str, label_names: List[str], buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Labels, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Labels, value: float) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: (list(counts), total) for labels, (counts, total) in self._series.items()}
+        for labels, (counts, total) in sorted(snapshot.items()):
+            running = 0
+            for bound, count in zip(list(self.buckets) + ['+Inf'], counts):
+                running += count
+                le = _label_text(self.label_names + ['le'], list(labels) + [bound if bound == '+Inf' else repr(bound)])
+                lines.append(f"{self.name}_bucket{le} {running}")
+            text = _label_text(self.label_names, labels)
+            lines.append(f"{self.name}_sum{text} {total!r}")
+            lines.append(f"{self.name}_count{text} {running}")
+        return lines
+
+
+class CallbackMetric:
+    """Gauge or counter whose samples are read from `collect()` at scrape time."""
+
+    def __init__(self, name: str, help_text: str, kind: str, label_names: List[str],
+                 collect: Callable[[], Iterable[Tuple[Labels, float]]]):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.label_names = label_names
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self.collect():
+            lines.append(f"{self.name}{_label_text(self.label_names, labels)} {_number(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list = []
+
+    def histogram(self, name: str, help_text: str, label_names: List[str]) -> Histogram:
+        metric = Histogram(name, help_text, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def callback(self, name: str, help_text: str, kind: str, label_names: List[str],
+                 collect: Callable[[], Iterable[Tuple[Labels, float]]]) -> CallbackMetric:
+        metric = CallbackMetric(name, help_text, kind, label_names, collect)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    'engine_stage_seconds', 'Time spent in each AnalyticsEngine stage.', ['stage'])
+REQUEST_SECONDS = registry.histogram(
+    'http_request_duration_seconds', 'Request latency per endpoint.', ['method', 'route', 'status'])
+
+# Spans of the request being served (None outside `collect`)
+_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar('spans', default=None)
+# True inside `deferred`: spans are only listed, for a parent process to replay
+_deferred: ContextVar[bool] = ContextVar('deferred', default=False)
+
+
+def record(stage: str, seconds: float) -> None:
+    if not _deferred.get():
+        STAGE_SECONDS.observe((stage,), seconds)
+    spans = _spans.get()
+    if spans is not None:
+        spans.append((stage, seconds))
+
+
+def replay(spans: List[Tuple[str, float]]) -> None:
+    """Record spans measured elsewhere (e.g. in an ingest worker process)."""
+    for stage, seconds in spans:
+        record(stage, seconds)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+def timed(stage: str):
+    """Decorator: run the function inside span(stage)."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def timed_iter(stage: str, iterable: Iterable) -> Iterator:
+    """Yield from `iterable`, timing each step as `stage` (e.g. a chunked CSV reader)."""
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            record(stage, time.perf_counter() - start)
+            return
+        record(stage, time.perf_counter() - start)
+        yield item
+
+
+@contextmanager
+def collect() -> Iterator[List[Tuple[str, float]]]:
+    """List every span recorded in this context (and threads/tasks started from it)."""
+    spans: List[Tuple[str, float]] = []
+    token = _spans.set(spans)
+    try:
+        yield spans
+    finally:
+        _spans.reset(token)
+
+
+@contextmanager
+def deferred() -> Iterator[List[Tuple[str, float]]]:
+    """Like collect(), but spans are not observed here; hand them to replay() instead."""
+    token = _deferred.set(True)
+    try:
+        with collect() as spans:
+            yield spans
+    finally:
+        _deferred.reset(token)
+
+
+def server_timing(spans: List[Tuple[str, float]], total: Optional[float] = None) -> str:
+    """Server-Timing header value: one entry per stage (summed), in first-seen order."""
+    totals: Dict[str, float] = {}
+    counts: Dict[str, int] = {}
+    for stage, seconds in spans:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+        counts[stage] = counts.get(stage, 0) + 1
+    entries = [f'{stage};dur={seconds * 1000:.2f};desc="x{counts[stage]}"' for stage, seconds in totals.items()]
+    if total is not None:
+        entries.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(entries)
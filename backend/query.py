@@ -0,0 +1,186 @@
+import re
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from engine import metric_columns, search_bounds, top_k_positions
+
+# --- POST QUERIES ---
+# GET /posts answers "posts of this type, in this window, with these metric
+# ranges, sorted on X" over a whole platform table. A PostIndex is built once
+# per snapshot and platform (Snapshot.derived) and holds:
+#   - the table's publish_time order (tables are stored sorted on it),
+#   - min/max of every numeric column, so a predicate no row can pass (or
+#     that every row passes) costs nothing,
+#   - a sorted index per numeric column and one per post_type, each built
+#     the first time a query filters on it.
+# Every predicate's match count is then two binary searches. The predicate
+# matching fewest rows supplies the candidate row positions; the others are
+# only checked on those candidates, so selective queries skip most rows.
+
+# `where` clauses: <numeric column><op><number>, e.g. reach>20000 or engagement_rate_reach>=0.05
+_CLAUSE = re.compile(r'^\s*([a-z_]+)\s*(>=|<=|=|>|<)\s*(-?(?:\d+\.?\d*|\.\d+)(?:e-?\d+)?)\s*$', re.I)
+
+# (low, low inclusive, high, high inclusive)
+Bound = Tuple[float, bool, float, bool]
+
+
+def parse_where(clauses: List[str]) -> Dict[str, Bound]:
+    """Range per column from clauses like 'reach>20000'; clauses on one column are intersected."""
+    bounds: Dict[str, Bound] = {}
+    for clause in clauses:
+        match = _CLAUSE.match(clause)
+        if match is None:
+            raise ValueError(f"Invalid filter '{clause}'. Use <column><op><number> with op one of >, >=, <, <=, =")
+        col, op, value = match.group(1).lower(), match.group(2), float(match.group(3))
+        lo, lo_inc, hi, hi_inc = bounds.get(col, (-np.inf, True, np.inf, True))
+        if op in ('>', '>=', '=') and (value > lo or (value == lo and op == '>')):
+            lo, lo_inc = value, op != '>'
+        if op in ('<', '<=', '=') and (value < hi or (value == hi and op == '<')):
+            hi, hi_inc = value, op != '<'
+        bounds[col] = (lo, lo_inc, hi, hi_inc)
+    return bounds
+
+
+class PostIndex:
+    """Sorted indexes and column statistics over one platform table (see the module comment)."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.rows = len(df)
+        self.times = df['publish_time'].to_numpy() if 'publish_time' in df.columns else None
+        # Rows with a publish_time (NaT sorts last)
+        self.dated = len(self.times) - int(np.isnat(self.times).sum()) if self.times is not None else 0
+        self.numeric = metric_columns(df)
+        self.stats: Dict[str, Tuple[float, float]] = {}
+        if self.rows:
+            for col in self.numeric:
+                values = df[col].to_numpy()
+                self.stats[col] = (float(np.nanmin(values)), float(np.nanmax(values)))
+        # column -> (row positions in value order, the values in that order, count of non-NaN values)
+        self._sorted: Dict[str, Tuple[np.ndarray, np.ndarray, int]] = {}
+        self._types: Optional[Tuple[pd.Index, np.ndarray]] = None
+        self._lock = threading.Lock()
+
+    def _index(self, col: str, values: Callable[[], np.ndarray]) -> Tuple[np.ndarray, np.ndarray, int]:
+        """The sorted index of `col`, built on first use."""
+        with self._lock:
+            if col not in self._sorted:
+                data = values()
+                order = np.argsort(data, kind='stable')
+                if self.rows < 2 ** 31:
+                    order = order.astype('int32')
+                valid = len(data) - int(np.isnan(data).sum()) if data.dtype.kind == 'f' else len(data)
+                self._sorted[col] = (order, data[order], valid)
+            return self._sorted[col]
+
+    def _type_codes(self) -> Tuple[pd.Index, np.ndarray]:
+        with self._lock:
+            if self._types is None:
+                types = pd.Categorical(self.df['post_type'])
+                self._types = (types.categories, types.codes)
+            return self._types
+
+    def _range(self, col: str, bound: Bound) -> Tuple[int, Callable[[], np.ndarray]]:
+        """(match count, positions of the matches) of `bound` on `col`, through its sorted index."""
+        order, values, valid = self._index(col, lambda: self.df[col].to_numpy())
+        lo, lo_inc, hi, hi_inc = bound
+        a = int(np.searchsorted(values[:valid], lo, side='left' if lo_inc else 'right')) if lo > -np.inf else 0
+        # NaN sorts last and never passes a bound
+        b = int(np.searchsorted(values[:valid], hi, side='right' if hi_inc else 'left')) if hi < np.inf else valid
+        return max(0, b - a), lambda: order[a:b]
+
+    def _post_types(self, post_types: List[str]) -> Tuple[int, Callable[[], np.ndarray], np.ndarray]:
+        """(match count, positions, wanted codes) of a case-insensitive post_type match."""
+        categories, codes = self._type_codes()
+        wanted_names = {t.lower() for t in post_types}
+        wanted = np.array([i for i, name in enumerate(categories) if str(name).lower() in wanted_names], dtype='int64')
+        order, sorted_codes, _ = self._index('post_type', lambda: codes)
+        starts = np.searchsorted(sorted_codes, wanted, side='left')
+        ends = np.searchsorted(sorted_codes, wanted, side='right')
+        count = int((ends - starts).sum())
+        return count, lambda: np.concatenate([order[a:b] for a, b in zip(starts, ends)] or [order[:0]]), wanted
+
+    def _sort_keys(self, sort: str, positions: np.ndarray) -> np.ndarray:
+        if sort == 'publish_time' and self.times is not None:
+            times = self.times[positions].astype('datetime64[ns]')
+            keys = times.view('int64').astype('float64')
+            keys[np.isnat(times)] = np.nan
+            return keys
+        return self.df[sort].to_numpy()[positions]
+
+    def query(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+              post_types: Optional[List[str]] = None, where: Optional[Dict[str, Bound]] = None,
+              sort: Optional[str] = None, descending: bool = True,
+              limit: Optional[int] = None) -> Tuple[np.ndarray, int, int]:
+        """(row positions of the result, total matches, rows examined).
+
+        Rows are returned in `sort` order (ties and the default keep
+        publish_time order); `limit` caps the positions, not the total.
+        """
+        where = dict(where or {})
+        for col in list(where) + ([sort] if sort and sort != 'publish_time' else []):
+            if col not in self.numeric and self.rows:
+                raise ValueError(f"Unknown column '{col}'. Expected one of: {', '.join(self.numeric)}")
+        empty = np.empty(0, dtype='int64')
+        if not self.rows:
+            return empty, 0, 0
+
+        # Candidate sources: (match count, positions); checks: applied to candidates from another source
+        sources: List[Tuple[int, Callable[[], np.ndarray]]] = []
+        checks: List[Callable[[np.ndarray], np.ndarray]] = []
+        if (start is not None or end is not None) and self.times is not None:
+            lo_hi = search_bounds(self.times, [(start or end, end or start)])
+            lo = int(lo_hi[0][0]) if start is not None else 0
+            hi = int(lo_hi[1][0]) if end is not None else self.dated
+            sources.append((max(0, hi - lo), lambda: np.arange(lo, hi)))
+            checks.append(lambda p: (p >= lo) & (p < hi))
+        for col, bound in where.items():
+            lo_v, lo_inc, hi_v, hi_inc = bound
+            low, high = self.stats[col]
+            if lo_v > high or hi_v < low or (lo_v == high and not lo_inc) or (hi_v == low and not hi_inc):
+                return empty, 0, 0
+            if lo_v < low and hi_v > high:
+                continue        # every row passes
+            sources.append(self._range(col, bound))
+            checks.append(_bound_check(self.df[col].to_numpy(), bound))
+        if post_types:
+            if 'post_type' not in self.df.columns:
+                return empty, 0, 0
+            count, positions, wanted = self._post_types(post_types)
+            codes = self._type_codes()[1]
+            sources.append((count, positions))
+            checks.append(lambda p: np.isin(codes[p], wanted))
+
+        if sources:
+            best = min(range(len(sources)), key=lambda i: sources[i][0])
+            candidates = np.sort(sources[best][1]())
+            scanned = len(candidates)
+            mask = np.ones(len(candidates), dtype=bool)
+            for i, check in enumerate(checks):
+                if i != best and len(candidates):
+                    mask &= check(candidates)
+            matches = candidates[mask]
+        else:
+            matches = np.arange(self.rows)
+            scanned = self.rows
+
+        total = len(matches)
+        if sort is not None:
+            matches = matches[top_k_positions(self._sort_keys(sort, matches), limit or total, largest=descending)]
+        elif limit is not None:
+            matches = matches[:limit]
+        return matches, total, scanned
+
+
+def _bound_check(values: np.ndarray, bound: Bound) -> Callable[[np.ndarray], np.ndarray]:
+    lo, lo_inc, hi, hi_inc = bound
+
+    def check(positions: np.ndarray) -> np.ndarray:
+        v = values[positions]
+        ok = (v >= lo) if lo_inc else (v > lo)
+        return ok & ((v <= hi) if hi_inc else (v < hi))
+    return check
@@ -0,0 +1,113 @@
+from datetime import datetime, time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Every metric the report sums. Columns missing from a platform table count as 0.
+ROLLUP_METRICS = [
+    'reach', 'views', 'likes', 'comments', 'shares', 'saves', 'replies',
+    'link_clicks', 'profile_visits', 'sticker_taps', 'follows', 'total_engagement'
+]
+
+
+class DailyRollup:
+    """Per-day sums of ROLLUP_METRICS (plus a post count) for one platform table.
+
+    Days are stored densely from the first to the last publish date, and a
+    cumulative sum is kept per metric, so the total over any whole-day range
+    is two lookups: cum[end + 1] - cum[start]. Rows can be added or removed
+    (sign=-1) incrementally as uploads change the table.
+    """
+
+    def __init__(self):
+        self.first_day: Optional[np.datetime64] = None
+        self.daily: Dict[str, np.ndarray] = {}
+        self._cum: Optional[Dict[str, np.ndarray]] = None
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> 'DailyRollup':
+        rollup = cls()
+        rollup.add(df)
+        return rollup
+
+    def copy(self) -> 'DailyRollup':
+        """Independent copy, so a published rollup is never modified in place."""
+        clone = DailyRollup()
+        clone.first_day = self.first_day
+        clone.daily = {col: arr.copy() for col, arr in self.daily.items()}
+        return clone
+
+    @property
+    def columns(self) -> List[str]:
+        return ROLLUP_METRICS + ['posts']
+
+    def add(self, df: pd.DataFrame, sign: int = 1) -> None:
+        """Fold rows into the daily buckets (sign=-1 removes previously added rows)."""
+        if df.empty or 'publish_time' not in df.columns:
+            return
+        days = df['publish_time'].to_numpy().astype('datetime64[D]')
+        valid = ~np.isnat(days)
+        if not valid.any():
+            return
+        days = days[valid]
+        self._ensure_span(days.min(), days.max())
+
+        idx = (days - self.first_day).astype('int64')
+        size = len(self.daily['posts'])
+        self.daily['posts'] += sign * np.bincount(idx, minlength=size)
+        for col in ROLLUP_METRICS:
+            if col not in df.columns:
+                continue
+            weights = df[col].to_numpy(dtype='float64')[valid]
+            self.daily[col] += sign * np.rint(np.bincount(idx, weights=weights, minlength=size)).astype('int64')
+        self._cum = None
+
+    def _ensure_span(self, lo: np.datetime64, hi: np.datetime64) -> None:
+        if self.first_day is None:
+            self.first_day = lo
+            self.daily = {col: np.zeros(int((hi - lo).astype('int64')) + 1, dtype='int64') for col in self.columns}
+            return
+        last_day = self.first_day + len(self.daily['posts']) - 1
+        pad_before = max(0, int((self.first_day - lo).astype('int64')))
+        pad_after = max(0, int((hi - last_day).astype('int64')))
+        if pad_before or pad_after:
+            self.daily = {col: np.pad(arr, (pad_before, pad_after)) for col, arr in self.daily.items()}
+            self.first_day = self.first_day - pad_before
+
+    def _prefix(self) -> Dict[str, np.ndarray]:
+        if self._cum is None:
+            self._cum = {col: np.concatenate(([0], np.cumsum(arr))) for col, arr in self.daily.items()}
+        return self._cum
+
+    def totals(self, start_date: datetime, end_date: datetime) -> Dict[str, int]:
+        """Sum of every metric for posts published on start_date..end_date (whole days)."""
+        if self.first_day is None:
+            return {col: 0 for col in self.columns}
+        size = len(self.daily['posts'])
+        lo = int((np.datetime64(start_date.date()) - self.first_day).astype('int64'))
+        hi = int((np.datetime64(end_date.date()) - self.first_day).astype('int64')) + 1
+        lo, hi = max(lo, 0), min(hi, size)
+        if lo >= hi:
+            return {col: 0 for col in self.columns}
+        cum = self._prefix()
+        return {col: int(cum[col][hi] - cum[col][lo]) for col in self.columns}
+
+    def totals_many(self, periods: List[Tuple[datetime, datetime]]) -> List[Dict[str, int]]:
+        """totals() for many (start, end) periods with one vectorized lookup per metric."""
+        if self.first_day is None:
+            return [{col: 0 for col in self.columns} for _ in periods]
+        size = len(self.daily['posts'])
+        starts = np.array([np.datetime64(start.date()) for start, _ in periods], dtype='datetime64[D]')
+        ends = np.array([np.datetime64(end.date()) for _, end in periods], dtype='datetime64[D]')
+        lo = np.clip((starts - self.first_day).astype('int64'), 0, size)
+        hi = np.clip((ends - self.first_day).astype('int64') + 1, 0, size)
+        hi = np.maximum(hi, lo)
+        cum = self._prefix()
+        sums = {col: cum[col][hi] - cum[col][lo] for col in self.columns}
+        return [{col: int(sums[col][i]) for col in self.columns} for i in range(len(periods))]
+
+
+def covers_whole_days(start_date: datetime, end_date: datetime) -> bool:
+    """True when [start_date, end_date] is exactly a run of whole days (how /report builds it)."""
+    return start_date.time() == time(0, 0) and end_date.time() >= time(23, 59, 59)
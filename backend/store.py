@@ -0,0 +1,636 @@
+import json
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from engine import COLD_COLS, combine_frames
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: single worker, no cross-process lock
+    fcntl = None
+
+# --- STORAGE BACKENDS ---
+# Both stores hold one normalized table per platform ('facebook', 'instagram', 'stories'),
+# split into month partitions ('YYYY-MM', plus 'undated' for rows without a publish_time).
+# Each partition is sorted on publish_time, so concatenating partitions in key order
+# yields a sorted table. MemoryStore is the original behaviour (lost on restart);
+# DiskStore also persists every partition as per-column .npy files that are memory-mapped back.
+#
+# Writes are copy-on-write: a save/upsert/clear builds new partition dicts (and, on disk,
+# new partition directories) and then bumps `version`, so a Snapshot taken earlier keeps
+# reading exactly the tables it was taken from.
+#
+# The long text columns (engine.COLD_COLS: description, permalink) are split off every
+# partition into ColdColumns. load/load_range return only the hot columns; reports add
+# the cold ones for the rows they serialize (Snapshot.attach_cold). On disk they are
+# read on first use, so a restart never parses them for totals or rankings.
+
+UNDATED = 'undated'
+MANIFEST_FILE = 'MANIFEST.json'
+
+
+def _month_keys(df: pd.DataFrame) -> pd.Series:
+    if 'publish_time' not in df.columns:
+        return pd.Series(UNDATED, index=df.index)
+    # numpy formats the whole column at once; Series.dt.strftime goes row by row
+    months = df['publish_time'].to_numpy().astype('datetime64[M]')
+    keys = np.datetime_as_string(months, unit='M').astype(object)
+    keys[np.isnat(months)] = UNDATED
+    return pd.Series(keys, index=df.index)
+
+
+def _split_by_month(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    if df.empty:
+        return {}
+    return {key: part.reset_index(drop=True) for key, part in df.groupby(_month_keys(df), sort=True)}
+
+
+def _same_values(old: pd.DataFrame, new: pd.DataFrame) -> np.ndarray:
+    """Row-wise equality over the shared columns (post_id aside, rows are matched on it), treating NaN == NaN."""
+    same = np.ones(len(new), dtype=bool)
+    for col in new.columns.intersection(old.columns).drop('post_id', errors='ignore'):
+        a, b = old[col].reset_index(drop=True), new[col].reset_index(drop=True)
+        if isinstance(a.dtype, pd.CategoricalDtype) or isinstance(b.dtype, pd.CategoricalDtype):
+            # Categoricals only compare when their category lists match
+            a, b = a.astype(object), b.astype(object)
+        same &= ((a == b) | (a.isna() & b.isna())).to_numpy(dtype=bool)
+    return same
+
+
+def _id_text(ids: pd.Series) -> pd.Series:
+    """post_ids as text: the index key, whether a partition stores them as int64, str or a mix."""
+    return ids if pd.api.types.is_string_dtype(ids) else ids.astype(str)
+
+
+def _concat(parts: List[pd.DataFrame]) -> pd.DataFrame:
+    """Partitions as one frame. Each partition keeps post_id as int64 when all its ids are numbers,
+    so if any partition holds text ids, all are read as text (never a mix of str and int)."""
+    if not parts:
+        return pd.DataFrame()
+    if len(parts) == 1:
+        return parts[0]
+    if len({str(p['post_id'].dtype) for p in parts if 'post_id' in p.columns}) > 1:
+        parts = [p.assign(post_id=_id_text(p['post_id'])) if 'post_id' in p.columns else p for p in parts]
+    return pd.concat(parts, ignore_index=True)
+
+
+class ColdColumns:
+    """The COLD_COLS of one partition, row-aligned with its hot frame and indexed by post_id.
+
+    Either built from a frame, or from a `loader` that reads them from disk
+    the first time they are needed (`disk_bytes` sizes them until then).
+    """
+
+    def __init__(self, frame: Optional[pd.DataFrame] = None,
+                 loader: Optional[Callable[[], pd.DataFrame]] = None, disk_bytes: int = 0):
+        self._frame = frame
+        self._loader = loader
+        self._disk_bytes = disk_bytes
+        self._lock = threading.Lock()
+
+    @classmethod
+    def split(cls, df: pd.DataFrame) -> Tuple[pd.DataFrame, Optional['ColdColumns']]:
+        """(hot frame, cold columns) of a full partition; no split without post_ids to key on."""
+        cols = [col for col in COLD_COLS if col in df.columns]
+        if not cols or 'post_id' not in df.columns:
+            return df, None
+        return df.drop(columns=cols), cls(df[cols].set_axis(pd.Index(df['post_id']), axis=0))
+
+    @property
+    def loaded(self) -> bool:
+        return self._frame is not None
+
+    def frame(self) -> pd.DataFrame:
+        if self._frame is None:
+            with self._lock:
+                if self._frame is None:
+                    self._frame = self._loader()
+        return self._frame
+
+    @property
+    def disk_bytes(self) -> int:
+        """Size of the not-yet-loaded columns on disk (0 once loaded)."""
+        return 0 if self.loaded else self._disk_bytes
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Bytes per loaded column."""
+        if not self.loaded:
+            return {}
+        return {col: int(n) for col, n in self._frame.memory_usage(deep=True, index=False).items()}
+
+
+class Snapshot:
+    """One immutable version of every platform table (plus state derived from it).
+
+    Holds references to the partition frames as they were when it was taken;
+    stores never modify those frames or dicts afterwards, so a request that
+    pins a snapshot reads one consistent version of all platforms however
+    many uploads land meanwhile. (lineage, version) names the data it holds,
+    across restarts and worker processes.
+    """
+
+    def __init__(self, version: int, partitions: Dict[str, Dict[str, pd.DataFrame]],
+                 rollups: Optional[Dict[str, Any]] = None,
+                 cold: Optional[Dict[str, Dict[str, ColdColumns]]] = None, lineage: str = ''):
+        self.version = version
+        self.lineage = lineage
+        self._partitions = partitions
+        self._cold = cold or {}
+        self.rollups = rollups or {}
+        # key -> structure computed from these tables (e.g. query indexes), see derived()
+        self._derived: Dict[Any, Any] = {}
+        self._derived_lock = threading.Lock()
+
+    def derived(self, key: Any, build: Callable[[], Any]) -> Any:
+        """`build()` run once per snapshot and kept with it, so it lives exactly as long as this version."""
+        with self._derived_lock:
+            if key not in self._derived:
+                self._derived[key] = build()
+            return self._derived[key]
+
+    def load(self, platform: str, with_cold: bool = False) -> pd.DataFrame:
+        """The hot columns of a platform table (all columns with `with_cold`)."""
+        parts = self._partitions.get(platform, {})
+        if with_cold:
+            return _concat([self.full_partition(platform, key) for key in parts])
+        return _concat(list(parts.values()))
+
+    def load_range(self, platform: str, start: datetime, end: datetime) -> pd.DataFrame:
+        """Concatenate only the month partitions overlapping [start, end]."""
+        first, last = start.strftime('%Y-%m'), end.strftime('%Y-%m')
+        parts = [
+            part for key, part in self._partitions.get(platform, {}).items()
+            if key != UNDATED and first <= key <= last
+        ]
+        return _concat(parts)
+
+    def count(self, platform: str) -> int:
+        return sum(len(part) for part in self._partitions.get(platform, {}).values())
+
+    def full_partition(self, platform: str, key: str) -> pd.DataFrame:
+        """One partition with its cold columns put back (they are row-aligned)."""
+        part = self._partitions[platform][key]
+        cold = self._cold.get(platform, {}).get(key)
+        if cold is None:
+            return part
+        frame = cold.frame()
+        return part.assign(**{col: frame[col].to_numpy() for col in frame.columns})
+
+    def attach_cold(self, platform: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Rows of this snapshot's `platform` table (e.g. a slice about to be serialized) with their COLD_COLS.
+
+        Rows are found through their month partition and post_id, so only the
+        cold columns of the partitions those rows live in are ever loaded.
+        """
+        cold = self._cold.get(platform)
+        if not cold or df.empty or 'post_id' not in df.columns:
+            return df
+        keys = _month_keys(df).to_numpy()
+        ids = df['post_id'].to_numpy()
+        values: Dict[str, np.ndarray] = {}
+        for key in pd.unique(keys):
+            if key not in cold:
+                continue
+            rows = np.flatnonzero(keys == key)
+            frame = cold[key].frame()
+            wanted, index = ids[rows], frame.index
+            if index.dtype != wanted.dtype:
+                # Text ids read next to a partition keyed on int64 ones (see _concat)
+                wanted, index = wanted.astype(str), index.astype(str)
+            positions = index.get_indexer(wanted)
+            found = positions >= 0
+            for col in frame.columns:
+                column = values.setdefault(col, np.full(len(df), None, dtype=object))
+                column[rows[found]] = frame[col].to_numpy()[positions[found]]
+        return df.assign(**{col: pd.Series(v, index=df.index, dtype='str') for col, v in values.items()})
+
+    def memory_usage(self, platform: str) -> Dict[str, Any]:
+        """In-memory bytes per column of a platform table, hot and (loaded) cold, plus cold bytes still on disk."""
+        hot: Dict[str, int] = {}
+        cold: Dict[str, int] = {}
+        on_disk = 0
+        for key, part in self._partitions.get(platform, {}).items():
+            for col, n in part.memory_usage(deep=True, index=False).items():
+                hot[col] = hot.get(col, 0) + int(n)
+            columns = self._cold.get(platform, {}).get(key)
+            if columns is not None:
+                for col, n in columns.memory_usage().items():
+                    cold[col] = cold.get(col, 0) + n
+                on_disk += columns.disk_bytes
+        return {"hot": hot, "cold": cold, "cold_on_disk": on_disk}
+
+
+class MemoryStore:
+    """Platform tables held in process memory."""
+
+    def __init__(self):
+        # platform -> {partition key -> sorted DataFrame of hot columns}; replaced, never mutated, once a write commits
+        self._partitions: Dict[str, Dict[str, pd.DataFrame]] = {}
+        # platform -> {partition key -> ColdColumns}; same lifecycle as _partitions
+        self._cold: Dict[str, Dict[str, ColdColumns]] = {}
+        # platform -> {post_id (text) -> partition key}; lets upserts find existing rows in O(upload)
+        self._index: Dict[str, Dict[str, str]] = {}
+        # Bumped by every committed write
+        self.version = 0
+        # Tells this store's versions apart from those of a store that was started over (version reset to 0)
+        self.lineage = uuid.uuid4().hex
+
+    # --- persistence hooks (no-ops in memory) ---
+    # Called with the full partitions (cold columns included) right after they are set
+
+    def _persist_platform(self, platform: str, parts: Dict[str, pd.DataFrame]) -> None:
+        pass
+
+    def _persist_partition(self, platform: str, key: str, part: Optional[pd.DataFrame]) -> None:
+        pass
+
+    def _commit(self) -> None:
+        self.version += 1
+
+    # --- cross-process coordination (single process in memory) ---
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        """Hold off writers in other processes sharing the same files."""
+        yield
+
+    def stale(self) -> bool:
+        """True when another process has committed a newer version."""
+        return False
+
+    def refresh(self) -> bool:
+        """Reload a newer version committed elsewhere; True if anything changed."""
+        return False
+
+    # --- writing ---
+
+    def save(self, platform: str, df: pd.DataFrame) -> None:
+        """Replace a platform's table."""
+        parts = _split_by_month(df)
+        self._partitions[platform], self._cold[platform] = {}, {}
+        for key, part in parts.items():
+            self._set_partition(platform, key, part)
+        self._rebuild_index(platform)
+        self._persist_platform(platform, parts)
+        self._commit()
+
+    def upsert(self, platform: str, df: pd.DataFrame) -> Tuple[Dict[str, int], pd.DataFrame, pd.DataFrame]:
+        """Insert new post_ids and overwrite changed ones; leave identical rows alone.
+
+        Existing rows are located through the post_id index and only the
+        month partitions holding affected rows are rebuilt, so the cost grows
+        with the upload (and the months it touches), not with the history.
+
+        Returns (counts, removed, added): `removed` holds the previous
+        versions of updated rows and `added` every inserted/updated row, for
+        callers maintaining derived state such as rollups. Cold columns are
+        compared too, so they are loaded for the partitions holding matches.
+        """
+        if df.empty or 'post_id' not in df.columns:
+            return {"inserted": 0, "updated": 0, "unchanged": 0}, df.iloc[0:0], df.iloc[0:0]
+
+        # Copy the partition dicts: snapshots still hold the current ones
+        parts = dict(self._partitions.get(platform, {}))
+        self._partitions[platform] = parts
+        self._cold[platform] = dict(self._cold.get(platform, {}))
+        current = Snapshot(self.version, {platform: dict(parts)}, cold={platform: dict(self._cold[platform])})
+        index = self._index.setdefault(platform, {})
+        df = df.reset_index(drop=True)
+        ids = _id_text(df['post_id'])
+        new_keys = _month_keys(df).to_numpy()
+        old_keys = np.array([index.get(pid) for pid in ids.tolist()], dtype=object)
+        exists = old_keys != None  # noqa: E711 (elementwise)
+
+        # Compare updated candidates against their stored version, partition by partition
+        changed = ~exists
+        removed = []
+        for key in pd.unique(old_keys[exists]):
+            rows = np.flatnonzero(old_keys == key)
+            part = current.full_partition(platform, key)
+            positions = pd.Index(_id_text(part['post_id'])).get_indexer(ids.iloc[rows])
+            old_rows = part.iloc[positions]
+            differs = ~_same_values(old_rows, df.iloc[rows])
+            changed[rows[differs]] = True
+            removed.append(old_rows[differs])
+
+        counts = {
+            "inserted": int((~exists).sum()),
+            "updated": int((exists & changed).sum()),
+            "unchanged": int((exists & ~changed).sum())
+        }
+        added = df[changed]
+        removed = pd.concat(removed, ignore_index=True) if removed else df.iloc[0:0]
+        if added.empty:
+            return counts, removed, added
+
+        # Rebuild only the partitions that lose or gain rows
+        changed_ids = set(ids[changed].tolist())
+        touched = set(old_keys[changed & exists]) | set(new_keys[changed])
+        incoming = {key: part for key, part in added.groupby(new_keys[changed], sort=False)}
+        for key in touched:
+            frames = []
+            if key in parts:
+                part = current.full_partition(platform, key)
+                frames.append(part[~_id_text(part['post_id']).isin(changed_ids)])
+            if key in incoming:
+                frames.append(incoming[key])
+            merged = combine_frames(frames)
+            if merged.empty:
+                parts.pop(key, None)
+                self._cold[platform].pop(key, None)
+                self._persist_partition(platform, key, None)
+            else:
+                self._set_partition(platform, key, merged)
+                self._persist_partition(platform, key, merged)
+
+        for pid, key in zip(ids[changed].tolist(), new_keys[changed].tolist()):
+            index[pid] = key
+        self._partitions[platform] = dict(sorted(parts.items(), key=lambda kv: (kv[0] == UNDATED, kv[0])))
+        self._commit()
+        return counts, removed, added
+
+    def _set_partition(self, platform: str, key: str, part: pd.DataFrame) -> None:
+        """Store a full partition as its hot frame plus ColdColumns."""
+        hot, cold = ColdColumns.split(part)
+        self._partitions[platform][key] = hot
+        if cold is not None:
+            self._cold[platform][key] = cold
+        else:
+            self._cold[platform].pop(key, None)
+
+    def _rebuild_index(self, platform: str) -> None:
+        index = {}
+        for key, part in self._partitions.get(platform, {}).items():
+            if 'post_id' in part.columns:
+                index.update(dict.fromkeys(_id_text(part['post_id']).tolist(), key))
+        self._index[platform] = index
+
+    # --- reading ---
+
+    def snapshot(self, rollups: Optional[Dict[str, Any]] = None) -> Snapshot:
+        """The committed tables as an immutable Snapshot (O(platforms), no data copied)."""
+        return Snapshot(self.version, dict(self._partitions), rollups, dict(self._cold), self.lineage)
+
+    def load(self, platform: str, with_cold: bool = False) -> pd.DataFrame:
+        return self.snapshot().load(platform, with_cold)
+
+    def load_range(self, platform: str, start: datetime, end: datetime) -> pd.DataFrame:
+        return self.snapshot().load_range(platform, start, end)
+
+    def count(self, platform: str) -> int:
+        return self.snapshot().count(platform)
+
+    def clear(self) -> None:
+        self._partitions = {}
+        self._cold = {}
+        self._index = {}
+        self._commit()
+
+
+class DiskStore(MemoryStore):
+    """Platform tables persisted as <root>/<platform>/<YYYY-MM>.<version>/<column>.npy.
+
+    Numeric and datetime columns are memory-mapped on load, so a restart only
+    touches the pages a report actually reads, and worker processes opening
+    the same version share those pages. Text columns are kept as JSON lists
+    next to them; categorical columns as .npy codes plus a JSON list of categories.
+    Cold text columns are only parsed when a report first serializes rows of
+    their partition. Upserts rewrite only the partitions they touch.
+
+    Partition directories are immutable: a write puts changed partitions in
+    new directories and then atomically replaces <root>/MANIFEST.json, which
+    names the version and the directory of every partition. Other processes
+    notice the new manifest (`stale`) and `refresh` onto it. Directories
+    referenced by neither the current nor the previous manifest are removed.
+    """
+
+    def __init__(self, root: str):
+        super().__init__()
+        self.root = root
+        # platform -> {partition key -> directory name under <root>/<platform>}
+        self._dirs: Dict[str, Dict[str, str]] = {}
+        self._stamp: Optional[Tuple[int, int]] = None
+        os.makedirs(root, exist_ok=True)
+        self._load()
+
+    @property
+    def _manifest_path(self) -> str:
+        return os.path.join(self.root, MANIFEST_FILE)
+
+    def _manifest_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self._manifest_path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self._manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            pass
+        # Layout written before manifests existed: every <platform>/<key> directory, version 0
+        platforms = {}
+        for platform in sorted(os.listdir(self.root)):
+            base = os.path.join(self.root, platform)
+            if os.path.isdir(base) and not platform.startswith('.'):
+                platforms[platform] = {k: k for k in os.listdir(base) if not k.startswith('.') and '.' not in k}
+        return {"version": 0, "platforms": platforms}
+
+    def _load(self) -> None:
+        # A concurrent writer may remove a superseded directory between reading the manifest and opening it
+        for attempt in range(3):
+            stamp = self._manifest_stamp()
+            manifest = self._read_manifest()
+            try:
+                opened = {platform: self._open_platform(platform, dirs)
+                          for platform, dirs in manifest['platforms'].items()}
+                break
+            except FileNotFoundError:
+                if attempt == 2:
+                    raise
+        self.version = manifest['version']
+        # Shared by every process on this STORE_PATH; a wiped directory starts a new one on its first commit
+        self.lineage = manifest.get('lineage', '')
+        self._dirs = manifest['platforms']
+        self._partitions = {platform: hot for platform, (hot, _) in opened.items()}
+        self._cold = {platform: cold for platform, (_, cold) in opened.items()}
+        self._stamp = stamp
+        for platform in self._partitions:
+            self._rebuild_index(platform)
+
+    # --- cross-process coordination ---
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.root, '.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def stale(self) -> bool:
+        return self._manifest_stamp() != self._stamp
+
+    def refresh(self) -> bool:
+        if not self.stale():
+            return False
+        self._load()
+        return True
+
+    # --- writing ---
+
+    def _next_dir(self, key: str) -> str:
+        return f"{key}.{self.version + 1}"
+
+    def _persist_platform(self, platform: str, parts: Dict[str, pd.DataFrame]) -> None:
+        """Write every partition to new directories for the next version."""
+        base = os.path.join(self.root, platform)
+        os.makedirs(base, exist_ok=True)
+        dirs = {}
+        for key, part in parts.items():
+            dirs[key] = self._next_dir(key)
+            self._write_partition(base, dirs[key], part)
+        self._dirs[platform] = dirs
+        self._partitions[platform], self._cold[platform] = self._open_platform(platform, dirs)
+
+    def _persist_partition(self, platform: str, key: str, part: Optional[pd.DataFrame]) -> None:
+        dirs = self._dirs.setdefault(platform, {})
+        if part is None:
+            dirs.pop(key, None)
+            return
+        base = os.path.join(self.root, platform)
+        os.makedirs(base, exist_ok=True)
+        dirs[key] = self._next_dir(key)
+        self._write_partition(base, dirs[key], part)
+        hot, cold = self._open_partition(os.path.join(base, dirs[key]))
+        self._partitions[platform][key] = hot
+        if cold is not None:
+            self._cold[platform][key] = cold
+
+    def _write_partition(self, base: str, name: str, df: pd.DataFrame) -> None:
+        """Write into a hidden temp dir and rename it, so a crash never leaves a half-written partition."""
+        path = os.path.join(base, f".{name}.tmp")
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        columns = []
+        for i, col in enumerate(df.columns):
+            series = df[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                # Integer codes are memory-mapped like numbers; only the distinct values go to JSON
+                kind = 'category'
+                np.save(os.path.join(path, f"{i}.npy"), series.cat.codes.to_numpy())
+                with open(os.path.join(path, f"{i}.json"), 'w', encoding='utf-8') as f:
+                    json.dump(series.cat.categories.tolist(), f, ensure_ascii=False)
+            elif pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_dtype(series):
+                kind = 'npy'
+                np.save(os.path.join(path, f"{i}.npy"), series.to_numpy())
+            else:
+                kind = 'json'
+                values = series.astype(object).where(series.notna(), None).tolist()
+                with open(os.path.join(path, f"{i}.json"), 'w', encoding='utf-8') as f:
+                    json.dump(values, f, ensure_ascii=False)
+            columns.append({"name": col, "kind": kind})
+
+        with open(os.path.join(path, "_meta.json"), 'w', encoding='utf-8') as f:
+            json.dump({"rows": len(df), "columns": columns}, f)
+        final = os.path.join(base, name)
+        shutil.rmtree(final, ignore_errors=True)
+        os.rename(path, final)
+
+    def _commit(self) -> None:
+        """Publish the written partitions as the next version, then drop unreferenced directories."""
+        previous = self._read_manifest()['platforms']
+        super()._commit()
+        self.lineage = self.lineage or uuid.uuid4().hex
+        tmp = self._manifest_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"version": self.version, "lineage": self.lineage, "platforms": self._dirs}, f)
+        os.replace(tmp, self._manifest_path)
+        self._stamp = self._manifest_stamp()
+
+        # Readers still on the previous version may be opening its directories; keep those one more round
+        for platform in set(previous) | set(self._dirs):
+            base = os.path.join(self.root, platform)
+            if not os.path.isdir(base):
+                continue
+            keep = set(previous.get(platform, {}).values()) | set(self._dirs.get(platform, {}).values())
+            for name in os.listdir(base):
+                if name not in keep:
+                    # Pages already mapped by other processes stay valid after the unlink
+                    shutil.rmtree(os.path.join(base, name), ignore_errors=True)
+
+    # --- reading ---
+
+    def _open_platform(self, platform: str, dirs: Dict[str, str]
+                       ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, ColdColumns]]:
+        base = os.path.join(self.root, platform)
+        hot, cold = {}, {}
+        for key in sorted(dirs, key=lambda k: (k == UNDATED, k)):
+            hot[key], columns = self._open_partition(os.path.join(base, dirs[key]))
+            if columns is not None:
+                cold[key] = columns
+        return hot, cold
+
+    def _open_partition(self, path: str) -> Tuple[pd.DataFrame, Optional[ColdColumns]]:
+        """The hot columns (memory-mapped where numeric) and a lazy loader for the cold ones."""
+        with open(os.path.join(path, "_meta.json"), encoding='utf-8') as f:
+            meta = json.load(f)
+
+        data = {}
+        cold_files = {}
+        # Cold columns are looked up by post_id; a table without one keeps them hot
+        keyed = any(col['name'] == 'post_id' for col in meta['columns'])
+        for i, col in enumerate(meta['columns']):
+            if keyed and col['name'] in COLD_COLS and col['kind'] == 'json':
+                cold_files[col['name']] = os.path.join(path, f"{i}.json")
+            elif col['kind'] == 'npy':
+                data[col['name']] = np.load(os.path.join(path, f"{i}.npy"), mmap_mode='r')
+            elif col['kind'] == 'category':
+                with open(os.path.join(path, f"{i}.json"), encoding='utf-8') as f:
+                    categories = json.load(f)
+                codes = np.load(os.path.join(path, f"{i}.npy"), mmap_mode='r')
+                data[col['name']] = pd.Categorical.from_codes(codes, categories=categories)
+            else:
+                with open(os.path.join(path, f"{i}.json"), encoding='utf-8') as f:
+                    data[col['name']] = pd.Series(json.load(f), dtype='str')
+        # copy=False keeps the numeric columns backed by the memory maps
+        hot = pd.DataFrame(data, copy=False)
+        if not cold_files:
+            return hot, None
+
+        def load_cold() -> pd.DataFrame:
+            columns = {}
+            for name, file in cold_files.items():
+                with open(file, encoding='utf-8') as f:
+                    columns[name] = pd.Series(json.load(f), dtype='str')
+            return pd.DataFrame(columns).set_axis(pd.Index(hot['post_id']), axis=0)
+
+        disk_bytes = sum(os.path.getsize(file) for file in cold_files.values())
+        return hot, ColdColumns(loader=load_cold, disk_bytes=disk_bytes)
+
+    def clear(self) -> None:
+        self._dirs = {}
+        super().clear()
+
+
+def make_store(backend: str, path: Optional[str] = None) -> Union[MemoryStore, DiskStore]:
+    """Build the store named by STORE_BACKEND ('memory' or 'disk')."""
+    if backend == 'memory':
+        return MemoryStore()
+    if backend == 'disk':
+        return DiskStore(path or 'data')
+    raise ValueError(f"Unknown STORE_BACKEND '{backend}'. Expected 'memory' or 'disk'")
@@ -0,0 +1,322 @@
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import os
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+# Apps Script answers slowly and occasionally with 429/5xx; those (and network
+# errors) are retried with exponential backoff. Anything else is final.
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Sheet sections in the order the Apps Script writes them, with the field that identifies a row
+SYNC_SECTIONS = {
+    'instagram_posts': 'post_id',
+    'instagram_stories': 'post_id',
+    'facebook_posts': 'post_id',
+    'facebook_stories': 'date'
+}
+
+# Upper bound on the uncompressed JSON rows carried by one request
+DEFAULT_CHUNK_BYTES = 256 * 1024
+
+
+# --- PAYLOAD ASSEMBLY ---
+
+def build_sync_sections(report: Dict[str, Any], facebook_stories: List[Dict[str, Any]],
+                        post_reach: Optional[Dict[str, Any]] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Sheet rows for each section, taken from a generate_report result.
+
+    `post_reach` holds the reach the dashboard entered by hand, by post_id;
+    those posts are sent with it (and the engagement rate it implies).
+    """
+    post_reach = {str(post_id): int(reach or 0) for post_id, reach in (post_reach or {}).items()}
+
+    def edited(posts):
+        rows = []
+        for post in posts:
+            reach = post_reach.get(str(post.get('post_id')))
+            if reach is not None:
+                rate = post.get('total_engagement', 0) / reach if reach > 0 else 0.0
+                post = {**post, 'reach': reach, 'engagement_rate': rate}
+            rows.append(post)
+        return rows
+
+    return {
+        'instagram_posts': edited(report['instagram']['posts']),
+        'instagram_stories': report['stories']['data'],
+        'facebook_posts': edited(report['facebook']['posts']),
+        'facebook_stories': facebook_stories or []
+    }
+
+
+def build_overall_stats(report: Dict[str, Any], start_date: str, end_date: str,
+                        overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """'Overall Analysis' row; the dashboard may override the FB totals it edited by hand."""
+    aggregated = report['aggregated']
+    fb_reach = overrides.get('fb_total_reach') or aggregated['facebook']['total_reach']
+    fb_engagement = overrides.get('fb_total_engagement') or aggregated['facebook']['total_engagement']
+    return {
+        "date_range": f"{start_date} to {end_date}",
+        "total_reach": aggregated['instagram']['total_reach'] + fb_reach,
+        "total_engagement": aggregated['instagram']['total_engagement'] + fb_engagement,
+        "ig_followers": overrides.get('ig_followers', ''),
+        "fb_followers": overrides.get('fb_followers', '')
+    }
+
+
+def _row_key(section: str, row: Dict[str, Any]) -> str:
+    return str(row.get(SYNC_SECTIONS[section], ''))
+
+
+def _row_checksum(row: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(row, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+
+
+def section_checksums(sections: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Dict[str, str]]:
+    return {
+        name: {_row_key(name, row): _row_checksum(row) for row in rows}
+        for name, rows in sections.items()
+    }
+
+
+def delta_sections(sections: Dict[str, List[Dict[str, Any]]],
+                   previous: Dict[str, Dict[str, str]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Keep only rows that are new or whose checksum changed since `previous`."""
+    return {
+        name: [row for row in rows if previous.get(name, {}).get(_row_key(name, row)) != _row_checksum(row)]
+        for name, rows in sections.items()
+    }
+
+
+def removed_keys(sections: Dict[str, List[Dict[str, Any]]],
+                 previous: Dict[str, Dict[str, str]]) -> Dict[str, List[str]]:
+    """Row keys synced last time (per `previous`) that the sections no longer have."""
+    removed = {}
+    for name in SYNC_SECTIONS:
+        current = {_row_key(name, row) for row in sections.get(name, [])}
+        keys = [key for key in previous.get(name, {}) if key not in current]
+        if keys:
+            removed[name] = keys
+    return removed
+
+
+def plan_chunks(week_label: str, mode: str, sections: Dict[str, List[Dict[str, Any]]],
+                overall_stats: Optional[Dict[str, Any]], max_bytes: int = DEFAULT_CHUNK_BYTES,
+                removed: Optional[Dict[str, List[str]]] = None) -> List[Dict[str, Any]]:
+    """Split the rows into requests of at most ~max_bytes of JSON each.
+
+    Every section entry says whether it is the section's `first` chunk (the
+    script writes the header) and `last` (it writes the totals row). The
+    overall stats and the `removed` keys (rows the script deletes from the
+    week block) ride on the final chunk.
+    """
+    chunks: List[Dict[str, Any]] = []
+    current: Dict[str, Dict[str, Any]] = {}
+    size = 0
+
+    def flush():
+        nonlocal current, size
+        if current:
+            chunks.append({"sections": current})
+        current, size = {}, 0
+
+    for name in SYNC_SECTIONS:
+        rows = sections.get(name, [])
+        if not rows:
+            continue
+        for i, row in enumerate(rows):
+            row_size = len(json.dumps(row, ensure_ascii=False).encode('utf-8')) + 1
+            if size and size + row_size > max_bytes:
+                flush()
+            entry = current.setdefault(name, {"rows": [], "first": i == 0, "last": False})
+            entry["rows"].append(row)
+            size += row_size
+        current[name]["last"] = True
+
+    flush()
+    if overall_stats is not None or removed:
+        if not chunks:
+            chunks.append({"sections": {}})
+        if overall_stats is not None:
+            chunks[-1]["overall_stats"] = overall_stats
+        if removed:
+            chunks[-1]["removed"] = removed
+
+    sync_id = uuid.uuid4().hex
+    for i, chunk in enumerate(chunks):
+        chunk.update({"sync_id": sync_id, "week_label": week_label, "mode": mode,
+                      "chunk_index": i, "chunk_count": len(chunks)})
+    return chunks
+
+
+def chunk_checksums(chunk: Dict[str, Any]) -> Dict[str, Any]:
+    """Ledger entries for the rows (and overall stats) one plain chunk carries."""
+    checksums: Dict[str, Any] = section_checksums({name: entry["rows"] for name, entry in chunk["sections"].items()})
+    if "overall_stats" in chunk:
+        checksums['_overall'] = chunk["overall_stats"]
+    return checksums
+
+
+def encode_chunk(chunk: Dict[str, Any]) -> Dict[str, Any]:
+    """gzip + base64 envelope; the Apps Script unwraps it with Utilities.ungzip."""
+    raw = json.dumps(chunk, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return {"encoding": "gzip/base64", "data": base64.b64encode(gzip.compress(raw)).decode('ascii')}
+
+
+class SyncLedger:
+    """Per-week row checksums of the last successful sync, optionally persisted as JSON."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._weeks: Dict[str, Dict[str, Dict[str, str]]] = {}
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self._weeks = json.load(f)
+
+    def get(self, week_label: str) -> Optional[Dict[str, Dict[str, str]]]:
+        return self._weeks.get(week_label)
+
+    def commit(self, week_label: str, checksums: Dict[str, Dict[str, str]]) -> None:
+        self._weeks[week_label] = checksums
+        if self.path:
+            tmp = self.path + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._weeks, f)
+            os.replace(tmp, self.path)
+
+    def update(self, week_label: str, checksums: Dict[str, Any]) -> None:
+        """Record part of a sync (one accepted chunk) on top of the week's entry."""
+        week = dict(self._weeks.get(week_label) or {})
+        for name, value in checksums.items():
+            week[name] = {**week.get(name, {}), **value} if isinstance(value, dict) and name != '_overall' else value
+        self.commit(week_label, week)
+
+    def forget(self, week_label: str) -> None:
+        self._weeks.pop(week_label, None)
+
+
+class SheetSyncer:
+    """Runs Google Sheet syncs as background jobs over one pooled async client.
+
+    `submit` returns immediately with a job dict; the POSTs to the Apps Script
+    URL (one per chunk) happen on the event loop without blocking other
+    requests, and the job can be polled with `get` until its status is
+    'succeeded' or 'failed'.
+    """
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, retries: int = 3,
+                 backoff: float = 1.0, timeout: float = 60.0, max_jobs: int = 100):
+        self.client = client or httpx.AsyncClient(
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=10)
+        )
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def submit(self, script_url: str, chunks: List[Dict[str, Any]],
+               on_success: Optional[Callable[[], None]] = None,
+               on_chunk: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+        """Queue a job that POSTs each chunk in order.
+
+        `on_chunk(i)` runs as soon as chunk i was accepted, `on_success` once
+        all of them were.
+        """
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "queued",
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "finished_at": None,
+            "chunks_total": len(chunks),
+            "chunks_sent": 0,
+            "attempts": 0,
+            "result": None,
+            "error": None
+        }
+        self._jobs[job["job_id"]] = job
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+
+        task = asyncio.get_running_loop().create_task(self._run(job, script_url, chunks, on_success, on_chunk))
+        self._tasks[job["job_id"]] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job["job_id"], None))
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._jobs.get(job_id)
+
+    async def wait(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Await a job's completion (used by tests and shutdown)."""
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await task
+        return self.get(job_id)
+
+    async def close(self) -> None:
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await self.client.aclose()
+
+    async def _run(self, job: Dict[str, Any], script_url: str, chunks: List[Dict[str, Any]],
+                   on_success: Optional[Callable[[], None]],
+                   on_chunk: Optional[Callable[[int], None]]) -> None:
+        job["status"] = "running"
+        try:
+            result = {"status": "unchanged", "message": "Nothing changed since the last sync"}
+            for i, chunk in enumerate(chunks):
+                result = await self._post_with_retries(job, script_url, chunk)
+                # doPost reports its own failures as {"status": "error", "message": ...}
+                if isinstance(result, dict) and result.get("status") == "error":
+                    raise RuntimeError(f"Google Script error: {result.get('message')}")
+                job["chunks_sent"] += 1
+                if on_chunk is not None:
+                    on_chunk(i)
+            job["result"] = result
+            if on_success is not None:
+                on_success()
+            job["status"] = "succeeded"
+        except Exception as e:
+            job["error"] = str(e)
+            job["status"] = "failed"
+        finally:
+            job["finished_at"] = datetime.now(timezone.utc).isoformat()
+
+    async def _post_with_retries(self, job: Dict[str, Any], script_url: str, payload: Dict[str, Any]) -> Any:
+        # A retry resends the same sync_id/chunk_index: doPost skips chunks it already applied,
+        # so a timeout or 5xx after the rows were written does not write them twice
+        for attempt in range(self.retries + 1):
+            job["attempts"] += 1
+            last = attempt == self.retries
+            try:
+                # httpx timeouts are per read/connect; wait_for caps the whole attempt
+                response = await asyncio.wait_for(self.client.post(script_url, json=payload), self.timeout)
+            except (httpx.TimeoutException, asyncio.TimeoutError):
+                if last:
+                    raise RuntimeError("Request to Google Timed Out. The script might be running but taking too long.")
+            except httpx.TransportError as e:
+                if last:
+                    raise RuntimeError(f"Could not reach Google Script: {str(e)}")
+            else:
+                if response.status_code not in RETRY_STATUS or last:
+                    return self._parse(response)
+            await asyncio.sleep(self.backoff * (2 ** attempt))
+
+    def _parse(self, response: httpx.Response) -> Any:
+        try:
+            return response.json()
+        except ValueError:
+            # If Google returns HTML (Sign-in page? Error page?), show it.
+            raise RuntimeError(
+                f"Google Script returned Invalid JSON. Code: {response.status_code}. Content: {response.text[:500]}..."
+            )
@@ -0,0 +1,189 @@
+import os
+import re
+import shutil
+import threading
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from rollup import DailyRollup
+from store import MANIFEST_FILE, Snapshot, make_store
+from sync import SyncLedger
+
+# --- ACCOUNT WORKSPACES ---
+# Each brand ("account") gets its own store, rollups, sync ledger and dataset
+# version. Requests name the account they act on, so uploads, reports and
+# syncs for one brand never read or rewrite another brand's rows, and their
+# cost does not grow with the number of tenants. With the disk backend every
+# workspace lives in its own directory: <STORE_PATH>/<account>/<platform>/...
+#
+# Readers never lock: a request pins `workspace.snapshot()` once and reads all
+# platforms (and rollups) from it. Writers build the next version under a lock
+# and publish it by swapping a single reference. With the disk backend the
+# version lives in the store's manifest, so several uvicorn workers pointed at
+# one STORE_PATH serialize their writes and pick up each other's uploads.
+
+DEFAULT_ACCOUNT = 'default'
+
+# Account names double as directory names
+ACCOUNT_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$')
+
+LEDGER_FILE = 'sync_ledger.json'
+
+
+def validate_account(name: str) -> str:
+    if not ACCOUNT_PATTERN.match(name or ''):
+        raise ValueError(f"Invalid account '{name}'. Use 1-64 letters, digits, '.', '_' or '-'")
+    return name
+
+
+class Workspace:
+    """One account's platform tables plus the state derived from them."""
+
+    def __init__(self, name: str, backend: str, path: Optional[str], platforms: List[str]):
+        self.name = name
+        self.platforms = platforms
+        self.store = make_store(backend, path)
+        self.ledger = SyncLedger(os.path.join(path, LEDGER_FILE) if backend == 'disk' else None)
+        self._write_lock = threading.Lock()
+        self._snapshot = self._rebuild()
+
+    def _rebuild(self) -> Snapshot:
+        """Snapshot of the store's current version with rollups built from scratch."""
+        rollups = {platform: DailyRollup.build(self.store.load(platform)) for platform in self.platforms}
+        return self.store.snapshot(rollups)
+
+    def snapshot(self) -> Snapshot:
+        """The latest published version. Pin it once per request and read only from it."""
+        # Another worker committed: reload, unless a local writer holds the lock (it refreshes first anyway)
+        if self.store.stale() and self._write_lock.acquire(blocking=False):
+            try:
+                if self.store.refresh():
+                    self._snapshot = self._rebuild()
+            finally:
+                self._write_lock.release()
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        return self.snapshot().version
+
+    def write(self, platform: str, df: pd.DataFrame, mode: str) -> Dict[str, int]:
+        """Replace (mode='replace') or upsert a platform table and publish the next version.
+
+        Readers keep using the snapshot they pinned until this returns; the
+        rollup being updated is a copy, never the one a snapshot holds.
+        """
+        with self._write_lock, self.store.exclusive():
+            if self.store.refresh():
+                self._snapshot = self._rebuild()
+            rollups = dict(self._snapshot.rollups)
+            if mode == 'replace':
+                self.store.save(platform, df)
+                rollups[platform] = DailyRollup.build(df)
+                counts = {"inserted": len(df), "updated": 0, "unchanged": 0}
+            else:
+                counts, removed, added = self.store.upsert(platform, df)
+                rollup = rollups[platform].copy()
+                rollup.add(removed, sign=-1)
+                rollup.add(added)
+                rollups[platform] = rollup
+            self._snapshot = self.store.snapshot(rollups)
+        return counts
+
+    def write_table(self, name: str, update: Callable[[pd.DataFrame], pd.DataFrame]) -> pd.DataFrame:
+        """Replace an auxiliary table (not one of the report platforms) with update(current).
+
+        Runs under the write lock against the latest version, so concurrent
+        read-modify-write uploads never lose each other's rows.
+        """
+        with self._write_lock, self.store.exclusive():
+            if self.store.refresh():
+                self._snapshot = self._rebuild()
+            table = update(self._snapshot.load(name))
+            self.store.save(name, table)
+            self._snapshot = self.store.snapshot(self._snapshot.rollups)
+        return table
+
+    def clear(self) -> None:
+        with self._write_lock, self.store.exclusive():
+            self.store.clear()
+            self._snapshot = self.store.snapshot({platform: DailyRollup() for platform in self.platforms})
+
+    def profiles(self) -> List[Dict[str, str]]:
+        """Distinct (platform, account_id, account_name) found in the uploaded exports."""
+        snapshot = self.snapshot()
+        found = []
+        for platform in self.platforms:
+            df = snapshot.load(platform)
+            if df.empty or 'account_id' not in df.columns:
+                continue
+            cols = ['account_id'] + (['account_name'] if 'account_name' in df.columns else [])
+            # Categorical columns: dedup on the codes, then back to plain strings
+            for rec in df[cols].drop_duplicates().astype(object).fillna('').to_dict('records'):
+                found.append({"platform": platform, "account_id": rec['account_id'],
+                              "account_name": rec.get('account_name', '')})
+        return found
+
+
+class WorkspaceRegistry:
+    """Account name -> Workspace, opened from disk at startup and created on first upload."""
+
+    def __init__(self, backend: str, path: Optional[str], platforms: List[str]):
+        self.backend = backend
+        self.root = path or 'data'
+        self.platforms = platforms
+        self._workspaces: Dict[str, Workspace] = {}
+        self._lock = threading.Lock()
+
+        if backend == 'disk':
+            os.makedirs(self.root, exist_ok=True)
+            self._migrate_single_tenant()
+            self._discover()
+        self.get(DEFAULT_ACCOUNT, create=True)
+
+    def _discover(self) -> None:
+        """Open workspaces found on disk that this process has not seen (e.g. created by another worker)."""
+        if self.backend != 'disk':
+            return
+        for name in sorted(os.listdir(self.root)):
+            if (name not in self._workspaces and name not in self.platforms and ACCOUNT_PATTERN.match(name)
+                    and os.path.isdir(os.path.join(self.root, name))):
+                with self._lock:
+                    if name not in self._workspaces:
+                        self._open(name)
+
+    def _migrate_single_tenant(self) -> None:
+        """Move a pre-workspace layout (<root>/<platform>, <root>/sync_ledger.json) into 'default'."""
+        legacy = [name for name in self.platforms + [LEDGER_FILE, MANIFEST_FILE] if os.path.exists(os.path.join(self.root, name))]
+        if not legacy:
+            return
+        target = os.path.join(self.root, DEFAULT_ACCOUNT)
+        os.makedirs(target, exist_ok=True)
+        for name in legacy:
+            shutil.move(os.path.join(self.root, name), os.path.join(target, name))
+
+    def _open(self, name: str) -> Workspace:
+        path = os.path.join(self.root, name) if self.backend == 'disk' else None
+        workspace = Workspace(name, self.backend, path, self.platforms)
+        self._workspaces[name] = workspace
+        return workspace
+
+    def get(self, name: str, create: bool = False) -> Optional[Workspace]:
+        """Workspace for `name`; with create=True a missing one is opened empty."""
+        validate_account(name)
+        if name in self.platforms:
+            # Would be mistaken for a single-tenant platform directory on disk
+            raise ValueError(f"Invalid account '{name}'. Platform names are reserved")
+        workspace = self._workspaces.get(name)
+        if workspace is None and self.backend == 'disk' and os.path.isdir(os.path.join(self.root, name)):
+            self._discover()
+            workspace = self._workspaces.get(name)
+        if workspace is None and create:
+            with self._lock:
+                workspace = self._workspaces.get(name) or self._open(name)
+        return workspace
+
+    def names(self) -> List[str]:
+        self._discover()
+        return sorted(self._workspaces)
@@ -0,0 +1,171 @@
+"""Benchmark: per-stage engine timings on synthetic exports, checked against a JSON baseline.
+
+Generates the four Meta exports with synth.py, then times every stage a
+report goes through, summed over the platforms:
+
+    parse      _read_csv of each file (C parser, schema columns only)
+    clean      normalize() in UPLOAD_CHUNK_ROWS chunks with one FileConverter, as ingest_stream does
+    dedup      combine() across the chunks (post_id / (post_id, date) dedup + time sort)
+    filter     slice_range() of a one-month window
+    aggregate  DailyRollup.build() of each table, window totals and the daily time series
+    rank       _get_rankings() of the window and a top-10 leaderboard of the table
+    serialize  post/story lists of the window encoded with dumps_report()
+
+Each stage keeps its best of --repeat runs. With --save-baseline the result
+is written to benchmarks/baselines/engine-<rows>.json; otherwise it is
+compared with that file and the run exits 1 if any stage is slower than
+baseline * (1 + --threshold) (stages under --min-delta seconds apart are
+ignored as noise). Record baselines on the machine that runs the check.
+
+Usage (from the repo root):
+    python benchmarks/bench_engine.py --rows 100000 --save-baseline
+    python benchmarks/bench_engine.py --rows 100000 --threshold 0.25
+"""
+import argparse
+import json
+import os
+import platform as host
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '..', 'backend'))
+sys.path.append(HERE)
+from convert import FileConverter
+from daily import compact_daily, time_series
+from engine import AnalyticsEngine, DEFAULT_CHUNK_ROWS, dumps_report
+from rollup import DailyRollup
+from synth import EXPORTS, write_exports
+
+STAGES = ['parse', 'clean', 'dedup', 'filter', 'aggregate', 'rank', 'serialize']
+POST_PLATFORMS = ['facebook', 'instagram', 'stories']
+
+# One month in the middle of the synthetic year
+WINDOW = (datetime(2025, 6, 1), datetime(2025, 6, 30, 23, 59, 59))
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def run_stages(paths, repeat, chunk_rows=DEFAULT_CHUNK_ROWS):
+    engine = AnalyticsEngine()
+    timings = dict.fromkeys(STAGES, 0.0)
+
+    def add(stage, fn):
+        elapsed, result = best_of(fn, repeat)
+        timings[stage] += elapsed
+        return result
+
+    def clean(kind, raw):
+        converter = FileConverter()
+        return [engine.normalize(kind, raw.iloc[i:i + chunk_rows].copy(), converter)
+                for i in range(0, len(raw), chunk_rows)]
+
+    tables, windows = {}, {}
+    for kind, path in paths.items():
+        raw = add('parse', lambda: engine._read_csv(kind, path))
+        parts = add('clean', lambda: clean(kind, raw))
+        tables[kind] = add('dedup', lambda: engine.combine(parts, kind))
+
+    for kind in POST_PLATFORMS:
+        table = tables[kind]
+        windows[kind] = add('filter', lambda: engine.slice_range(table, *WINDOW))
+        add('aggregate', lambda: (DailyRollup.build(table), engine._totals(windows[kind])))
+
+    daily = compact_daily(tables['facebook_daily'])
+    add('aggregate', lambda: time_series(daily, window=7))
+
+    for kind in ['facebook', 'instagram']:
+        add('rank', lambda: (engine._get_rankings(windows[kind]), engine.leaderboard(tables[kind], 'reach', 10)))
+
+    add('serialize', lambda: dumps_report({
+        "facebook": engine._df_to_post_list(windows['facebook']),
+        "instagram": engine._df_to_post_list(windows['instagram']),
+        "stories": engine._story_df_to_list(windows['stories'])
+    }))
+    return timings, {kind: len(table) for kind, table in tables.items()}
+
+
+def compare(current, baseline, threshold, min_delta):
+    """Stages slower than baseline * (1 + threshold), as (stage, baseline, current)."""
+    return [
+        (stage, baseline[stage], current[stage])
+        for stage in STAGES
+        if stage in baseline
+        and current[stage] > baseline[stage] * (1 + threshold)
+        and current[stage] - baseline[stage] > min_delta
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100_000, help='rows per export (10k .. 10M)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', help='reuse/keep generated exports here instead of a temp dir')
+    parser.add_argument('--baseline', help='baseline JSON (default: benchmarks/baselines/engine-<rows>.json)')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown per stage (0.25 = 25%%)')
+    parser.add_argument('--min-delta', type=float, default=0.005, help='ignore differences below this many seconds')
+    args = parser.parse_args()
+
+    baseline_path = args.baseline or os.path.join(HERE, 'baselines', f'engine-{args.rows}.json')
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or tmp
+        names = {kind: os.path.join(data_dir, name) for kind, (name, _) in EXPORTS.items()}
+        if not all(os.path.exists(p) for p in names.values()):
+            write_exports(data_dir, args.rows, args.seed)
+        timings, rows = run_stages(names, args.repeat)
+
+    result = {
+        "rows": args.rows,
+        "seed": args.seed,
+        "table_rows": rows,
+        "python": host.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "stages": {stage: round(seconds, 6) for stage, seconds in timings.items()}
+    }
+
+    print(f"rows per export: {args.rows:,}")
+    baseline = None
+    if not args.save_baseline and os.path.exists(baseline_path):
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)['stages']
+    for stage in STAGES:
+        line = f"{stage:<10}{timings[stage] * 1000:>12.1f}ms"
+        if baseline and stage in baseline:
+            line += f"{baseline[stage] * 1000:>12.1f}ms{timings[stage] / max(baseline[stage], 1e-9):>8.2f}x"
+        print(line)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+            f.write('\n')
+        print(f"baseline written to {baseline_path}")
+        return 0
+    if baseline is None:
+        print(f"no baseline at {baseline_path}; run with --save-baseline first")
+        return 0
+
+    regressions = compare(result['stages'], baseline, args.threshold, args.min_delta)
+    for stage, before, after in regressions:
+        print(f"REGRESSION {stage}: {before * 1000:.1f}ms -> {after * 1000:.1f}ms (> {args.threshold:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Benchmark: the streamed XLSX writer vs openpyxl's write-only mode on the same sheets.
+
+Usage (from the repo root):
+    python benchmarks/bench_export.py --rows 200000
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from bench_serialize import make_posts, make_stories
+from export import SHEET_LAYOUTS, iter_xlsx, table_sheet
+
+
+# --- Reference implementation (openpyxl write-only), kept for comparison ---
+
+def openpyxl_xlsx(sheets):
+    """Same cells and styles through openpyxl; bytes only exist once save() has run after the last row."""
+    book = openpyxl.Workbook(write_only=True)
+    bold = Font(bold=True)
+    for sheet in sheets:
+        ws = book.create_sheet(sheet.name)
+        header = []
+        for value in sheet.headers:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.font, cell.fill = bold, PatternFill('solid', fgColor='FFFF9900')
+            header.append(cell)
+        ws.append(header)
+        number = 2
+        for columns in sheet.batches:
+            values = [col.tolist() if isinstance(col, np.ndarray) else [v or None for v in col] for col in columns]
+            for row in zip(*values):
+                ws.append(row)
+            number += len(columns[0])
+        totals = []
+        for i, value in enumerate(sheet.totals()):
+            if not isinstance(value, str):
+                col = get_column_letter(i + 1)
+                value = f'=SUM({col}2:{col}{number - 1})'
+            cell = WriteOnlyCell(ws, value=value)
+            cell.font, cell.fill = bold, PatternFill('solid', fgColor='FFEEEEEE')
+            totals.append(cell)
+        ws.append(totals)
+    with tempfile.TemporaryFile() as f:
+        book.save(f)
+        f.seek(0)
+        yield f.read()
+
+
+def timed(make_body):
+    """(seconds to the first chunk, seconds to the last, bytes)."""
+    t0 = time.perf_counter()
+    first, size = None, 0
+    for chunk in make_body():
+        first = first if first is not None else time.perf_counter() - t0
+        size += len(chunk)
+    return first, time.perf_counter() - t0, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=200_000, help='rows per table')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    posts = make_posts(args.rows, rng).assign(link_clicks=lambda df: df['shares'] // 3)
+    tables = {'instagram': posts, 'facebook': posts, 'stories': make_stories(args.rows, rng)}
+
+    def sheets():
+        return [table_sheet(layout, tables[layout['platform']], 'wk') for layout in SHEET_LAYOUTS.values()]
+
+    ours = timed(lambda: iter_xlsx(sheets()))
+    theirs = timed(lambda: openpyxl_xlsx(sheets()))
+
+    # Both files hold the same cells
+    a = openpyxl.load_workbook(io.BytesIO(b''.join(iter_xlsx(sheets()))), read_only=True)
+    b = openpyxl.load_workbook(io.BytesIO(b''.join(openpyxl_xlsx(sheets()))), read_only=True)
+    for name in a.sheetnames:
+        assert list(a[name].iter_rows(max_row=50, values_only=True)) == \
+            list(b[name].iter_rows(max_row=50, values_only=True)), name
+
+    print(f"rows per table    : {args.rows:,} ({len(tables)} sheets)")
+    print(f"                    first byte    total      size")
+    print(f"streamed writer   : {ours[0]:8.3f}s {ours[1]:8.3f}s {ours[2] / 1e6:7.1f} MB")
+    print(f"openpyxl write-only: {theirs[0]:7.3f}s {theirs[1]:8.3f}s {theirs[2] / 1e6:7.1f} MB")
+    print(f"speedup           : {theirs[1] / ours[1]:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark: boolean-mask date filter vs binary-search slice on a sorted table.
+
+Usage (from the repo root):
+    python benchmarks/bench_filter.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from engine import AnalyticsEngine
+
+
+def legacy_filter(df, start_date, end_date):
+    mask = (df['publish_time'] >= start_date) & (df['publish_time'] <= end_date)
+    return df.loc[mask].copy()
+
+
+def make_table(n, rng):
+    # ~3 years of history at minute resolution
+    start = np.datetime64('2023-01-01T00:00')
+    df = pd.DataFrame({
+        'post_id': np.arange(n).astype(str),
+        'publish_time': pd.to_datetime(start + rng.integers(0, 3 * 365 * 24 * 60, n).astype('timedelta64[m]')),
+    })
+    for col in ['reach', 'views', 'likes', 'comments', 'shares', 'saves']:
+        df[col] = rng.integers(0, 50_000, n)
+    return df
+
+
+def timed(fn, *args, repeat=5):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    engine = AnalyticsEngine()
+    table = engine.combine([make_table(args.rows, np.random.default_rng(7))])
+
+    windows = {
+        'week': (datetime(2025, 6, 2), datetime(2025, 6, 8, 23, 59, 59)),
+        'month': (datetime(2025, 6, 1), datetime(2025, 6, 30, 23, 59, 59)),
+        'year': (datetime(2025, 1, 1), datetime(2025, 12, 31, 23, 59, 59)),
+    }
+
+    print(f"rows: {args.rows:,}")
+    print(f"{'window':<8}{'matched':>10}{'mask+copy':>14}{'slice':>12}{'speedup':>10}")
+    for name, (start, end) in windows.items():
+        old_t, old_out = timed(legacy_filter, table, start, end, repeat=args.repeat)
+        new_t, new_out = timed(engine.slice_range, table, start, end, repeat=args.repeat)
+        assert old_out.equals(new_out), f"{name}: filters disagree"
+        print(f"{name:<8}{len(new_out):>10,}{old_t * 1000:>12.2f}ms{new_t * 1000:>10.3f}ms{old_t / new_t:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
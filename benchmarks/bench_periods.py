@@ -0,0 +1,82 @@
+"""Benchmark: one /report-style call per period vs a single grouped pass for all periods.
+
+Compares the stats/particulars the batch endpoint returns against a loop of
+generate_report calls (the old "one request per week" deck workflow), with
+and without rollups, as the number of daily periods grows.
+
+Usage (from the repo root):
+    python benchmarks/bench_periods.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from engine import AnalyticsEngine, period_buckets
+from rollup import DailyRollup
+
+
+def make_table(n, rng):
+    # ~3 years of history at minute resolution
+    start = np.datetime64('2023-01-01T00:00')
+    df = pd.DataFrame({
+        'post_id': np.arange(n).astype(str),
+        'publish_time': pd.to_datetime(start + rng.integers(0, 3 * 365 * 24 * 60, n).astype('timedelta64[m]')),
+    })
+    for col in ['reach', 'views', 'likes', 'comments', 'shares', 'saves', 'follows']:
+        df[col] = rng.integers(0, 50_000, n)
+    df['total_engagement'] = df[['likes', 'comments', 'shares', 'saves']].sum(axis=1)
+    return df
+
+
+def per_call(engine, tables, periods, rollups):
+    return [
+        engine.generate_report(tables['facebook'], tables['instagram'], tables['stories'], start, end, rollups=rollups)
+        for start, end in periods
+    ]
+
+
+def batch(engine, tables, periods, rollups):
+    return engine.generate_period_reports(tables['facebook'], tables['instagram'], tables['stories'], periods, rollups=rollups)
+
+
+def timed(fn, *args, repeat=3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000, help='rows per platform table')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    engine = AnalyticsEngine()
+    rng = np.random.default_rng(7)
+    tables = {platform: engine.combine([make_table(args.rows, rng)]) for platform in ['facebook', 'instagram', 'stories']}
+    rollups = {platform: DailyRollup.build(df) for platform, df in tables.items()}
+
+    print(f"rows per platform: {args.rows:,}")
+    print(f"{'periods':>8}{'rollups':>9}{'per-call':>14}{'batch':>12}{'speedup':>10}")
+    for days in [7, 31, 91, 365]:
+        periods = period_buckets(datetime(2025, 1, 1), datetime(2025, 1, 1) + pd.Timedelta(days=days - 1), 'day')
+        for label, use_rollups in (('no', None), ('yes', rollups)):
+            old_t, old_out = timed(per_call, engine, tables, periods, use_rollups, repeat=args.repeat)
+            new_t, new_out = timed(batch, engine, tables, periods, use_rollups, repeat=args.repeat)
+            for want, got in zip(old_out, new_out):
+                assert want['aggregated'] == got['aggregated'], f"{days} periods: particulars disagree"
+            print(f"{len(periods):>8}{label:>9}{old_t * 1000:>12.1f}ms{new_t * 1000:>10.2f}ms{old_t / new_t:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Benchmark: columnar post/story serialization vs the old iterrows loop.
+
+Usage (from the repo root):
+    python benchmarks/bench_serialize.py --rows 100000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from engine import AnalyticsEngine, dumps_report
+
+
+# --- Reference implementation (pre-columnar), kept for comparison ---
+
+def legacy_post_list(df):
+    posts = []
+    for _, row in df.iterrows():
+        posts.append({
+            "post_id": row['post_id'],
+            "publish_time": row['publish_time'].strftime('%Y-%m-%d %H:%M') if pd.notna(row['publish_time']) else '',
+            "post_type": row.get('post_type', ''),
+            "reach": int(row['reach']),
+            "views": int(row['views']),
+            "likes": int(row['likes']),
+            "comments": int(row['comments']),
+            "shares": int(row['shares']),
+            "saves": int(row.get('saves', 0)),
+            "follows": int(row.get('follows', 0)),
+            "total_engagement": int(row['total_engagement']),
+            "engagement_rate": float(row.get('engagement_rate_reach', 0)),
+            "permalink": row.get('permalink', ''),
+            "description": str(row.get('description', ''))[:50] if pd.notna(row.get('description')) else ""
+        })
+    return posts
+
+
+def legacy_story_list(df):
+    stories = []
+    for _, row in df.iterrows():
+        stories.append({
+            "post_id": row['post_id'],
+            "publish_time": row['publish_time'].strftime('%Y-%m-%d %H:%M') if pd.notna(row['publish_time']) else '',
+            "reach": int(row['reach']),
+            "views": int(row['views']),
+            "likes": int(row.get('likes', 0)),
+            "shares": int(row.get('shares', 0)),
+            "replies": int(row.get('replies', 0)),
+            "link_clicks": int(row.get('link_clicks', 0)),
+            "profile_visits": int(row.get('profile_visits', 0)),
+            "follows": int(row.get('follows', 0)),
+            "sticker_taps": int(row.get('sticker_taps', 0)),
+            "permalink": row.get('permalink', '')
+        })
+    return stories
+
+
+def make_posts(n, rng):
+    start = np.datetime64('2026-01-01T00:00')
+    df = pd.DataFrame({
+        'post_id': [str(17_000_000_000_000_000 + i) for i in range(n)],
+        'publish_time': pd.to_datetime(start + rng.integers(0, 90 * 24 * 60, n).astype('timedelta64[m]')),
+        'post_type': rng.choice(['IG reel', 'IG carousel', 'IG image'], n),
+        'permalink': [f'https://www.instagram.com/reel/{i:011d}/' for i in range(n)],
+        'description': rng.choice(['Short caption', 'A much longer caption that runs well past the fifty character cut-off', None], n),
+    })
+    for col in ['reach', 'views', 'likes', 'comments', 'shares', 'saves', 'follows']:
+        df[col] = rng.integers(0, 50_000, n)
+    df['total_engagement'] = df['likes'] + df['comments'] + df['shares'] + df['saves']
+    df['engagement_rate_reach'] = df['total_engagement'] / df['reach'].clip(lower=1)
+    return df
+
+
+def make_stories(n, rng):
+    df = make_posts(n, rng).drop(columns=['post_type', 'description', 'comments', 'saves'])
+    for col in ['replies', 'link_clicks', 'profile_visits', 'sticker_taps']:
+        df[col] = rng.integers(0, 500, n)
+    return df
+
+
+def timed(fn, *args, repeat=3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    engine = AnalyticsEngine()
+    posts = make_posts(args.rows, rng)
+    stories = make_stories(args.rows, rng)
+
+    def old_body(p, s):
+        return json.dumps({"posts": legacy_post_list(p), "data": legacy_story_list(s)}).encode('utf-8')
+
+    def new_body(p, s):
+        return dumps_report({"posts": engine._df_to_post_list(p), "data": engine._story_df_to_list(s)})
+
+    old_t, old_out = timed(old_body, posts, stories, repeat=args.repeat)
+    new_t, new_out = timed(new_body, posts, stories, repeat=args.repeat)
+
+    assert json.loads(old_out) == json.loads(new_out), "serializers disagree"
+
+    print(f"rows per table : {args.rows:,}")
+    print(f"iterrows       : {old_t:8.3f}s")
+    print(f"columnar       : {new_t:8.3f}s")
+    print(f"speedup        : {old_t / new_t:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
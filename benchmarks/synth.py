@@ -0,0 +1,217 @@
+"""Deterministic synthetic Meta exports for tests and benchmarks.
+
+Writes CSVs with the same headers as the real Business Suite exports
+(facebook.csv, instagarm.csv, instagarm story.csv, facebook daily.csv) and
+their quirks: UTF-8 BOM, quoted multi-line descriptions with commas and
+quotes, thousands separators ("12,345"), blank cells, "Lifetime" dates and
+re-exported (duplicate) Post IDs. The same (kind, rows, seed) always
+produces byte-identical files. Rows are written in chunks, so 10M-row files
+need no more memory than 100k-row ones.
+
+Usage (from the repo root):
+    python benchmarks/synth.py --rows 1000000 --out /tmp/meta-exports
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+FB_POST_HEADER = [
+    'Post ID', 'Page ID', 'Page name', 'Title', 'Description', 'Duration (sec)', 'Publish time', 'Caption type',
+    'Permalink', 'Is crosspost', 'Is share', 'Post type', 'Languages', 'Custom labels', 'Funded content status',
+    'Data comment', 'Date', 'Views', 'Reach', 'Reactions, comments and shares', 'Reactions', 'Comments', 'Shares',
+    'Seconds viewed', 'Average Seconds viewed', 'Estimated earnings (USD)', 'Ad CPM (USD)', 'Ad impressions',
+    'Total clicks', 'Other clicks', 'Link clicks', 'Matched audience targeting consumption (Photo Click)',
+    'Negative feedback from users: Hide'
+]
+
+IG_POST_HEADER = [
+    'Post ID', 'Account ID', 'Account username', 'Account name', 'Description', 'Duration (sec)', 'Publish time',
+    'Permalink', 'Post type', 'Data comment', 'Date', 'Views', 'Reach', 'Likes', 'Shares', 'Follows', 'Comments', 'Saves'
+]
+
+IG_STORY_HEADER = [
+    'Post ID', 'Account ID', 'Account username', 'Account name', 'Description', 'Duration (sec)', 'Publish time',
+    'Permalink', 'Post type', 'Data comment', 'Date', 'Views', 'Reach', 'Likes', 'Shares', 'Profile visits',
+    'Replies', 'Link clicks', 'Sticker taps', 'Navigation', 'Follows'
+]
+
+FB_DAILY_HEADER = [
+    'Post ID', 'Page ID', 'Page name', 'Title', 'Description', 'Duration (sec)', 'Publish time', 'Caption type',
+    'Permalink', 'Is crosspost', 'Is share', 'Post type', 'Languages', 'Custom labels', 'Funded content status',
+    'Data comment', 'Date', 'Reactions, comments and shares', 'Reactions', 'Comments', 'Shares', 'Seconds viewed',
+    'Average Seconds viewed', 'Estimated earnings (USD)', 'Ad CPM (USD)', 'Ad impressions'
+]
+
+# kind -> (file name, header); kinds match the engine's platform schemas
+EXPORTS = {
+    'facebook': ('facebook.csv', FB_POST_HEADER),
+    'instagram': ('instagram.csv', IG_POST_HEADER),
+    'stories': ('instagram story.csv', IG_STORY_HEADER),
+    'facebook_daily': ('facebook daily.csv', FB_DAILY_HEADER),
+}
+
+DESCRIPTIONS = [
+    'Rich earth tones. Clean silhouettes. Activewear, redefined for Men.\nNuoflexx by Westside.\n\n'
+    'Shop now from a Westside store near you or at www.westside.com.',
+    'On set, in motion. Your sign to become a YNG Model.',
+    'Valentine’s Day Gift Challenge\U0001F92D\nTag someone who\'d say "yes" to this, and tell us why!',
+    'New drop ✨ Sizes XS–XXL, 3 colours, 1 fit.',
+    '',
+]
+
+POST_TYPES = {
+    'facebook': ['Videos', 'Photos', 'Links'],
+    'instagram': ['IG reel', 'IG carousel', 'IG image'],
+    'stories': ['IG story'],
+    'facebook_daily': ['Videos', 'Photos'],
+}
+
+# Days of history publish times are spread over, from START
+START = np.datetime64('2025-01-01T00:00')
+SPAN_DAYS = 365
+# Days per post in the daily export
+DAILY_DAYS = 7
+# Share of rows that repeat an earlier Post ID (re-exported posts), get blank metrics, or use "1,234" formatting
+DUPLICATE_RATE = 0.02
+BLANK_RATE = 0.03
+THOUSANDS_RATE = 0.3
+
+CHUNK_ROWS = 100_000
+
+
+def _counts(rng, n, scale):
+    """Long-tailed non-negative counts."""
+    return np.rint(rng.lognormal(np.log(scale), 1.2, n)).astype('int64')
+
+
+def _numbers(rng, values):
+    """Counts as CSV text: some with thousands separators, some blank."""
+    text = values.astype(str).astype(object)
+    big = np.flatnonzero((values >= 1000) & (rng.random(len(values)) < THOUSANDS_RATE))
+    text[big] = [f"{v:,}" for v in values[big]]
+    text[rng.random(len(values)) < BLANK_RATE] = ''
+    return text
+
+
+def _times(minutes):
+    return pd.DatetimeIndex(START + minutes.astype('timedelta64[m]')).strftime('%m/%d/%Y %H:%M')
+
+
+def _chunk(kind, rng, first, n):
+    """Rows first..first+n of one export as a frame of CSV-ready strings."""
+    header = EXPORTS[kind][1]
+    if kind == 'facebook_daily':
+        post_index = (first + np.arange(n)) // DAILY_DAYS
+        day_offset = (first + np.arange(n)) % DAILY_DAYS
+    else:
+        post_index = first + np.arange(n)
+        # Re-exported rows point back at an earlier post of the same chunk
+        dup = np.flatnonzero(rng.random(n) < DUPLICATE_RATE)
+        post_index[dup] = first + rng.integers(0, np.maximum(dup, 1))
+
+    # Per-post attributes derive from the post index, so duplicates and daily rows agree
+    minutes = (post_index * 7919) % (SPAN_DAYS * 24 * 60)
+    base_id = 17_000_000_000_000_000 if kind in ('instagram', 'stories') else 1_300_000_000_000_000
+    ids = (base_id + post_index).astype(str)
+    cols = {name: np.full(n, '', dtype=object) for name in header}
+
+    cols['Post ID'] = ids
+    cols['Publish time'] = _times(minutes)
+    cols['Description'] = np.array(DESCRIPTIONS, dtype=object)[post_index % len(DESCRIPTIONS)]
+    cols['Duration (sec)'] = (post_index % 60 + 5).astype(str)
+    cols['Post type'] = np.array(POST_TYPES[kind], dtype=object)[post_index % len(POST_TYPES[kind])]
+    cols['Date'] = np.full(n, 'Lifetime', dtype=object)
+
+    if kind in ('facebook', 'facebook_daily'):
+        cols['Page ID'] = np.full(n, '100064845214824', dtype=object)
+        cols['Page name'] = np.full(n, 'Westside', dtype=object)
+        cols['Title'] = cols['Description']
+        cols['Caption type'] = np.full(n, 'N/A', dtype=object)
+        cols['Permalink'] = 'https://www.facebook.com/reel/' + ids + '/'
+        cols['Is crosspost'] = (post_index % 2).astype(str)
+        cols['Is share'] = np.full(n, '0', dtype=object)
+    else:
+        cols['Account ID'] = np.full(n, '17841401577886844', dtype=object)
+        cols['Account username'] = np.full(n, 'westsidestores', dtype=object)
+        cols['Account name'] = np.full(n, 'Westside Stores', dtype=object)
+        path = 'stories/westsidestores/' if kind == 'stories' else 'reel/'
+        cols['Permalink'] = f'https://www.instagram.com/{path}' + ids + '/'
+
+    reach = _counts(rng, n, 3000)
+    likes = _counts(rng, n, 40)
+    comments = _counts(rng, n, 5)
+    shares = _counts(rng, n, 8)
+    if kind == 'facebook':
+        cols['Views'] = _numbers(rng, reach + _counts(rng, n, 500))
+        cols['Reach'] = _numbers(rng, reach)
+        cols['Reactions, comments and shares'] = _numbers(rng, likes + comments + shares)
+        cols['Reactions'] = _numbers(rng, likes)
+        cols['Comments'] = _numbers(rng, comments)
+        cols['Shares'] = _numbers(rng, shares)
+        cols['Seconds viewed'] = np.char.mod('%.3f', rng.random(n) * 10_000).astype(object)
+        for name in ['Total clicks', 'Link clicks', 'Other clicks']:
+            cols[name] = _numbers(rng, _counts(rng, n, 3))
+    elif kind == 'facebook_daily':
+        dates = pd.DatetimeIndex(START.astype('datetime64[D]') + (minutes // (24 * 60) + day_offset).astype('timedelta64[D]'))
+        cols['Date'] = dates.strftime('%m/%d/%Y')
+        cols['Reactions, comments and shares'] = _numbers(rng, likes + comments + shares)
+        cols['Reactions'] = _numbers(rng, likes)
+        cols['Comments'] = _numbers(rng, comments)
+        cols['Shares'] = _numbers(rng, shares)
+        cols['Seconds viewed'] = np.char.mod('%.3f', rng.random(n) * 1_000).astype(object)
+        for name in ['Estimated earnings (USD)', 'Ad CPM (USD)', 'Ad impressions']:
+            cols[name] = np.full(n, '0', dtype=object)
+    elif kind == 'instagram':
+        cols['Views'] = _numbers(rng, reach + _counts(rng, n, 2000))
+        cols['Reach'] = _numbers(rng, reach)
+        cols['Likes'] = _numbers(rng, likes)
+        cols['Shares'] = _numbers(rng, shares)
+        cols['Follows'] = _numbers(rng, _counts(rng, n, 2))
+        cols['Comments'] = _numbers(rng, comments)
+        cols['Saves'] = _numbers(rng, _counts(rng, n, 6))
+    else:
+        cols['Description'] = np.full(n, '', dtype=object)
+        cols['Views'] = _numbers(rng, reach + _counts(rng, n, 300))
+        cols['Reach'] = _numbers(rng, reach)
+        cols['Likes'] = _numbers(rng, likes)
+        cols['Shares'] = _numbers(rng, shares)
+        for name in ['Profile visits', 'Replies', 'Link clicks', 'Sticker taps', 'Navigation', 'Follows']:
+            cols[name] = _numbers(rng, _counts(rng, n, 10))
+
+    return pd.DataFrame(cols, columns=header)
+
+
+def write_export(kind: str, path: str, rows: int, seed: int = 0) -> str:
+    """Write `rows` rows of one export kind to `path` (a file name) and return it."""
+    if kind not in EXPORTS:
+        raise ValueError(f"Unknown export '{kind}'. Expected one of: {', '.join(EXPORTS)}")
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        for i, first in enumerate(range(0, rows, CHUNK_ROWS)):
+            rng = np.random.default_rng([seed, list(EXPORTS).index(kind), i])
+            _chunk(kind, rng, first, min(CHUNK_ROWS, rows - first)).to_csv(f, index=False, header=(i == 0))
+        if rows == 0:
+            pd.DataFrame(columns=EXPORTS[kind][1]).to_csv(f, index=False)
+    return path
+
+
+def write_exports(directory: str, rows: int, seed: int = 0) -> dict:
+    """Write all four exports into `directory`; returns {kind: path}."""
+    os.makedirs(directory, exist_ok=True)
+    return {kind: write_export(kind, os.path.join(directory, name), rows, seed) for kind, (name, _) in EXPORTS.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100_000, help='rows per export')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='synthetic')
+    args = parser.parse_args()
+
+    for kind, path in write_exports(args.out, args.rows, args.seed).items():
+        print(f"{kind:<16}{os.path.getsize(path) / 1e6:>10.1f} MB  {path}")
+
+
+if __name__ == '__main__':
+    main()
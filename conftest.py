@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(ROOT, 'backend'))
+from engine import AnalyticsEngine
+
+# The sample export of each platform in the repo root
+SAMPLES = {'facebook': 'facebook.csv', 'instagram': 'instagarm.csv', 'stories': 'instagarm story.csv',
+           'facebook_daily': 'facebook daily.csv'}
+
+
+@pytest.fixture
+def load_sample():
+    """Ingest a platform's sample export; every call returns a fresh frame."""
+    def load(platform):
+        with open(os.path.join(ROOT, SAMPLES[platform]), 'rb') as f:
+            return AnalyticsEngine().ingest(platform, f.read(), SAMPLES[platform])
+    return load
@@ -42,6 +42,8 @@ function App() {
     const [manualIgFollowers, setManualIgFollowers] = useState('');
     const [manualFbFollowers, setManualFbFollowers] = useState('');
     const [scriptUrl, setScriptUrl] = useState(localStorage.getItem('script_url') || '');
+    // Brand workspace on the backend; uploads, reports and syncs only touch this account's data
+    const [account, setAccount] = useState(localStorage.getItem('account') || 'default');
     const [syncStatus, setSyncStatus] = useState('');
 
     // Track which posts have been manually edited so they remain editable
@@ -68,26 +70,27 @@ function App() {
                 setProcessingStep('Uploading Facebook Posts...');
                 const formData = new FormData();
                 fbPostFiles.forEach(f => formData.append('files', f));
-                await axios.post(`${API_URL}/upload/facebook`, formData);
+                await axios.post(`${API_URL}/upload/facebook`, formData, { params: { account } });
             }
 
             if (igPostFiles.length > 0) {
                 setProcessingStep('Uploading Instagram Posts...');
                 const formData = new FormData();
                 igPostFiles.forEach(f => formData.append('files', f));
-                await axios.post(`${API_URL}/upload/instagram`, formData);
+                await axios.post(`${API_URL}/upload/instagram`, formData, { params: { account } });
             }
 
             if (igStoryFiles.length > 0) {
                 setProcessingStep('Uploading Instagram Stories...');
                 const formData = new FormData();
                 igStoryFiles.forEach(f => formData.append('files', f));
-                await axios.post(`${API_URL}/upload/stories`, formData);
+                await axios.post(`${API_URL}/upload/stories`, formData, { params: { account } });
             }
 
             setProcessingStep('Calculating metrics...');
             const res = await axios.get(`${API_URL}/report`, {
                 params: {
+                    account,
                     start_date: startDate,
                     end_date: endDate,
                     fb_story_views: manualFbStoryViews || 0
@@ -158,36 +161,42 @@ function App() {
                 }
             }
 
-            // Prepare Payload
+            // Prepare Payload: the server builds the sheet rows from the stored data itself,
+            // so only the dashboard's inputs and manual overrides are sent.
             const payload = {
                 script_url: scriptUrl,
+                account,
                 week_label: syncWeekLabel,
+                start_date: startDate,
+                end_date: endDate,
+                fb_story_views: manualFbStoryViews || 0,
 
-                // 1. Instagram Posts
-                instagram_posts: report.instagram.posts,
-
-                // 2. Instagram Stories (Use raw data but ensure publish_time is formatted in backend or use raw)
-                instagram_stories: report.stories.data,
-
-                // 3. Facebook Posts
-                facebook_posts: report.facebook.posts,
-
-                // 4. Facebook Stories (Parsed from Manual JSON)
+                // Facebook Stories (Parsed from Manual JSON)
                 facebook_stories: fbStoriesData,
 
-                // 5. Overall Analysis
-                overall_stats: {
-                    date_range: `${startDate} to ${endDate}`,
-                    // Use Aggregated Data (Top Cards) to match Dashboard numbers perfectly
-                    total_reach: (report.aggregated.instagram.total_reach + (finalFacebookData?.total_reach || report.aggregated.facebook.total_reach)),
-                    total_engagement: (report.aggregated.instagram.total_engagement + (finalFacebookData?.total_engagement || report.aggregated.facebook.total_engagement)),
-                    ig_followers: manualIgFollowers,
-                    fb_followers: manualFbFollowers
-                }
+                // Reach typed in by hand on the post tables, by post_id
+                post_reach: Object.fromEntries(
+                    ['instagram', 'facebook']
+                        .flatMap(platform => report?.[platform]?.posts || [])
+                        .filter(p => editedPostIds.has(p.post_id))
+                        .map(p => [p.post_id, p.reach])
+                ),
+
+                // Overall Analysis overrides (match the dashboard's top cards)
+                fb_total_reach: finalFacebookData?.total_reach || null,
+                fb_total_engagement: finalFacebookData?.total_engagement || null,
+                ig_followers: manualIgFollowers,
+                fb_followers: manualFbFollowers
             };
 
-            const res = await axios.post(`${API_URL}/sync-sheet`, payload);
-            console.log(res.data);
+            // Sync runs as a background job on the server; poll until it finishes
+            let { data: job } = await axios.post(`${API_URL}/sync-sheet`, payload);
+            while (job.status === 'queued' || job.status === 'running') {
+                await new Promise(r => setTimeout(r, 1500));
+                ({ data: job } = await axios.get(`${API_URL}/sync-sheet/${job.job_id}`));
+            }
+            console.log(job);
+            if (job.status !== 'succeeded') throw new Error(job.error);
             setSyncStatus('✅ Sync Complete!');
             setTimeout(() => setShowSyncModal(false), 2000);
 
@@ -198,7 +207,7 @@ function App() {
     };
 
     const clearData = async () => {
-        await axios.post(`${API_URL}/clear`);
+        await axios.post(`${API_URL}/clear`, null, { params: { account } });
         setReport(null);
         setFbPostFiles([]);
         setIgPostFiles([]);
@@ -436,6 +445,16 @@ function App() {
                         </div>
 
                         <div className="space-y-4">
+                            <div>
+                                <label className="text-xs font-bold text-slate-500 uppercase block mb-1">Account</label>
+                                <input
+                                    type="text"
+                                    value={account}
+                                    onChange={e => { setAccount(e.target.value); localStorage.setItem('account', e.target.value); }}
+                                    placeholder="default"
+                                    className="w-full bg-slate-950 border border-slate-700 rounded-lg py-2 px-3 text-sm text-white focus:ring-2 focus:ring-blue-500 outline-none hover:border-slate-600 transition-colors"
+                                />
+                            </div>
                             <div>
                                 <label className="text-xs font-bold text-slate-500 uppercase block mb-1">Start Date</label>
                                 <div className="relative">
@@ -489,6 +508,9 @@ function App() {
                                 <button onClick={downloadCSV} className="flex items-center gap-2 px-6 py-2 bg-green-600 hover:bg-green-500 text-white font-bold rounded-lg shadow-lg shadow-green-900/20 transition-all">
                                     <FileSpreadsheet className="w-4 h-4" /> Download CSV
                                 </button>
+                                <a href={`${API_URL}/export?${new URLSearchParams({ start_date: startDate, end_date: endDate, format: 'xlsx', fb_story_views: manualFbStoryViews || 0, account })}`} className="flex items-center gap-2 px-6 py-2 bg-emerald-700 hover:bg-emerald-600 text-white font-bold rounded-lg shadow-lg shadow-emerald-900/20 transition-all">
+                                    <FileSpreadsheet className="w-4 h-4" /> Download XLSX
+                                </a>
                                 <button onClick={handleSyncClick} className="flex items-center gap-2 px-6 py-2 bg-yellow-600 hover:bg-yellow-500 text-white font-bold rounded-lg shadow-lg shadow-yellow-900/20 transition-all">
                                     <Database className="w-4 h-4" /> Sync Sheets
                                 </button>
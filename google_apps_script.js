@@ -1,4 +1,20 @@
-// ULTRA ROBUST VERSION 2.0
+// ULTRA ROBUST VERSION 3.0
+// The backend builds the rows and sends them in gzip/base64 chunks:
+//   { encoding: "gzip/base64", data: <gzipped JSON> }
+// Each chunk: { sync_id, week_label, mode: "append"|"upsert", chunk_index, chunk_count,
+//               sections: { <name>: { rows: [...], first: bool, last: bool } }, overall_stats?,
+//               removed?: { <name>: [key, ...] } }
+// "append" writes a new week block (header on the first chunk, totals on the last).
+// "upsert" (a re-sync) overwrites changed rows inside the existing week block by key,
+// and deletes the rows whose keys are listed in `removed` (posts gone since the last sync).
+// The backend retries after timeouts and 5xx, so a chunk may arrive again after it was
+// written: chunks are applied under a script lock and remembered by sync_id/chunk_index,
+// and a repeat is acknowledged without writing anything.
+var APPLIED_CHUNK_SECONDS = 21600;  // CacheService maximum (6 hours), far beyond any retry
+
+function chunkId(params) {
+    return "chunk|" + params.sync_id + "|" + params.chunk_index;
+}
 function doPost(e) {
     var ss = SpreadsheetApp.getActiveSpreadsheet();
     var logs = ss.getSheetByName("Logs");
@@ -12,56 +28,52 @@ function doPost(e) {
         }
 
         var params = JSON.parse(e.postData.contents);
-
-        // 1. INSTAGRAM POSTS
-        try {
-            if (params.instagram_posts && params.instagram_posts.length > 0) {
-                logs.appendRow([new Date(), "Processing IG Posts: " + params.instagram_posts.length]);
-                appendInstagramPosts(ss, params.week_label, params.instagram_posts);
-            } else {
-                logs.appendRow([new Date(), "Skipping IG Posts (Empty)"]);
-            }
-        } catch (err) {
-            logs.appendRow([new Date(), "ERROR IG Posts: " + err.toString()]);
+        if (params.encoding === "gzip/base64") {
+            var blob = Utilities.newBlob(Utilities.base64Decode(params.data), "application/x-gzip");
+            params = JSON.parse(Utilities.ungzip(blob).getDataAsString());
         }
-
-        // 2. INSTAGRAM STORIES
-        try {
-            if (params.instagram_stories && params.instagram_stories.length > 0) {
-                logs.appendRow([new Date(), "Processing IG Stories: " + params.instagram_stories.length]);
-                appendInstagramStories(ss, params.week_label, params.instagram_stories);
-            } else {
-                logs.appendRow([new Date(), "Skipping IG Stories (Empty)"]);
-            }
-        } catch (err) {
-            logs.appendRow([new Date(), "ERROR IG Stories: " + err.toString()]);
+        var sections = params.sections || {};
+        var upsert = params.mode === "upsert";
+        logs.appendRow([new Date(), "Chunk " + (params.chunk_index + 1) + "/" + params.chunk_count + " (" + params.mode + ") of " + params.week_label]);
+
+        // A retry may arrive while the first attempt is still writing: wait for it, then check
+        var lock = LockService.getScriptLock();
+        lock.waitLock(300000);
+        var applied = CacheService.getScriptCache();
+        if (params.sync_id && applied.get(chunkId(params))) {
+            lock.releaseLock();
+            logs.appendRow([new Date(), "Chunk already applied, skipped"]);
+            return ContentService.createTextOutput(JSON.stringify({ "status": "success", "message": "Chunk already applied", "duplicate": true }))
+                .setMimeType(ContentService.MimeType.JSON);
         }
 
-        // 3. FACEBOOK POSTS
-        try {
-            if (params.facebook_posts && params.facebook_posts.length > 0) {
-                logs.appendRow([new Date(), "Processing FB Posts: " + params.facebook_posts.length]);
-                appendFacebookPosts(ss, params.week_label, params.facebook_posts);
-            } else {
-                logs.appendRow([new Date(), "Skipping FB Posts (Empty)"]);
+        var names = ["instagram_posts", "instagram_stories", "facebook_posts", "facebook_stories"];
+        names.forEach(function (name) {
+            try {
+                var entry = sections[name];
+                if (entry && entry.rows && entry.rows.length > 0) {
+                    logs.appendRow([new Date(), "Processing " + name + ": " + entry.rows.length]);
+                    writeSection(ss, LAYOUTS[name], params.week_label, entry, upsert);
+                }
+            } catch (err) {
+                logs.appendRow([new Date(), "ERROR " + name + ": " + err.toString()]);
             }
-        } catch (err) {
-            logs.appendRow([new Date(), "ERROR FB Posts: " + err.toString()]);
-        }
-
-        // 4. FACEBOOK STORIES
-        try {
-            if (params.facebook_stories && params.facebook_stories.length > 0) {
-                logs.appendRow([new Date(), "Processing FB Stories: " + params.facebook_stories.length]);
-                appendFacebookStories(ss, params.week_label, params.facebook_stories);
-            } else {
-                logs.appendRow([new Date(), "Skipping FB Stories (Empty)"]);
+        });
+
+        // ROWS GONE SINCE THE LAST SYNC
+        var removed = upsert ? (params.removed || {}) : {};
+        names.forEach(function (name) {
+            try {
+                if (removed[name] && removed[name].length > 0) {
+                    logs.appendRow([new Date(), "Removing " + name + ": " + removed[name].length]);
+                    removeRows(ss, LAYOUTS[name], params.week_label, removed[name]);
+                }
+            } catch (err) {
+                logs.appendRow([new Date(), "ERROR removing " + name + ": " + err.toString()]);
             }
-        } catch (err) {
-            logs.appendRow([new Date(), "ERROR FB Stories: " + err.toString()]);
-        }
+        });
 
-        // 5. OVERALL ANALYSIS
+        // OVERALL ANALYSIS
         try {
             if (params.overall_stats) {
                 logs.appendRow([new Date(), "Processing Overall Analysis"]);
@@ -71,6 +83,9 @@ function doPost(e) {
             logs.appendRow([new Date(), "ERROR Overall: " + err.toString()]);
         }
 
+        if (params.sync_id) applied.put(chunkId(params), "1", APPLIED_CHUNK_SECONDS);
+        lock.releaseLock();
+
         logs.appendRow([new Date(), "Sync Completed Successfully"]);
         return ContentService.createTextOutput(JSON.stringify({ "status": "success", "message": "Logged to sheet" }))
             .setMimeType(ContentService.MimeType.JSON);
@@ -118,140 +133,175 @@ function formatTotalRow(sheet, row, totalData) {
 }
 
 // -------------------------------------------------------------
-// 1. INSTAGRAM POSTS
-function appendInstagramPosts(ss, weekLabel, posts) {
-    var sheet = ss.getSheetByName("Instagram");
-    if (!sheet) sheet = ss.insertSheet("Instagram");
-
-    var lastRow = sheet.getLastRow();
-    var startRow = lastRow + (lastRow === 0 ? 1 : 2);
-    var headers = ["Week", "Date", "Day", "Type", "Views", "Likes", "Comments", "Shares", "Saves", "Total Interactions", "Reach", "Profile Visits", "Website", "Categorywise", "Link"];
-    formatHeaderRow(sheet, startRow, headers);
-
-    var rows = [];
-    var tViews = 0, tLikes = 0, tComments = 0, tShares = 0, tSaves = 0, tInteractions = 0, tReach = 0;
-
-    posts.forEach(function (p, index) {
-        var inter = (safeInt(p.likes) + safeInt(p.comments) + safeInt(p.shares) + safeInt(p.saves));
-        rows.push([
-            index === 0 ? weekLabel : "",
-            p.publish_time ? p.publish_time.split(' ')[0] : "",
-            getDayName(p.publish_time),
-            p.post_type || "",
-            safeInt(p.views), safeInt(p.likes), safeInt(p.comments), safeInt(p.shares), safeInt(p.saves), inter, safeInt(p.reach),
-            "", "", "", p.permalink || ""
-        ]);
-        tViews += safeInt(p.views); tLikes += safeInt(p.likes); tComments += safeInt(p.comments); tShares += safeInt(p.shares);
-        tSaves += safeInt(p.saves); tInteractions += inter; tReach += safeInt(p.reach);
-    });
-
-    if (rows.length > 0) {
-        sheet.getRange(startRow + 1, 1, rows.length, rows[0].length).setValues(rows);
-        var totalRowIdx = startRow + 1 + rows.length;
-        var totalData = ["", "", "", "Total", tViews, tLikes, tComments, tShares, tSaves, tInteractions, tReach, "", "", "", ""];
-        formatTotalRow(sheet, totalRowIdx, totalData);
+// SHEET LAYOUTS
+// row(p) returns the cells for one row (column 1, the week, is filled in by writeSection).
+// A hidden-in-plain-sight "Post ID" column after the layout holds each row's key, plus
+// HEADER|<week> / TOTAL|<week> markers so a re-sync can find the week block again.
+var LAYOUTS = {
+    // 1. INSTAGRAM POSTS
+    instagram_posts: {
+        sheet: "Instagram",
+        headers: ["Week", "Date", "Day", "Type", "Views", "Likes", "Comments", "Shares", "Saves", "Total Interactions", "Reach", "Profile Visits", "Website", "Categorywise", "Link"],
+        totalLabelCol: 4,
+        sumCols: [5, 6, 7, 8, 9, 10, 11],
+        key: function (p) { return p.post_id; },
+        row: function (p) {
+            var inter = (safeInt(p.likes) + safeInt(p.comments) + safeInt(p.shares) + safeInt(p.saves));
+            return [
+                "",
+                p.publish_time ? p.publish_time.split(' ')[0] : "",
+                getDayName(p.publish_time),
+                p.post_type || "",
+                safeInt(p.views), safeInt(p.likes), safeInt(p.comments), safeInt(p.shares), safeInt(p.saves), inter, safeInt(p.reach),
+                "", "", "", p.permalink || ""
+            ];
+        }
+    },
+    // 2. INSTAGRAM STORIES
+    instagram_stories: {
+        sheet: "Instagram stories",
+        headers: ["Week", "Day", "Date", "Views", "Reach", "Likes", "Sticker taps", "Replies", "Total Interactions", "Remarks"],
+        totalLabelCol: 3,
+        sumCols: [4, 5, 6, 7, 8, 9],
+        key: function (s) { return s.post_id; },
+        row: function (s) {
+            var tap = s.sticker_taps || 0;
+            var inter = (safeInt(s.likes) + safeInt(s.replies) + safeInt(tap));
+            return [
+                "",
+                getDayName(s.publish_time),
+                s.publish_time || "",
+                safeInt(s.views), safeInt(s.reach), safeInt(s.likes), safeInt(tap), safeInt(s.replies), inter, ""
+            ];
+        }
+    },
+    // 3. FACEBOOK POSTS
+    facebook_posts: {
+        sheet: "Facebook",
+        headers: ["Week", "Day", "Date", "Type", "Reach", "Likes", "Comments", "Share", "Link clicks", "Engagement", "Video views", "Brandwise", "Category", "Link"],
+        totalLabelCol: 4,
+        sumCols: [5, 6, 7, 8, 9, 10, 11],
+        key: function (p) { return p.post_id; },
+        row: function (p) {
+            var eng = (safeInt(p.likes) + safeInt(p.comments) + safeInt(p.shares) + safeInt(p.link_clicks));
+            return [
+                "",
+                getDayName(p.publish_time),
+                p.publish_time ? p.publish_time.split(' ')[0] : "",
+                p.post_type || "",
+                safeInt(p.reach), safeInt(p.likes), safeInt(p.comments), safeInt(p.shares), safeInt(p.link_clicks), eng, safeInt(p.views),
+                "", "", p.permalink || ""
+            ];
+        }
+    },
+    // 4. FACEBOOK STORIES
+    facebook_stories: {
+        sheet: "Facebook stories",
+        headers: ["Week", "Day", "Date", "Views", "Reach", "Likes", "Shares", "Replies", "Link Clicks", "Interactions", "Remarks"],
+        totalLabelCol: 3,
+        sumCols: [4, 5, 6, 7, 8, 9, 10],
+        key: function (s) { return s.date; },
+        row: function (s) {
+            return [
+                "",
+                getDayName(s.date),
+                s.date || "",
+                safeInt(s.views), safeInt(s.reach), safeInt(s.likes), safeInt(s.shares), safeInt(s.replies), safeInt(s.link_clicks), safeInt(s.interactions), ""
+            ];
+        }
     }
-}
+};
 
-// -------------------------------------------------------------
-// 2. INSTAGRAM STORIES
-function appendInstagramStories(ss, weekLabel, stories) {
-    var sheet = ss.getSheetByName("Instagram stories");
-    if (!sheet) sheet = ss.insertSheet("Instagram stories");
-
-    var lastRow = sheet.getLastRow();
-    var startRow = lastRow + (lastRow === 0 ? 1 : 2);
-    var headers = ["Week", "Day", "Date", "Views", "Reach", "Likes", "Sticker taps", "Replies", "Total Interactions", "Remarks"];
-    formatHeaderRow(sheet, startRow, headers);
+function colLetter(n) {
+    return String.fromCharCode(64 + n);
+}
 
-    var rows = [];
-    var tViews = 0, tReach = 0, tLikes = 0, tTaps = 0, tReplies = 0, tInteractions = 0;
+// Row number of the cell equal to `value` in column `col`, searched within [fromRow, toRow].
+function findKeyRow(sheet, col, value, fromRow, toRow) {
+    var last = toRow || sheet.getLastRow();
+    var first = fromRow || 1;
+    if (last < first) return 0;
+    var cell = sheet.getRange(first, col, last - first + 1, 1)
+        .createTextFinder(String(value)).matchEntireCell(true).findNext();
+    return cell ? cell.getRow() : 0;
+}
 
-    stories.forEach(function (s, index) {
-        var tap = s.sticker_taps || 0;
-        var inter = (safeInt(s.likes) + safeInt(s.replies) + safeInt(tap));
-        rows.push([
-            index === 0 ? weekLabel : "",
-            getDayName(s.publish_time),
-            s.publish_time || "",
-            safeInt(s.views), safeInt(s.reach), safeInt(s.likes), safeInt(tap), safeInt(s.replies), inter, ""
-        ]);
-        tViews += safeInt(s.views); tReach += safeInt(s.reach); tLikes += safeInt(s.likes); tTaps += safeInt(tap); tReplies += safeInt(s.replies); tInteractions += inter;
+// Totals are SUM formulas over the rows between the week's header and the totals row,
+// so they stay right when a re-sync overwrites or inserts rows.
+function writeTotalRow(sheet, layout, weekLabel, rowIdx) {
+    var keyCol = layout.headers.length + 1;
+    var marker = ("HEADER|" + weekLabel).replace(/"/g, '""');
+    var totalData = layout.headers.map(function () { return ""; });
+    totalData[layout.totalLabelCol - 1] = "Total";
+    layout.sumCols.forEach(function (c) {
+        var L = colLetter(c);
+        totalData[c - 1] = '=SUM(INDIRECT("' + L + '"&(MATCH("' + marker + '",$' + colLetter(keyCol) + ':$' + colLetter(keyCol) + ',0)+1)&":' + L + '"&(ROW()-1)))';
     });
-
-    if (rows.length > 0) {
-        sheet.getRange(startRow + 1, 1, rows.length, rows[0].length).setValues(rows);
-        var totalRowIdx = startRow + 1 + rows.length;
-        var totalData = ["", "", "Total", tViews, tReach, tLikes, tTaps, tReplies, tInteractions, ""];
-        formatTotalRow(sheet, totalRowIdx, totalData);
-    }
+    totalData.push("TOTAL|" + weekLabel);
+    formatTotalRow(sheet, rowIdx, totalData);
 }
 
-// -------------------------------------------------------------
-// 3. FACEBOOK POSTS
-function appendFacebookPosts(ss, weekLabel, posts) {
-    var sheet = ss.getSheetByName("Facebook");
-    if (!sheet) sheet = ss.insertSheet("Facebook");
-
-    var lastRow = sheet.getLastRow();
-    var startRow = lastRow + (lastRow === 0 ? 1 : 2);
-    var headers = ["Week", "Day", "Date", "Type", "Reach", "Likes", "Comments", "Share", "Link clicks", "Engagement", "Video views", "Brandwise", "Category", "Link"];
-    formatHeaderRow(sheet, startRow, headers);
-
-    var rows = [];
-    var tReach = 0, tLikes = 0, tComments = 0, tShares = 0, tClicks = 0, tEng = 0, tViews = 0;
+function writeSection(ss, layout, weekLabel, entry, upsert) {
+    var sheet = ss.getSheetByName(layout.sheet);
+    if (!sheet) sheet = ss.insertSheet(layout.sheet);
+    var keyCol = layout.headers.length + 1;
+
+    var headerRow = upsert ? findKeyRow(sheet, keyCol, "HEADER|" + weekLabel) : 0;
+    var totalRow = headerRow ? findKeyRow(sheet, keyCol, "TOTAL|" + weekLabel, headerRow) : 0;
+
+    if (!upsert || !headerRow || !totalRow) {
+        // APPEND: a new week block, possibly spread over several chunks
+        var first = entry.first || (upsert && !headerRow);
+        var last = entry.last || upsert;
+        if (first) {
+            var lastRow = sheet.getLastRow();
+            var startRow = lastRow + (lastRow === 0 ? 1 : 2);
+            formatHeaderRow(sheet, startRow, layout.headers.concat(["Post ID"]));
+            sheet.getRange(startRow, keyCol).setValue("HEADER|" + weekLabel);
+        }
+        var rows = entry.rows.map(function (r, i) {
+            var v = layout.row(r);
+            v[0] = (first && i === 0) ? weekLabel : "";
+            v.push(String(layout.key(r)));
+            return v;
+        });
+        sheet.getRange(sheet.getLastRow() + 1, 1, rows.length, rows[0].length).setValues(rows);
+        if (last) writeTotalRow(sheet, layout, weekLabel, sheet.getLastRow() + 1);
+        return;
+    }
 
-    posts.forEach(function (p, index) {
-        var eng = (safeInt(p.likes) + safeInt(p.comments) + safeInt(p.shares) + safeInt(p.link_clicks));
-        rows.push([
-            index === 0 ? weekLabel : "",
-            getDayName(p.publish_time),
-            p.publish_time ? p.publish_time.split(' ')[0] : "",
-            p.post_type || "",
-            safeInt(p.reach), safeInt(p.likes), safeInt(p.comments), safeInt(p.shares), safeInt(p.link_clicks), eng, safeInt(p.views),
-            "", "", p.permalink || ""
-        ]);
-        tReach += safeInt(p.reach); tLikes += safeInt(p.likes); tComments += safeInt(p.comments); tShares += safeInt(p.shares); tClicks += safeInt(p.link_clicks); tEng += eng; tViews += safeInt(p.views);
+    // UPSERT: overwrite rows found by key inside the week block, insert the rest above the totals row
+    entry.rows.forEach(function (r) {
+        var v = layout.row(r).slice(1);
+        v.push(String(layout.key(r)));
+        var at = findKeyRow(sheet, keyCol, layout.key(r), headerRow + 1, totalRow - 1);
+        if (!at) {
+            sheet.insertRowBefore(totalRow);
+            at = totalRow;
+            totalRow++;
+        }
+        sheet.getRange(at, 2, 1, v.length).setValues([v]);
     });
-
-    if (rows.length > 0) {
-        sheet.getRange(startRow + 1, 1, rows.length, rows[0].length).setValues(rows);
-        var totalRowIdx = startRow + 1 + rows.length;
-        var totalData = ["", "", "", "Total", tReach, tLikes, tComments, tShares, tClicks, tEng, tViews, "", "", ""];
-        formatTotalRow(sheet, totalRowIdx, totalData);
-    }
 }
 
-// -------------------------------------------------------------
-// 4. FACEBOOK STORIES
-function appendFacebookStories(ss, weekLabel, stories) {
-    var sheet = ss.getSheetByName("Facebook stories");
-    if (!sheet) sheet = ss.insertSheet("Facebook stories");
-
-    var lastRow = sheet.getLastRow();
-    var startRow = lastRow + (lastRow === 0 ? 1 : 2);
-    var headers = ["Week", "Day", "Date", "Views", "Reach", "Likes", "Shares", "Replies", "Link Clicks", "Interactions", "Remarks"];
-    formatHeaderRow(sheet, startRow, headers);
-
-    var rows = [];
-    var tViews = 0, tReach = 0, tLikes = 0, tShares = 0, tReplies = 0, tClicks = 0, tInter = 0;
-
-    stories.forEach(function (s, index) {
-        rows.push([
-            index === 0 ? weekLabel : "",
-            getDayName(s.date),
-            s.date || "",
-            safeInt(s.views), safeInt(s.reach), safeInt(s.likes), safeInt(s.shares), safeInt(s.replies), safeInt(s.link_clicks), safeInt(s.interactions), ""
-        ]);
-        tViews += safeInt(s.views); tReach += safeInt(s.reach); tLikes += safeInt(s.likes); tShares += safeInt(s.shares); tReplies += safeInt(s.replies); tClicks += safeInt(s.link_clicks); tInter += safeInt(s.interactions);
+// Delete the rows with these keys from the week block. The totals' SUM ranges follow
+// the header and totals rows, and the week label moves down if its row goes.
+function removeRows(ss, layout, weekLabel, keys) {
+    var sheet = ss.getSheetByName(layout.sheet);
+    if (!sheet) return;
+    var keyCol = layout.headers.length + 1;
+    var headerRow = findKeyRow(sheet, keyCol, "HEADER|" + weekLabel);
+    var totalRow = headerRow ? findKeyRow(sheet, keyCol, "TOTAL|" + weekLabel, headerRow) : 0;
+    if (!totalRow) return;
+
+    keys.forEach(function (key) {
+        var at = findKeyRow(sheet, keyCol, key, headerRow + 1, totalRow - 1);
+        if (!at) return;
+        var week = sheet.getRange(at, 1).getValue();
+        sheet.deleteRow(at);
+        totalRow--;
+        if (week && at < totalRow) sheet.getRange(at, 1).setValue(week);
     });
-
-    if (rows.length > 0) {
-        sheet.getRange(startRow + 1, 1, rows.length, rows[0].length).setValues(rows);
-        var totalRowIdx = startRow + 1 + rows.length;
-        var totalData = ["", "", "Total", tViews, tReach, tLikes, tShares, tReplies, tClicks, tInter, ""];
-        formatTotalRow(sheet, totalRowIdx, totalData);
-    }
 }
 
 // -------------------------------------------------------------
@@ -263,5 +313,11 @@ function appendOverall(ss, weekLabel, stats) {
         formatHeaderRow(sheet, 1, ["Week", "Date Range", "Total Reach", "Total Engagement", "IG Followers", "FB Followers"]);
     }
     var row = [weekLabel, stats.date_range, stats.total_reach, stats.total_engagement, stats.ig_followers, stats.fb_followers];
-    sheet.appendRow(row);
+    // One row per week: a re-sync overwrites it
+    var at = findKeyRow(sheet, 1, weekLabel, 2);
+    if (at) {
+        sheet.getRange(at, 1, 1, row.length).setValues([row]);
+    } else {
+        sheet.appendRow(row);
+    }
 }
@@ -0,0 +1,91 @@
+import asyncio
+import io
+import os
+import sys
+
+import pandas as pd
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+import main
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+PERIOD = {'start_date': '2026-01-01', 'end_date': '2026-02-28'}
+
+
+def _halves():
+    """instagarm.csv as two files overlapping on a few posts, the later one with edited reach."""
+    raw = pd.read_csv(os.path.join(ROOT, 'instagarm.csv'), dtype=str)
+    cut = len(raw) // 2
+    later = raw.iloc[cut - 3:].copy()
+    later['Reach'] = '777'
+    return raw.iloc[:cut].to_csv(index=False).encode(), later.to_csv(index=False).encode()
+
+
+def _client(account):
+    client = TestClient(main.app)
+    with open(os.path.join(ROOT, 'instagarm.csv'), 'rb') as f:
+        response = client.post('/upload/instagram', params={'account': account},
+                               files=[('files', ('instagarm.csv', f.read(), 'text/csv'))])
+    assert response.status_code == 200
+    return client
+
+
+def test_report_etag_names_the_coding_actually_sent():
+    client = _client('etag')
+    kpis, full = dict(PERIOD, account='etag', include='instagram.stats'), dict(PERIOD, account='etag')
+    small = client.get('/report', params=kpis, headers={'Accept-Encoding': 'gzip'})
+    assert 'content-encoding' not in small.headers and not small.headers['etag'].endswith('-gzip"')
+    again = client.get('/report', params=kpis, headers={'Accept-Encoding': 'gzip', 'If-None-Match': small.headers['etag']})
+    assert again.status_code == 304 and again.headers['etag'] == small.headers['etag']
+
+    large = client.get('/report', params=full, headers={'Accept-Encoding': 'gzip'})
+    assert large.headers['content-encoding'] == 'gzip' and large.headers['etag'].endswith('-gzip"')
+
+    # Once the bodies are evicted, a 304 still carries the tag the 200 sent
+    main.report_cache.invalidate('etag')
+    for params, response in ((kpis, small), (full, large)):
+        again = client.get('/report', params=params,
+                           headers={'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['etag']})
+        assert again.status_code == 304 and again.headers['etag'] == response.headers['etag']
+
+def test_pooled_ingest_matches_sequential_ingest():
+    first, second = _halves()
+    files = [UploadFile(io.BytesIO(first), filename='a.csv'), UploadFile(io.BytesIO(second), filename='b.csv')]
+    df, errors, conversion = asyncio.run(main._ingest_files('instagram', files, 5))
+    expected = main.engine.combine([main.engine.ingest('instagram', data, name)
+                                    for data, name in [(first, 'a.csv'), (second, 'b.csv')]], 'instagram')
+    assert errors == [] and [c['filename'] for c in conversion] == ['a.csv', 'b.csv']
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_a_bad_file_is_reported_and_the_others_are_stored():
+    first, second = _halves()
+    client = TestClient(main.app)
+    response = client.post('/upload/instagram', params={'account': 'partial'}, files=[
+        ('files', ('a.csv', first, 'text/csv')),
+        ('files', ('broken.csv', b'"Post ID","Reach"\n"unterminated,5\n', 'text/csv')),
+        ('files', ('b.csv', second, 'text/csv'))])
+    assert response.status_code == 200
+    assert [e['filename'] for e in response.json()['errors']] == ['broken.csv']
+
+    stored = main.workspaces.get('partial').snapshot().load('instagram')
+    expected = main.engine.combine([main.engine.ingest('instagram', first, 'a.csv'),
+                                    main.engine.ingest('instagram', second, 'b.csv')], 'instagram')
+    assert stored['post_id'].tolist() == expected['post_id'].tolist()
+    assert stored['reach'].tolist() == expected['reach'].tolist() and 777 in stored['reach'].tolist()
+
+
+def test_deck_reports_values_the_template_has_no_place_for(tmp_path, monkeypatch):
+    from test_deck import _real_template
+    monkeypatch.setattr(main, 'DECK_TEMPLATE', _real_template(tmp_path / 'real.pptx'))
+    client = _client('deck')
+    body = dict(PERIOD, account='deck', values={'IG_FOLLOWERS': '982,377'})
+    deck = client.post('/deck', json=body)
+    assert deck.status_code == 200
+    assert 'IG_FOLLOWERS' not in deck.headers['x-deck-unfilled'].split(',')
+    assert 'IG_BEST_ENGAGEMENT_LIKES' in deck.headers['x-deck-unused'].split(',')
+
+    typo = client.post('/deck', json=dict(body, values={'IG_FOLLOWER_GROWHT': '+3,621'}))
+    assert typo.status_code == 400 and 'IG_FOLLOWER_GROWHT' in typo.json()['detail']
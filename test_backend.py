@@ -1,98 +1,110 @@
+import io
 import sys
 import os
-import pandas as pd
 from datetime import datetime
 
+import numpy as np
+import pandas as pd
+
 # Add backend to path
-sys.path.append(os.path.join(os.getcwd(), 'backend'))
-from engine import AnalyticsEngine
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(ROOT, 'backend'))
+from engine import PLATFORM_SCHEMAS, TEXT_COLS, AnalyticsEngine
+
+
+def _ingest(engine, platform, filename):
+    with open(os.path.join(ROOT, filename), 'rb') as f:
+        return engine.ingest(platform, f.read(), filename)
+
 
 def test_engine():
-    print("Initializing Analytics Engine...")
     engine = AnalyticsEngine()
-    
-    # Paths to your local files
-    fb_path = "facebook.csv"
-    ig_path = "instagarm.csv" 
-    story_path = "instagarm story.csv"
-
-    print(f"Loading files from: {os.getcwd()}")
-    
-    # 1. Test Post Processing
-    print("\n--- Testing POST Processing ---")
-    posts_dfs = []
-    
-    try:
-        with open(fb_path, 'rb') as f:
-            print(f"Processing {fb_path}...")
-            fb_df = engine.process_posts_upload(f.read(), "facebook.csv")
-            print(f" > FB Rows: {len(fb_df)}")
-            print(f" > FB Columns: {list(fb_df.columns)}")
-            posts_dfs.append(fb_df)
-    except Exception as e:
-        print(f"Error FB: {e}")
-
-    try:
-        with open(ig_path, 'rb') as f:
-            print(f"Processing {ig_path}...")
-            ig_df = engine.process_posts_upload(f.read(), "instagram.csv")
-            print(f" > IG Rows: {len(ig_df)}")
-            print(f" > IG Columns: {list(ig_df.columns)}")
-            posts_dfs.append(ig_df)
-    except Exception as e:
-        print(f"Error IG: {e}")
-
-    if posts_dfs:
-        all_posts = pd.concat(posts_dfs)
-        # Global Dedup
-        all_posts = all_posts.drop_duplicates(subset=['post_id'], keep='last')
-        print(f" > Total Unique Posts: {len(all_posts)}")
-    else:
-        all_posts = pd.DataFrame()
-
-    # 2. Test Story Processing
-    print("\n--- Testing STORY Processing ---")
-    stories_df = pd.DataFrame()
-    try:
-        with open(story_path, 'rb') as f:
-            print(f"Processing {story_path}...")
-            stories_df = engine.process_stories_upload(f.read(), "story.csv")
-            print(f" > Story Rows: {len(stories_df)}")
-            print(f" > Story Columns: {list(stories_df.columns)}")
-    except Exception as e:
-        print(f"Error Story: {e}")
-
-    # 3. Test Report Generation
-    print("\n--- Testing Report Calculation ---")
-    # Date Range from CSV data (Jan 28 2026 to Feb 03 2026 based on inspection)
+
+    # 1. Post and story processing
+    fb_df = _ingest(engine, 'facebook', 'facebook.csv')
+    ig_df = _ingest(engine, 'instagram', 'instagarm.csv')
+    stories_df = _ingest(engine, 'stories', 'instagarm story.csv')
+    for df in (fb_df, ig_df, stories_df):
+        assert len(df) > 0
+        assert df['post_id'].is_unique
+        assert df['publish_time'].is_monotonic_increasing
+
+    # 2. Report generation over the CSVs' date range (Jan 28 2026 to Feb 04 2026)
     start_date = datetime(2026, 1, 28)
-    end_date = datetime(2026, 2, 4)
-    
-    report = engine.generate_report(all_posts, stories_df, start_date, end_date)
-    
-    print("\n=== GENERATED REPORT SUMMARY ===")
-    print(f"Period: {report['period']['start']} to {report['period']['end']}")
-    
-    print("\n[POSTS KPI]")
-    stats = report['posts']['stats']
-    print(f"Total Posts: {stats['total_posts']}")
-    print(f"Total Reach: {stats['total_reach']}")
-    print(f"Total Engagement: {stats['total_engagement']}")
-    print(f"Avg Engagement Rate (Reach): {stats['avg_engagement_rate_reach']:.2%}")
-    print(f"Avg Engagement Rate (Views): {stats['avg_engagement_rate_views']:.2%}")
-    
-    print("\n[STORIES KPI]")
-    s_stats = report['stories']['stats']
-    print(f"Total Stories: {s_stats['total_stories']}")
-    print(f"Total Reach: {s_stats['total_reach']}")
-    print(f"Avg Views: {s_stats['avg_views_per_story']:.0f}")
-    
-    print("\n[RANKINGS]")
-    ranks = report['posts']['rankings']
-    if ranks.get('best_reach'):
-        print(f"Best Reach: {ranks['best_reach']['val']} (ID: {ranks['best_reach']['post_id']})")
-    
-    print("\nDone.")
+    end_date = datetime(2026, 2, 4, 23, 59, 59)
+    report = engine.generate_report(fb_df, ig_df, stories_df, start_date, end_date)
+
+    assert report['period'] == {"start": "2026-01-28", "end": "2026-02-04"}
+    fb_stats = report['facebook']['stats']
+    assert fb_stats['total_posts'] == len(report['facebook']['posts']) == len(engine.slice_range(fb_df, start_date, end_date))
+    assert fb_stats['total_reach'] == sum(p['reach'] for p in report['facebook']['posts'])
+    assert report['instagram']['stats']['total_engagement'] == sum(p['total_engagement'] for p in report['instagram']['posts'])
+    assert report['stories']['stats']['total_stories'] == len(report['stories']['data'])
+
+    ig = report['aggregated']['instagram']
+    assert ig['total_reach'] == report['instagram']['stats']['total_reach'] + report['stories']['stats']['total_reach']
+
+    # 3. Rankings
+    best = report['instagram']['rankings']['best_reach']
+    assert best['reach'] == max(p['reach'] for p in report['instagram']['posts'])
+
 
 if __name__ == "__main__":
     test_engine()
+
+
+def test_chunked_ingest_matches_whole_file_ingest():
+    engine = AnalyticsEngine()
+    for platform, filename in [('facebook', 'facebook.csv'), ('instagram', 'instagarm.csv'),
+                               ('stories', 'instagarm story.csv'), ('facebook_daily', 'facebook daily.csv')]:
+        whole = _ingest(engine, platform, filename)
+        with open(os.path.join(ROOT, filename), 'rb') as f:
+            chunked = engine.ingest_stream(platform, f, filename, chunk_rows=3)
+        pd.testing.assert_frame_equal(chunked, whole)
+
+    # A post repeated in a later chunk: one row, the later one wins, as in a whole-file read
+    raw = pd.read_csv(os.path.join(ROOT, 'instagarm.csv'), dtype=str)
+    repeat = raw.iloc[:1].assign(Reach='4242')
+    data = pd.concat([raw, repeat]).to_csv(index=False).encode()
+    chunked = engine.ingest_stream('instagram', io.BytesIO(data), 'dup.csv', chunk_rows=2)
+    pd.testing.assert_frame_equal(chunked, engine.ingest('instagram', data, 'dup.csv'))
+    assert len(chunked) == len(raw)
+    assert chunked.loc[chunked['post_id'].astype(str) == raw['Post ID'].iloc[0], 'reach'].tolist() == [4242]
+
+
+def _process_like_before(platform, filename):
+    """The per-platform process_* path that normalize replaced: read everything, rename, coerce, derive."""
+    schema = PLATFORM_SCHEMAS[platform]
+    df = pd.read_csv(os.path.join(ROOT, filename))
+    df = df[[c for c in schema['columns'] if c in df.columns]].rename(columns=schema['columns'])
+    df['platform'] = schema['label']
+    for col in schema['metrics']:
+        df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', ''), errors='coerce').fillna(0) if col in df.columns else 0
+    df['publish_time'] = pd.to_datetime(df['publish_time'], errors='coerce')
+    df['post_id'] = df['post_id'].astype(str)
+    df = df.drop_duplicates(subset=['post_id'], keep='last')
+    if schema['engagement']:
+        total = df[schema['engagement']].sum(axis=1)
+        df['total_engagement'] = total
+        df['engagement_rate_reach'] = df.apply(lambda x: total[x.name] / x['reach'] if x['reach'] > 0 else 0, axis=1)
+        df['engagement_rate_views'] = df.apply(lambda x: total[x.name] / x['views'] if x['views'] > 0 else 0, axis=1)
+    return df.reset_index(drop=True)
+
+
+def test_normalize_matches_the_per_platform_processing():
+    engine = AnalyticsEngine()
+    for platform, filename in [('facebook', 'facebook.csv'), ('instagram', 'instagarm.csv'),
+                               ('stories', 'instagarm story.csv')]:
+        before = _process_like_before(platform, filename)
+        after = engine.normalize(platform, engine._read_csv(platform, os.path.join(ROOT, filename))).reset_index(drop=True)
+        assert set(after.columns) == set(before.columns)
+        for col in before.columns:
+            if col == 'publish_time':
+                assert after[col].tolist() == before[col].tolist()
+            elif col in TEXT_COLS or not pd.api.types.is_numeric_dtype(before[col]):
+                # Text columns are read as text now (ids used to come back as int64)
+                assert after[col].fillna('').astype(str).tolist() == before[col].fillna('').astype(str).tolist(), col
+            else:
+                assert pd.api.types.is_numeric_dtype(after[col]), col
+                np.testing.assert_allclose(after[col].to_numpy(dtype='float64'), before[col].to_numpy(dtype='float64'),
+                                           err_msg=f'{platform}.{col}')
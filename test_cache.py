@@ -0,0 +1,59 @@
+import gzip
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from cache import ENCODERS, EncodedBody, ReportCache, etag_matches, held_coding, make_etag, negotiate_encoding, variant_etag
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ReportCache(max_entries=2)
+    cache.put((1, 'a'), b'A')
+    cache.put((1, 'b'), b'B')
+    assert cache.get((1, 'a')) == b'A'   # 'a' is now most recent
+    cache.put((1, 'c'), b'C')
+
+    assert cache.get((1, 'b')) is None
+    assert cache.get((1, 'c')) == b'C'
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (2, 1, 1)
+
+
+def test_invalidate_drops_entries_but_keeps_counters():
+    cache = ReportCache(max_entries=4)
+    cache.put((1, 'a'), b'A')
+    cache.get((1, 'a'))
+    cache.invalidate()
+
+    assert cache.get((1, 'a')) is None
+    assert cache.stats()['entries'] == 0
+    assert cache.stats()['hits'] == 1
+
+
+def test_accept_encoding_negotiation():
+    assert negotiate_encoding(None) == 'identity'
+    assert negotiate_encoding('gzip, deflate') == 'gzip'
+    assert negotiate_encoding('gzip;q=0, identity') == 'identity'
+    assert negotiate_encoding('*') == next(iter(ENCODERS))
+    assert negotiate_encoding('br;q=1.0, gzip;q=0.8') == ('br' if 'br' in ENCODERS else 'gzip')
+
+
+def test_etag_matches_any_coding_of_the_same_body():
+    etag = make_etag('default', 3, '2026-01-01', '2026-01-07', 0)
+    assert etag != make_etag('default', 4, '2026-01-01', '2026-01-07', 0)
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{variant_etag(etag, "gzip")}', etag)
+    assert not etag_matches('"other"', etag) and not etag_matches(None, etag)
+    assert held_coding(etag, etag, 'gzip') == 'identity'
+    assert held_coding(f'{etag}, {variant_etag(etag, "gzip")}', etag, 'gzip') == 'gzip'
+    assert held_coding('*', etag, 'gzip') == 'gzip' and held_coding(etag, etag, 'identity') == 'identity'
+
+
+def test_encoded_body_compresses_once_above_the_threshold():
+    body = EncodedBody(b'{"posts": []}' * 200, min_bytes=1024)
+    data, applied = body.encode('gzip')
+    assert applied == 'gzip' and gzip.decompress(data) == body.body
+    assert body.encode('gzip')[0] is data
+    assert body.encode('identity') == (body.body, 'identity')
+    assert EncodedBody(b'{}', min_bytes=1024).encode('gzip') == (b'{}', 'identity')
+    assert EncodedBody(b'{}', min_bytes=1024).coding('gzip') == 'identity' and body.coding('gzip') == 'gzip'
@@ -0,0 +1,67 @@
+import os
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from engine import AnalyticsEngine, COLD_COLS, compact_frame
+from store import DiskStore, MemoryStore
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+FILES = {'facebook': 'facebook.csv', 'instagram': 'instagarm.csv', 'stories': 'instagarm story.csv'}
+START, END = datetime(2020, 1, 1), datetime(2030, 12, 31, 23, 59, 59)
+
+
+def test_stored_columns_are_compact(load_sample):
+    ig = load_sample('instagram')
+    assert ig['post_id'].dtype == 'int64'
+    assert ig['reach'].dtype.kind == 'u' and ig['likes'].dtype.itemsize <= 2
+    for col in ['platform', 'post_type', 'account_id', 'account_name']:
+        assert isinstance(ig[col].dtype, pd.CategoricalDtype)
+    assert ig['engagement_rate_reach'].dtype == 'float64'
+
+    # Fractional counts stay float; ids that would not print back the same stay text
+    odd = compact_frame(pd.DataFrame({'post_id': ['007', '8'], 'reach': [1.5, 2.0], 'likes': [3.0, 4.0]}))
+    assert odd['post_id'].tolist() == ['007', '8']
+    assert odd['reach'].dtype == 'float64' and odd['likes'].dtype == 'uint8'
+
+
+def test_hot_columns_take_a_third_of_the_parsed_table(load_sample):
+    engine = AnalyticsEngine()
+    for platform, filename in FILES.items():
+        parsed = engine.normalize(platform, engine._read_csv(platform, os.path.join(ROOT, filename)))
+        store = MemoryStore()
+        store.save(platform, load_sample(platform))
+        usage = store.snapshot().memory_usage(platform)
+        assert set(usage['hot']).isdisjoint(COLD_COLS)
+        assert sum(usage['hot'].values()) * 3 <= parsed.memory_usage(deep=True, index=False).sum()
+
+
+def test_reports_match_with_cold_columns_split_off(tmp_path, load_sample):
+    tables = {platform: load_sample(platform) for platform in FILES}
+    engine = AnalyticsEngine()
+    expected = engine.generate_report(tables['facebook'], tables['instagram'], tables['stories'], START, END)
+    for store in (MemoryStore(), DiskStore(str(tmp_path))):
+        for platform, df in tables.items():
+            store.save(platform, df)
+        snapshot = store.snapshot()
+        hot = [snapshot.load_range(platform, START, END) for platform in FILES]
+        assert not any(col in df.columns for df in hot for col in COLD_COLS)
+        report = engine.generate_report(*hot, START, END, cold=snapshot.attach_cold)
+        assert report == expected
+
+        board = engine.leaderboard(hot[1], 'reach', 3, cold=lambda rows: snapshot.attach_cold('instagram', rows))
+        assert all(record['permalink'] for record in board['top'] + board['bottom'])
+
+
+def test_disk_cold_columns_load_only_when_serializing(tmp_path, load_sample):
+    DiskStore(str(tmp_path)).save('instagram', load_sample('instagram'))
+    snapshot = DiskStore(str(tmp_path)).snapshot()
+    usage = snapshot.memory_usage('instagram')
+    assert usage['cold'] == {} and usage['cold_on_disk'] > 0
+
+    rows = snapshot.load('instagram').iloc[:2]
+    assert snapshot.attach_cold('instagram', rows)['permalink'].str.startswith('https://').all()
+    usage = snapshot.memory_usage('instagram')
+    assert usage['cold'] and set(usage['cold']) <= set(COLD_COLS)
@@ -0,0 +1,87 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from convert import FileConverter, _to_datetime
+from engine import ingest_file
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_sample_exports_convert_without_issues():
+    _, _, summary = ingest_file('facebook', os.path.join(ROOT, 'facebook.csv'), 'facebook.csv', chunk_rows=5)
+    assert summary['formats']['publish_time'] == '%m/%d/%Y %H:%M'
+    assert summary['issues'] == {}
+
+
+def test_date_format_is_sniffed_and_cached_across_chunks():
+    converter = FileConverter()
+    first = converter.dates('publish_time', pd.Series(['2026-01-28 10:15', '2026-02-03 08:00', '']))
+    assert converter.summary()['formats'] == {'publish_time': 'ISO8601'}
+    assert first.iloc[0] == pd.Timestamp('2026-01-28 10:15') and pd.isna(first.iloc[2])
+
+    second = converter.dates('publish_time', pd.Series(['2026-01-28 10:15', '2026-03-01T09:30:00+05:30']))
+    assert second.tolist() == [pd.Timestamp('2026-01-28 10:15'), pd.Timestamp('2026-03-01 09:30')]
+    assert len(converter._columns['publish_time'].cache) == 4
+    assert converter.summary()['issues']['publish_time']['blank'] == 1
+
+
+def test_fixed_width_layouts_match_strptime():
+    values = pd.Index(['01/28/2026 10:15', '1/5/2026 9:00', '', '13/01/2026 00:00', '02/30/2026 10:00', '12/31/2025 23:59'])
+    for fmt in ['%m/%d/%Y %H:%M', '%d/%m/%Y %H:%M']:
+        expected = pd.to_datetime(values, format=fmt, errors='coerce').to_numpy(dtype='datetime64[us]')
+        np.testing.assert_array_equal(_to_datetime(values, fmt), expected)
+
+
+def test_ambiguous_month_day_is_reported_until_settled():
+    converter = FileConverter()
+    converter.dates('publish_time', pd.Series(['01/02/2026 10:00', '03/04/2026 11:00', '05/05/2026 12:00']))
+    issue = converter.summary()['issues']['publish_time']
+    assert issue['ambiguous'] == 2 and issue['format'] == '%m/%d/%Y %H:%M'
+
+    # A later chunk with a day > 12 proves month-first: the earlier rows were read right
+    converter.dates('publish_time', pd.Series(['01/28/2026 09:00']))
+    assert 'publish_time' not in converter.summary()['issues']
+
+
+def test_day_first_files_are_detected():
+    converter = FileConverter()
+    values = converter.dates('publish_time', pd.Series(['28/01/2026 10:15', '03/02/2026 08:00']))
+    assert converter.summary()['formats']['publish_time'] == '%d/%m/%Y %H:%M'
+    assert values.tolist() == [pd.Timestamp('2026-01-28 10:15'), pd.Timestamp('2026-02-03 08:00')]
+    assert converter.summary()['issues'] == {}
+
+
+def test_unreadable_dates_fall_back_or_fail_with_examples():
+    converter = FileConverter()
+    values = converter.dates('publish_time', pd.Series(['01/28/2026 10:15', 'Jan 29 2026', 'soon', 'soon']))
+    assert values.iloc[1] == pd.Timestamp('2026-01-29') and pd.isna(values.iloc[2])
+    issue = converter.summary()['issues']['publish_time']
+    assert (issue['fallback'], issue['failed'], issue['examples']) == (1, 2, ['soon'])
+
+
+def test_number_text_is_converted_and_reported():
+    converter = FileConverter()
+    values = converter.numbers('reach', pd.Series(['1,234', '12', '', '1 500', 'n/a'], dtype='str'))
+    assert values.tolist() == [1234.0, 12.0, 0.0, 1500.0, 0.0]
+    issue = converter.summary()['issues']['reach']
+    assert issue['format'] == 'thousands'
+    assert (issue['blank'], issue['fallback'], issue['failed'], issue['examples']) == (1, 1, 1, ['n/a'])
+
+    # Numeric columns from the C parser only have blanks counted, which are not an issue
+    assert converter.numbers('likes', pd.Series([1.0, np.nan])).tolist() == [1.0, 0.0]
+    assert 'likes' not in converter.summary()['issues']
+
+
+def test_daily_dates_are_converted_and_reported(tmp_path):
+    raw = pd.read_csv(os.path.join(ROOT, 'facebook daily.csv'), dtype=str)
+    lifetime = raw.iloc[:1].assign(Date='Lifetime')
+    path = tmp_path / 'daily.csv'
+    pd.concat([raw, lifetime]).to_csv(path, index=False)
+    df, _, summary = ingest_file('facebook_daily', str(path), 'daily.csv', chunk_rows=50)
+    assert summary['formats']['date'] == '%m/%d/%Y'
+    assert pd.api.types.is_datetime64_any_dtype(df['date']) and int(df['date'].isna().sum()) == 1
+    assert (summary['issues']['date']['failed'], summary['issues']['date']['examples']) == (1, ['Lifetime'])
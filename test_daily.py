@@ -0,0 +1,98 @@
+import os
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from convert import FileConverter
+from daily import DAILY_TABLE, compact_daily, load_daily, merge_daily, time_series
+from engine import AnalyticsEngine
+from workspace import Workspace
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+PLATFORMS = ['facebook', 'instagram', 'stories']
+
+
+def _daily():
+    with open(os.path.join(ROOT, 'facebook daily.csv'), 'rb') as f:
+        return AnalyticsEngine().ingest('facebook_daily', f.read(), 'facebook daily.csv')
+
+
+def test_daily_rows_are_kept_per_post_and_day():
+    raw = pd.read_csv(os.path.join(ROOT, 'facebook daily.csv'), dtype={'Post ID': str})
+    df = _daily()
+    assert len(df) == len(raw) > raw['Post ID'].nunique()
+
+    table = compact_daily(df)
+    assert len(table) == len(raw)
+    assert isinstance(table['post_id'].dtype, pd.CategoricalDtype)
+    assert table['day'].dtype == 'int32'
+    assert table['likes'].dtype.itemsize <= 2
+    engine = AnalyticsEngine()
+    parsed = engine.normalize('facebook_daily', engine._read_csv('facebook_daily', os.path.join(ROOT, 'facebook daily.csv')))
+    assert table.memory_usage(deep=True).sum() < parsed.memory_usage(deep=True).sum() / 4
+
+
+def test_series_match_a_group_by():
+    raw = pd.read_csv(os.path.join(ROOT, 'facebook daily.csv'), dtype={'Post ID': str})
+    raw['day'] = pd.to_datetime(raw['Date']).dt.strftime('%Y-%m-%d')
+    table = compact_daily(_daily())
+
+    page = time_series(table, window=3)
+    expected = raw.groupby('day')['Reactions'].sum()
+    assert page['days'] == expected.index.tolist()
+    assert page['daily']['likes'] == expected.tolist()
+    assert page['rolling']['likes'] == expected.rolling(3, min_periods=1).sum().astype(int).tolist()
+    assert page['daily']['total_engagement'] == raw.groupby('day')['Reactions, comments and shares'].sum().tolist()
+
+    post_id = raw['Post ID'].iloc[0]
+    window = time_series(table, datetime(2026, 1, 27), datetime(2026, 1, 30), post_id=post_id)
+    one = raw[raw['Post ID'] == post_id].set_index('day')['Reactions']
+    assert window['days'] == ['2026-01-27', '2026-01-28', '2026-01-29', '2026-01-30']
+    assert window['daily']['likes'] == [0] + [int(one.get(d, 0)) for d in window['days'][1:]]
+    assert time_series(table, post_id='missing')['daily']['likes'] == []
+
+
+def test_append_upserts_and_survives_restart(tmp_path):
+    df = _daily()
+    table = compact_daily(df)
+    first, rest = compact_daily(df.iloc[:40]), compact_daily(df.iloc[30:])
+    edited = rest.copy()
+    edited['likes'] = edited['likes'].astype('int64') + 1000
+
+    ws = Workspace('brand', 'disk', str(tmp_path), PLATFORMS)
+    ws.write_table(DAILY_TABLE, lambda current: merge_daily(current, first))
+    ws.write_table(DAILY_TABLE, lambda current: merge_daily(current, edited))
+
+    stored = load_daily(Workspace('brand', 'disk', str(tmp_path), PLATFORMS).snapshot())
+    assert len(stored) == len(table)
+    assert isinstance(stored['post_id'].dtype, pd.CategoricalDtype)
+    assert int(stored['likes'].astype('int64').sum()) == int(table['likes'].astype('int64').sum()) + 1000 * len(rest)
+
+
+def test_rolling_sums_of_a_sub_range_include_the_days_before_it():
+    table = compact_daily(pd.DataFrame({
+        'post_id': ['p'] * 10,
+        'date': [f'01/{day:02d}/2026' for day in range(1, 11)],
+        'reach': [10] * 10,
+    }))
+    full = time_series(table, window=7)
+    assert full['rolling']['reach'][7] == 70
+    part = time_series(table, datetime(2026, 1, 8), datetime(2026, 1, 10), window=7)
+    assert part['days'] == full['days'][7:]
+    assert part['rolling']['reach'] == full['rolling']['reach'][7:]
+    assert part['daily']['reach'] == [10, 10, 10]
+
+
+def test_dates_are_read_per_value_and_unreadable_ones_reported():
+    converter = FileConverter()
+    table = compact_daily(pd.DataFrame({
+        'post_id': ['p'] * 4,
+        'date': ['01/28/2026', 'Lifetime', '2026-02-01', '02/03/2026'],
+        'reach': [1, 2, 3, 4],
+    }), converter)
+    assert time_series(table)['days'][::3] == ['2026-01-28', '2026-01-31', '2026-02-03']
+    assert table['reach'].tolist() == [1, 3, 4]
+    issues = converter.summary()['issues']['date']
+    assert (issues['format'], issues['failed'], issues['examples']) == ('%m/%d/%Y', 1, ['Lifetime'])
@@ -0,0 +1,176 @@
+import io
+import os
+import sys
+import zipfile
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from deck import deck_values, iter_archive, load_template, render_deck_files, report_deck_values
+from engine import AnalyticsEngine
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+FILES = {'facebook': 'facebook.csv', 'instagram': 'instagarm.csv', 'stories': 'instagarm story.csv'}
+START, END = datetime(2026, 1, 28), datetime(2026, 2, 3, 23, 59, 59)
+
+SLIDE = ('<p:sld xmlns:a="a" xmlns:p="p"><p:txBody>'
+         '<a:p><a:r><a:t>Date:</a:t></a:r></a:p>'
+         '<a:p><a:r><a:t>{{REPORT_</a:t></a:r><a:r><a:rPr b="1"/><a:t>DATE_RANGE}}</a:t></a:r></a:p>'
+         '<a:p><a:r><a:t>Reach {{IG_TOTAL_REACH}} ({{IG_TOTAL_REACH_CHANGE}})</a:t></a:r></a:p>'
+         '<a:p><a:r><a:t>{{IG_BEST_REACH_LINK}}</a:t></a:r></a:p>'
+         '<a:p><a:r><a:t>{{IG_FOLLOWER_GROWTH}}</a:t></a:r></a:p>'
+         '</p:txBody></p:sld>')
+
+
+def _template(path):
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('[Content_Types].xml', '<Types/>')
+        archive.writestr('ppt/slides/slide1.xml', SLIDE)
+        archive.writestr('ppt/slides/slide2.xml', '<p:sld><a:t>Index</a:t></p:sld>')
+        archive.writestr('ppt/media/image1.png', b'\x89PNG' + bytes(64))
+    return str(path)
+
+
+# Shaped like "Westside Weekly Report - TEMPLATE.pptx" (ppt_analysis.txt): last week's numbers as
+# literal text, split over runs, cells and paragraphs as PowerPoint writes them
+def _p(*runs):
+    return '<a:p>' + ''.join(f'<a:r><a:rPr lang="en-US"/><a:t>{run}</a:t></a:r>' for run in runs) + '</a:p>'
+
+
+def _tbl(*rows):
+    cells = lambda row: ''.join('<a:tc><a:txBody>' + ''.join(_p(t) for t in cell.split('\n')) + '</a:txBody></a:tc>' for cell in row)
+    return '<a:tbl>' + ''.join(f'<a:tr h="1">{cells(row)}</a:tr>' for row in rows) + '</a:tbl>'
+
+
+def _slide(*shapes):
+    return '<p:sld xmlns:a="a" xmlns:p="p"><p:cSld><p:txBody>' + ''.join(shapes) + '</p:txBody></p:cSld></p:sld>'
+
+
+REAL_SLIDES = {
+    1: _slide(_p('Weekly Report'), _p('Date:'), _p('14th Jan- 20th Jan 2026')),
+    7: _slide(_p('Followers Growth'), _p('{{IG_FOLLOWER_GROWTH}}'), _p('Date:'), _p('{{REPORT_DATE_RANGE}}')),
+    8: _slide(_p('Instagram')),
+    9: _slide(_p('Instagram Page Analysis Summary'), _tbl(
+        ['Particulars', '7th Jan- 13th Jan\n(Previous Week)', '14th Jan- 20th Jan\n(Current Week)', 'Growth'],
+        ['Instagram Posts | Stories', '12|44', '9|42', '-3|-2'],
+        ['Page Followers', '978,756', '982,377', '+3,621'],
+        ['Total Reach', '2,340,187', '4,758,134', '+2,417,947'],
+        ['Engagement Rate without Video Views', '1.8%', '1.3%', ''])),
+    10: _slide(_p('Month on Month Follower Growth Chart (Instagram)'), _p('Date: 1st  Jan- 20th  Dec 2026')),
+    19: _slide(_p('Best Performing Post on the basis of Reach'), _p('Inference:'),
+               _p('The Sale period generated significant excitement.'),
+               _p('Reach: ', '3,045,916'), _p('Eng. Rate w/o VV: 1.43%'), _p('Date:      14th Jan- 20th Jan 2026')),
+    23: _slide(_p('Facebook')),
+    24: _slide(_p('Facebook Page Analysis Summary'), _tbl(
+        ['Posts | Stories', '9|44', '9|43', '0|\n-1'],
+        ['Total Reach', '248,496', '287,227', '+38,731'])),
+    30: _slide(_p('Least Performing Post Basis Reach'), _p('Reach: 2,395'), _p('Date:      14th Jan- 20th Jan 2026')),
+}
+
+
+def _real_template(path):
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('[Content_Types].xml', '<Types/>')
+        for number, xml in REAL_SLIDES.items():
+            archive.writestr(f'ppt/slides/slide{number}.xml', xml)
+    return str(path)
+
+
+def _values(extra=None):
+    engine = AnalyticsEngine()
+    tables = {}
+    for platform, filename in FILES.items():
+        with open(os.path.join(ROOT, filename), 'rb') as f:
+            tables[platform] = engine.ingest(platform, f.read(), filename)
+    return report_deck_values(engine, tables['facebook'], tables['instagram'], tables['stories'],
+                              START, END, extra=extra)
+
+
+def test_template_is_parsed_once_and_split_placeholders_are_found(tmp_path):
+    path = _template(tmp_path / 'template.pptx')
+    template = load_template(path)
+    assert load_template(path) is template
+    assert template.placeholders == {'REPORT_DATE_RANGE', 'IG_TOTAL_REACH', 'IG_TOTAL_REACH_CHANGE',
+                                     'IG_BEST_REACH_LINK', 'IG_FOLLOWER_GROWTH'}
+
+    # A changed file is parsed again
+    with zipfile.ZipFile(path, 'a') as archive:
+        archive.writestr('ppt/slides/slide3.xml', '<p:sld><a:t>{{FB_POSTS}}</a:t></p:sld>')
+    assert 'FB_POSTS' in load_template(path).placeholders
+
+
+def test_rendered_deck_has_the_report_values(tmp_path):
+    template = load_template(_template(tmp_path / 'template.pptx'))
+    values = _values(extra={'IG_FOLLOWER_GROWTH': '+3,621 & counting'})
+    deck = zipfile.ZipFile(io.BytesIO(b''.join(template.render(values))))
+
+    assert deck.namelist() == ['[Content_Types].xml', 'ppt/slides/slide1.xml', 'ppt/slides/slide2.xml',
+                               'ppt/media/image1.png']
+    assert deck.getinfo('ppt/media/image1.png').compress_type == zipfile.ZIP_STORED
+    slide = deck.read('ppt/slides/slide1.xml').decode('utf-8')
+    assert '{{' not in slide
+    assert '<a:t>28th Jan- 3rd Feb 2026</a:t></a:r><a:r><a:rPr b="1"/><a:t></a:t>' in slide
+    assert f"Reach {values['IG_TOTAL_REACH']} ({values['IG_TOTAL_REACH_CHANGE']})" in slide
+    assert '+3,621 &amp; counting' in slide
+    assert values['IG_BEST_REACH_LINK'].startswith('https://')
+
+
+def test_deck_values_compare_with_the_previous_week():
+    report = {
+        'period': {'start': '2025-12-29', 'end': '2026-01-04'},
+        'aggregated': {p: {'total_reach': 1500, 'total_engagement': 90, 'total_views': 40,
+                           'interactions_wo_views': 50, 'average_interaction': 12.5,
+                           'eng_rate_with_views': 6.0, 'eng_rate_wo_views': 3.333, 'video_view_rate': 2.67}
+                       for p in ('facebook', 'instagram')},
+        'facebook': {'stats': {'total_posts': 4}, 'rankings': dict.fromkeys(['best_reach', 'least_reach', 'best_engagement', 'least_engagement'])},
+        'instagram': {'stats': {'total_posts': 4}, 'rankings': dict.fromkeys(['best_reach', 'least_reach', 'best_engagement', 'least_engagement'])},
+        'stories': {'stats': {'total_stories': 0, 'total_views': 0, 'total_reach': 0, 'total_interactions': 0}, 'data': []}
+    }
+    previous = {**report, 'period': {'start': '2025-12-22', 'end': '2025-12-28'},
+                'aggregated': {p: dict(report['aggregated'][p], total_reach=2000) for p in ('facebook', 'instagram')}}
+    values = deck_values(report, previous)
+    assert values['REPORT_DATE_RANGE'] == '29th Dec 2025- 4th Jan 2026'
+    assert values['PREV_DATE_RANGE'] == '22nd Dec- 28th Dec 2025'
+    assert (values['IG_TOTAL_REACH'], values['PREV_IG_TOTAL_REACH'], values['IG_TOTAL_REACH_CHANGE']) == ('1,500', '2,000', '-500')
+    assert values['FB_ENG_RATE_WO_VIEWS'] == '3.33%'
+    assert values['IG_BEST_REACH_LINK'] == '' and values['IG_BEST_STORY_REACH'] == ''
+
+
+def test_batch_renders_every_deck_into_one_archive(tmp_path):
+    path = _template(tmp_path / 'template.pptx')
+    jobs = [(path, {'REPORT_DATE_RANGE': f'week {i}'}, str(tmp_path / f'{i}.pptx')) for i in range(3)]
+    paths = render_deck_files(jobs, workers=2)
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(iter_archive([(f'deck_{i}.pptx', p) for i, p in enumerate(paths)]))))
+    for i in range(3):
+        deck = zipfile.ZipFile(io.BytesIO(archive.read(f'deck_{i}.pptx')))
+        assert f'week {i}' in deck.read('ppt/slides/slide1.xml').decode('utf-8')
+
+
+def test_literal_numbers_of_the_real_template_are_filled(tmp_path):
+    template = load_template(_real_template(tmp_path / 'real.pptx'))
+    assert {'PREV_DATE_RANGE', 'REPORT_DATE_RANGE', 'PREV_IG_TOTAL_REACH', 'IG_TOTAL_REACH', 'IG_TOTAL_REACH_CHANGE',
+            'IG_POSTS', 'IG_STORIES', 'IG_ENG_RATE_WO_VIEWS', 'IG_BEST_REACH_REACH', 'IG_BEST_REACH_ENG_RATE',
+            'FB_POSTS_CHANGE', 'FB_STORIES_CHANGE', 'FB_TOTAL_REACH', 'FB_LEAST_REACH_REACH'} <= template.placeholders
+    assert 'IG_ENG_RATE_WO_VIEWS_CHANGE' not in template.placeholders
+
+    values = _values(extra={'IG_FOLLOWER_GROWTH': '+3,621'})
+    deck = zipfile.ZipFile(io.BytesIO(b''.join(template.render(values))))
+    text = {n: deck.read(f'ppt/slides/slide{n}.xml').decode('utf-8') for n in REAL_SLIDES}
+    rendered = ''.join(text.values())
+    for stale in ('14th Jan- 20th Jan', '7th Jan- 13th Jan', '2,340,187', '4,758,134', '+2,417,947', '12|44',
+                  '3,045,916', '1.43%', '287,227', '2,395', '>-1<'):
+        assert stale not in rendered
+    assert rendered.count(values['REPORT_DATE_RANGE']) == 5
+    assert f"<a:t>{values['PREV_IG_TOTAL_REACH']}</a:t>" in text[9] and '(Previous Week)' in text[9]
+    assert f"<a:t>{values['IG_POSTS']}|{values['IG_STORIES']}</a:t>" in text[9]
+    assert f"<a:t>Reach: </a:t></a:r><a:r><a:rPr lang=\"en-US\"/><a:t>{values['IG_BEST_REACH_REACH']}</a:t>" in text[19]
+    assert f"Reach: {values['FB_LEAST_REACH_REACH']}" in text[30]
+    # Month-on-month charts keep their own range; inferences stay as written
+    assert 'Date: 1st  Jan- 20th  Dec 2026' in text[10]
+    assert 'The Sale period generated significant excitement.' in text[19]
+
+    # Hand-counted numbers stay visible as placeholders; values with no place in the deck are reported
+    assert template.placeholders - set(values) == {'PREV_IG_FOLLOWERS', 'IG_FOLLOWERS', 'IG_FOLLOWERS_CHANGE',
+                                                    'PREV_FB_STORIES', 'FB_STORIES', 'FB_STORIES_CHANGE'}
+    assert '{{IG_FOLLOWERS}}' in text[9] and '978,756' not in text[9]
+    assert 'IG_BEST_ENGAGEMENT_LIKES' in template.unused(values)
+    assert 'IG_TOTAL_REACH' not in template.unused(values)
@@ -0,0 +1,106 @@
+import csv
+import io
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import openpyxl
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from engine import AnalyticsEngine
+from export import SHEET_LAYOUTS, XLSX_MAX_ROWS, ExportSheet, iter_csv, iter_xlsx, report_sheets
+from store import MemoryStore
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+FILES = {'facebook': 'facebook.csv', 'instagram': 'instagarm.csv', 'stories': 'instagarm story.csv'}
+START, END = datetime(2026, 1, 28), datetime(2026, 2, 4, 23, 59, 59)
+WEEK = '2026-01-28 to 2026-02-04'
+
+
+def _setup():
+    engine = AnalyticsEngine()
+    store = MemoryStore()
+    for platform, filename in FILES.items():
+        with open(os.path.join(ROOT, filename), 'rb') as f:
+            store.save(platform, engine.ingest(platform, f.read(), filename))
+    snapshot = store.snapshot()
+    tables = {p: engine.slice_range(snapshot.load_range(p, START, END), START, END) for p in FILES}
+    report = engine.generate_report(tables['facebook'], tables['instagram'], tables['stories'], START, END,
+                                    cold=snapshot.attach_cold)
+    return snapshot, tables, report
+
+
+def test_xlsx_sheets_follow_the_apps_script_layout():
+    snapshot, tables, report = _setup()
+    sheets = report_sheets(report['aggregated'], tables, WEEK, cold=snapshot.attach_cold, batch_rows=4)
+    book = openpyxl.load_workbook(io.BytesIO(b''.join(iter_xlsx(sheets))))
+    assert book.sheetnames == ['Particulars', 'Instagram', 'Instagram stories', 'Facebook']
+    assert [c.value for c in book['Particulars']['B'][1:3]] == [
+        report['aggregated']['instagram']['total_reach'], report['aggregated']['instagram']['total_engagement']]
+
+    posts = report['instagram']['posts']
+    sheet = book['Instagram']
+    rows = list(sheet.iter_rows(values_only=True))
+    assert list(rows[0]) == SHEET_LAYOUTS['instagram_posts']['headers'] + ['Post ID']
+    assert len(rows) == len(posts) + 2
+    assert rows[1][0] == WEEK and rows[2][0] is None
+    assert [r[-1] for r in rows[1:-1]] == [p['post_id'] for p in posts]
+    assert [r[10] for r in rows[1:-1]] == [p['reach'] for p in posts]
+    assert [r[14] for r in rows[1:-1]] == [p['permalink'] for p in posts]
+    assert rows[-1][3] == 'Total' and rows[-1][10] == f'=SUM(K2:K{len(posts) + 1})'
+    assert sheet['A1'].font.b and sheet['A1'].fill.fgColor.rgb == 'FFFF9900'
+
+
+def test_csv_totals_match_the_report():
+    snapshot, tables, report = _setup()
+    sheets = report_sheets(report['aggregated'], tables, WEEK, cold=snapshot.attach_cold, batch_rows=4)
+    lines = list(csv.reader(io.StringIO(b''.join(iter_csv(sheets, [['Report Period', WEEK]])).decode('utf-8'))))
+    assert lines[0] == ['Report Period', WEEK]
+
+    start = lines.index(['FACEBOOK']) + 1
+    block = lines[start:start + len(report['facebook']['posts']) + 2]
+    assert block[-1][3] == 'Total'
+    assert int(block[-1][4]) == report['facebook']['stats']['total_reach']
+    assert [row[-1] for row in block[1:-1]] == [p['post_id'] for p in report['facebook']['posts']]
+
+    start = lines.index(['INSTAGRAM STORIES']) + 1
+    stories = report['stories']['data']
+    assert [row[2] for row in lines[start + 1:start + 1 + len(stories)]] == [s['publish_time'] for s in stories]
+
+
+def test_rows_are_read_only_as_the_download_progresses():
+    snapshot, tables, report = _setup()
+    batches = []
+
+    def cold(platform, rows):
+        batches.append(len(rows))
+        return snapshot.attach_cold(platform, rows)
+
+    chunks = iter_xlsx(report_sheets(report['aggregated'], tables, WEEK, cold=cold, batch_rows=4))
+    assert next(chunks).startswith(b'PK') and batches == []
+    for _ in chunks:
+        pass
+    assert max(batches) == 4 and sum(batches) == sum(len(df) for df in tables.values())
+
+
+def test_xlsx_keeps_text_as_text():
+    text = ['Diwali ✨ offer – 50% off', '=HYPERLINK("http://evil.example")', '+1 <b>&amp;</b>', 'bell\x07']
+    sheet = ExportSheet('Notes', ['Text', 'Reach'], iter([[text, np.arange(4)]]), rows=4)
+    ws = openpyxl.load_workbook(io.BytesIO(b''.join(iter_xlsx([sheet]))))['Notes']
+    assert [ws.cell(row, 1).value for row in range(2, 6)] == text[:3] + ['bell']
+    # A leading '=' is stored as an inline string, never as a formula
+    assert ws['A3'].data_type == 's'
+
+
+def test_xlsx_refuses_sheets_past_the_row_limit():
+    def never():
+        raise AssertionError('rows read')
+        yield
+
+    fits = ExportSheet('Instagram', ['Week'], iter([]), rows=XLSX_MAX_ROWS - 2)
+    too_many = ExportSheet('Facebook', ['Week'], never(), rows=XLSX_MAX_ROWS - 1)
+    iter_xlsx([fits])
+    with pytest.raises(ValueError, match="Sheet 'Facebook' has 1,048,575 rows"):
+        iter_xlsx([fits, too_many])
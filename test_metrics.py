@@ -0,0 +1,52 @@
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+import metrics
+from engine import AnalyticsEngine, ingest_file
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _count(stage):
+    line = next((l for l in metrics.registry.render().splitlines()
+                 if l.startswith(f'engine_stage_seconds_count{{stage="{stage}"}}')), None)
+    return int(line.split()[-1]) if line else 0
+
+
+def test_engine_stages_are_timed_and_collected():
+    engine = AnalyticsEngine()
+    with open(os.path.join(ROOT, 'instagarm.csv'), 'rb') as f:
+        contents = f.read()
+    before = _count('clean')
+    with metrics.collect() as spans:
+        df = engine.ingest('instagram', contents, 'instagarm.csv')
+        engine.generate_report(df, df.iloc[0:0], df.iloc[0:0], datetime(2026, 1, 1), datetime(2026, 3, 1))
+    stages = [stage for stage, _ in spans]
+    for stage in ['parse', 'clean', 'dedup', 'filter', 'aggregate', 'rank', 'serialize']:
+        assert stage in stages
+    assert _count('clean') == before + 1
+
+    header = metrics.server_timing(spans, total=0.5)
+    assert header.startswith('parse;dur=') and header.endswith('total;dur=500.00')
+
+
+def test_worker_spans_are_deferred_until_replayed():
+    before = _count('parse')
+    df, spans, _ = ingest_file('stories', os.path.join(ROOT, 'instagarm story.csv'), 'story.csv', chunk_rows=10)
+    assert len(df) > 0 and any(stage == 'parse' for stage, _ in spans)
+    assert _count('parse') == before
+    metrics.replay(spans)
+    assert _count('parse') == before + sum(stage == 'parse' for stage, _ in spans)
+
+
+def test_histogram_renders_cumulative_buckets():
+    hist = metrics.Histogram('demo_seconds', 'Demo.', ['route'], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        hist.observe(('/x',), value)
+    lines = hist.render()
+    assert 'demo_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{route="/x",le="1.0"} 2' in lines
+    assert 'demo_seconds_bucket{route="/x",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{route="/x"} 3' in lines
@@ -0,0 +1,49 @@
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from engine import AnalyticsEngine, period_buckets
+from rollup import DailyRollup
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _tables():
+    engine = AnalyticsEngine()
+    tables = {}
+    for platform, filename in [('facebook', 'facebook.csv'), ('instagram', 'instagarm.csv'), ('stories', 'instagarm story.csv')]:
+        with open(os.path.join(ROOT, filename), 'rb') as f:
+            tables[platform] = engine.ingest(platform, f.read(), filename)
+    return tables
+
+
+def test_period_buckets():
+    weeks = period_buckets(datetime(2026, 1, 28), datetime(2026, 2, 10), 'week')
+    assert [(s.date().isoformat(), e.date().isoformat()) for s, e in weeks] == [
+        ('2026-01-28', '2026-02-01'), ('2026-02-02', '2026-02-08'), ('2026-02-09', '2026-02-10')
+    ]
+    assert weeks[-1][1] == datetime(2026, 2, 10, 23, 59, 59)
+    months = period_buckets(datetime(2025, 12, 15), datetime(2026, 2, 3), 'month')
+    assert [s.month for s, _ in months] == [12, 1, 2]
+    assert len(period_buckets(datetime(2026, 1, 1), datetime(2026, 1, 31), 'day')) == 31
+
+
+def test_batch_matches_per_period_reports():
+    engine = AnalyticsEngine()
+    t = _tables()
+    rollups = {platform: DailyRollup.build(df) for platform, df in t.items()}
+    periods = period_buckets(datetime(2026, 1, 20), datetime(2026, 2, 10), 'day')
+    periods += [(datetime(2026, 1, 28), datetime(2026, 2, 3, 23, 59, 59)),   # overlapping week
+                (datetime(2026, 1, 29, 12, 0), datetime(2026, 1, 30, 8, 0))]   # partial days
+
+    for use_rollups in (None, rollups):
+        batch = engine.generate_period_reports(t['facebook'], t['instagram'], t['stories'], periods,
+                                               manual_fb_views=250, rollups=use_rollups)
+        for (start, end), got in zip(periods, batch):
+            want = engine.generate_report(t['facebook'], t['instagram'], t['stories'], start, end,
+                                          manual_fb_views=250, rollups=use_rollups)
+            assert got['period'] == want['period']
+            assert got['aggregated'] == want['aggregated']
+            for section in ('facebook', 'instagram', 'stories'):
+                assert got[section]['stats'] == want[section]['stats']
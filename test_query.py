@@ -0,0 +1,97 @@
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from query import PostIndex, parse_where
+from store import MemoryStore
+
+
+def _table(rows=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    times = pd.to_datetime('2025-10-01') + pd.to_timedelta(np.sort(rng.integers(0, 150 * 24 * 60, rows)), unit='min')
+    times = np.array(times.to_numpy())
+    times[-min(20, rows // 5):] = np.datetime64('NaT')
+    rate = rng.random(rows)
+    rate[::50] = np.nan
+    return pd.DataFrame({
+        'post_id': np.arange(rows, dtype='int64'),
+        'publish_time': times,
+        'post_type': pd.Categorical(rng.choice(['IG reel', 'IG carousel', 'IG image'], rows, p=[0.6, 0.3, 0.1])),
+        'reach': rng.integers(0, 50_000, rows).astype('uint32'),
+        'saves': rng.integers(0, 300, rows).astype('uint16'),
+        'engagement_rate_reach': rate,
+    })
+
+
+def _brute(df, start=None, end=None, post_types=None, where=None, sort=None, descending=True, limit=None):
+    mask = pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= df['publish_time'] >= start
+    if end is not None:
+        mask &= df['publish_time'] <= end
+    if post_types:
+        mask &= df['post_type'].astype(str).str.lower().isin([t.lower() for t in post_types])
+    for col, (lo, lo_inc, hi, hi_inc) in (where or {}).items():
+        mask &= (df[col] >= lo) if lo_inc else (df[col] > lo)
+        mask &= (df[col] <= hi) if hi_inc else (df[col] < hi)
+    hits = df[mask]
+    if sort is not None:
+        keys = hits[sort].astype('float64')
+        hits = hits.assign(_k=-keys if descending else keys).sort_values('_k', kind='mergesort', na_position='last')
+    return hits['post_id'].tolist()[:limit], int(mask.sum())
+
+
+def test_index_plans_match_a_full_scan():
+    df = _table()
+    index = PostIndex(df)
+    cases = [
+        dict(post_types=['ig reel'], where=parse_where(['reach>20000', 'saves>100']),
+             start=datetime(2026, 1, 1), end=datetime(2026, 1, 31, 23, 59, 59), sort='engagement_rate_reach'),
+        dict(where=parse_where(['reach>=49000']), sort='saves', descending=False, limit=7),
+        dict(post_types=['IG IMAGE', 'missing'], sort='reach', limit=25),
+        dict(start=datetime(2026, 2, 1), where=parse_where(['saves=42'])),
+        dict(end=datetime(2025, 10, 3)),
+        dict(where=parse_where(['engagement_rate_reach<0.01']), sort='engagement_rate_reach'),
+        dict(where=parse_where(['reach<0'])),
+        dict(where=parse_where(['reach>=0', 'reach<=1000000']), limit=3),
+    ]
+    for case in cases:
+        positions, count, scanned = index.query(**case)
+        expected, expected_count = _brute(df, **case)
+        assert df['post_id'].to_numpy()[positions].tolist() == expected
+        assert count == expected_count and count <= scanned <= len(df)
+
+
+def test_selective_filter_scans_only_its_candidates():
+    df = _table(rows=20000)
+    index = PostIndex(df)
+    _, count, scanned = index.query(post_types=['IG reel'], where=parse_where(['reach>49900']))
+    assert scanned == (df['reach'] > 49900).sum() and count < scanned < len(df) / 100
+
+    # Predicates no row can fail cost nothing; ones no row can pass return at once
+    assert index.query(where=parse_where(['saves<1000']))[2] == len(df)
+    assert index.query(where=parse_where(['saves>1000']))[1:] == (0, 0)
+
+
+def test_where_parsing_and_errors():
+    assert parse_where(['reach>10', 'reach>=20', 'reach<100', 'saves=5']) == {
+        'reach': (20.0, True, 100.0, False), 'saves': (5.0, True, 5.0, True)}
+    with pytest.raises(ValueError, match="Invalid filter"):
+        parse_where(['reach=>10'])
+    with pytest.raises(ValueError, match="Unknown column 'description'"):
+        PostIndex(_table(rows=10)).query(sort='description')
+
+
+def test_snapshot_keeps_one_index_per_version():
+    store = MemoryStore()
+    store.save('instagram', _table(rows=100))
+    snapshot = store.snapshot()
+    index = snapshot.derived(('posts', 'instagram'), lambda: PostIndex(snapshot.load('instagram')))
+    assert snapshot.derived(('posts', 'instagram'), lambda: None) is index
+    store.save('instagram', _table(rows=50, seed=1))
+    assert store.snapshot().derived(('posts', 'instagram'), lambda: 'rebuilt') == 'rebuilt'
@@ -0,0 +1,56 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from engine import AnalyticsEngine, top_k_positions
+
+
+def test_top_k_matches_a_stable_sort():
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 50, size=1000).astype(float)
+    values[::97] = np.nan
+    for k in (1, 5, 50, 1000, 2000):
+        expected_top = pd.Series(-values).sort_values(kind='mergesort', na_position='last').index[:k]
+        expected_bottom = pd.Series(values).sort_values(kind='mergesort', na_position='last').index[:k]
+        assert top_k_positions(values, k).tolist() == expected_top.tolist()
+        assert top_k_positions(values, k, largest=False).tolist() == expected_bottom.tolist()
+
+
+def test_rankings_and_leaderboard():
+    engine = AnalyticsEngine()
+    df = engine.normalize('instagram', pd.DataFrame({
+        'Post ID': ['a', 'b', 'c', 'd'],
+        'Publish time': ['2026-01-01 10:00'] * 4,
+        'Reach': [0, 300, 20, 300],
+        'Likes': [5, 1, 40, 2],
+    }))
+
+    rankings = engine._get_rankings(df)
+    assert rankings['best_reach']['post_id'] == 'b'       # tie -> earlier row
+    assert rankings['least_reach']['post_id'] == 'c'      # zero reach ignored
+    assert rankings['best_engagement']['post_id'] == 'c'
+    assert rankings['least_engagement']['post_id'] == 'b'
+
+    board = engine.leaderboard(df, 'engagement_rate_reach', n=2)
+    assert [p['post_id'] for p in board['top']] == ['c', 'd']
+    assert [p['post_id'] for p in board['bottom']] == ['a', 'b']
+    assert board['top'][0]['value'] == pytest.approx(2.0)
+
+    with pytest.raises(ValueError):
+        engine.leaderboard(df, 'description')
+
+
+def test_ids_are_not_metrics():
+    engine = AnalyticsEngine()
+    df = engine.combine([engine.normalize('instagram', pd.DataFrame({
+        'Post ID': ['17', '4', '9'], 'Publish time': ['2026-01-01 10:00'] * 3, 'Reach': [1, 2, 3]}))], 'instagram')
+    assert df['post_id'].dtype == 'int64'
+    with pytest.raises(ValueError, match="Unknown metric 'post_id'") as error:
+        engine.leaderboard(df, 'post_id')
+    assert 'post_id' not in str(error.value).split('Expected')[1] and 'reach' in str(error.value)
+    with pytest.raises(ValueError, match="Unknown sort column 'post_id'"):
+        engine.page_positions(df, sort='post_id')
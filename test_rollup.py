@@ -0,0 +1,40 @@
+import os
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from engine import AnalyticsEngine
+from rollup import DailyRollup
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _stories():
+    with open(os.path.join(ROOT, 'instagarm story.csv'), 'rb') as f:
+        return AnalyticsEngine().ingest('stories', f.read(), 'story.csv')
+
+
+def test_prefix_totals_match_a_full_scan():
+    engine = AnalyticsEngine()
+    df = _stories()
+    rollup = DailyRollup.build(df)
+
+    for start, end in [((2026, 1, 28), (2026, 1, 28)), ((2026, 1, 29), (2026, 2, 2)), ((2025, 1, 1), (2027, 1, 1))]:
+        start, end = datetime(*start), datetime(*end, 23, 59, 59)
+        assert rollup.totals(start, end) == engine._totals(engine.slice_range(df, start, end))
+
+
+def test_incremental_add_and_remove():
+    df = pd.DataFrame({
+        'publish_time': pd.to_datetime(['2026-01-10 09:00', '2026-01-12 18:30']),
+        'reach': [100, 50],
+    })
+    rollup = DailyRollup.build(df.iloc[:1])
+    rollup.add(df.iloc[1:])           # extends the day range forwards
+    assert rollup.totals(datetime(2026, 1, 1), datetime(2026, 1, 31))['reach'] == 150
+
+    rollup.add(df.iloc[:1], sign=-1)
+    totals = rollup.totals(datetime(2026, 1, 1), datetime(2026, 1, 31))
+    assert (totals['reach'], totals['posts']) == (50, 1)
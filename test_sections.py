@@ -0,0 +1,92 @@
+import os
+import sys
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+import metrics
+from engine import AnalyticsEngine, resolve_sections
+from rollup import DailyRollup
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+FILES = {'facebook': 'facebook.csv', 'instagram': 'instagarm.csv', 'stories': 'instagarm story.csv'}
+START, END = datetime(2020, 1, 1), datetime(2030, 12, 31, 23, 59, 59)
+
+
+def _tables():
+    engine = AnalyticsEngine()
+    tables = []
+    for platform, filename in FILES.items():
+        with open(os.path.join(ROOT, filename), 'rb') as f:
+            tables.append(engine.ingest(platform, f.read(), filename))
+    return engine, tables
+
+
+def test_kpi_only_report_skips_rankings_and_rows():
+    engine, tables = _tables()
+    full = engine.generate_report(*tables, START, END)
+    with metrics.collect() as spans:
+        kpis = engine.generate_report(*tables, START, END, include=['aggregated', 'facebook.stats'])
+    assert kpis == {'period': full['period'], 'aggregated': full['aggregated'],
+                    'facebook': {'stats': full['facebook']['stats']}}
+    assert not {'rank', 'serialize'} & {stage for stage, _ in spans}
+
+    assert resolve_sections(['stories', 'aggregated']) == ['stories.stats', 'stories.data', 'aggregated']
+    with pytest.raises(ValueError, match="Unknown section 'posts'"):
+        resolve_sections(['posts'])
+
+
+def test_fields_project_rows_and_skip_cold_columns():
+    engine, tables = _tables()
+    calls = []
+
+    def cold(platform, rows):
+        calls.append(platform)
+        return rows
+
+    report = engine.generate_report(*tables, START, END, cold=cold, include=['instagram.posts', 'stories.data'],
+                                    fields=['post_id', 'reach', 'replies'])
+    assert set(report['instagram']['posts'][0]) == {'post_id', 'reach'}
+    assert set(report['stories']['data'][0]) == {'post_id', 'reach', 'replies'}
+    assert calls == []
+    with pytest.raises(ValueError, match="Unknown field 'bogus'"):
+        engine.generate_report(*tables, START, END, include=['instagram.posts'], fields=['bogus'])
+
+
+def test_pages_walk_the_sorted_list():
+    engine, tables = _tables()
+    posts = engine.generate_report(*tables, START, END, include=['instagram.posts'])['instagram']['posts']
+    expected = [p['post_id'] for p in sorted(posts, key=lambda p: -p['total_engagement'])]
+
+    seen, offset = [], 0
+    while offset is not None:
+        report = engine.generate_report(*tables, START, END, include=['instagram.posts'],
+                                        sort='total_engagement', offset=offset, limit=4)
+        page = report['pages']['instagram.posts']
+        assert page['total'] == len(posts) and len(report['instagram']['posts']) <= 4
+        seen += [p['post_id'] for p in report['instagram']['posts']]
+        offset = page['next_offset']
+    assert seen == expected
+
+    oldest = engine.generate_report(*tables, START, END, include=['instagram.posts'], sort='publish_time',
+                                    descending=False, limit=1)['instagram']['posts']
+    assert oldest == posts[:1]
+    with pytest.raises(ValueError, match="Unknown sort column 'description'"):
+        engine.generate_report(*tables, START, END, include=['instagram.posts'], sort='description', limit=1)
+
+
+def test_kpi_only_report_reads_no_rows_when_rollups_cover_it():
+    engine, tables = _tables()
+    rollups = dict(zip(FILES, (DailyRollup.build(df) for df in tables)))
+    kpis = ['aggregated', 'facebook.stats', 'instagram.stats', 'stories.stats']
+    assert engine.row_platforms(START, END, rollups, kpis) == []
+    assert engine.row_platforms(START, END, None, kpis) == ['facebook', 'instagram', 'stories']
+    assert engine.row_platforms(START, datetime(2026, 1, 31, 12), rollups, kpis) == ['facebook', 'instagram', 'stories']
+    assert engine.row_platforms(START, END, rollups, ['aggregated', 'instagram.posts', 'facebook.rankings']) == \
+        ['facebook', 'instagram']
+
+    empty = [pd.DataFrame()] * 3
+    assert engine.generate_report(*empty, START, END, rollups=rollups, include=kpis) == \
+        engine.generate_report(*tables, START, END, include=kpis)
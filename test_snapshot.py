@@ -0,0 +1,57 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from workspace import DEFAULT_ACCOUNT, Workspace, WorkspaceRegistry
+
+PLATFORMS = ['facebook', 'instagram', 'stories']
+
+
+def test_pinned_snapshot_ignores_later_writes(tmp_path, load_sample):
+    ig = load_sample('instagram')
+    for backend, path in (('memory', None), ('disk', str(tmp_path))):
+        ws = Workspace('brand', backend, path, PLATFORMS)
+        ws.write('instagram', ig, 'replace')
+        pinned = ws.snapshot()
+        totals = pinned.rollups['instagram'].daily['reach'].sum()
+
+        edited = ig.copy()
+        edited['reach'] = edited['reach'] + 1
+        ws.write('instagram', edited, 'append')
+        ws.write('instagram', ig.iloc[:3], 'replace')
+        ws.clear()
+
+        assert pinned.count('instagram') == len(ig)
+        assert pinned.load('instagram')['reach'].sum() == ig['reach'].sum()
+        assert pinned.rollups['instagram'].daily['reach'].sum() == totals
+        assert ws.snapshot().version == pinned.version + 3
+        assert ws.snapshot().count('instagram') == 0
+
+
+def test_workers_sharing_a_store_see_each_others_versions(tmp_path, load_sample):
+    ig = load_sample('instagram')
+    worker_a = WorkspaceRegistry('disk', str(tmp_path), PLATFORMS)
+    worker_b = WorkspaceRegistry('disk', str(tmp_path), PLATFORMS)
+
+    worker_a.get(DEFAULT_ACCOUNT).write('instagram', ig, 'replace')
+    snapshot = worker_b.get(DEFAULT_ACCOUNT).snapshot()
+    assert snapshot.count('instagram') == len(ig)
+    assert snapshot.version == worker_a.get(DEFAULT_ACCOUNT).version
+
+    # B appends on top of A's version rather than its own stale one
+    worker_b.get(DEFAULT_ACCOUNT).write('instagram', ig.iloc[[0]].assign(post_id='new-post'), 'append')
+    assert worker_a.get(DEFAULT_ACCOUNT).snapshot().count('instagram') == len(ig) + 1
+
+    worker_a.get('brand-x', create=True).write('stories', load_sample('stories'), 'replace')
+    assert 'brand-x' in worker_b.names()
+    assert worker_b.get('brand-x').snapshot().count('stories') > 0
+
+
+def test_superseded_partitions_are_removed(tmp_path, load_sample):
+    ig = load_sample('instagram')
+    ws = Workspace('brand', 'disk', str(tmp_path), PLATFORMS)
+    for _ in range(4):
+        ws.write('instagram', ig, 'replace')
+
+    versions = {name.rsplit('.', 1)[1] for name in os.listdir(tmp_path / 'instagram')}
+    assert versions == {str(ws.version - 1), str(ws.version)}
@@ -0,0 +1,103 @@
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from store import DiskStore, MemoryStore
+
+
+def _same_rows(a, b):
+    a = a.sort_values('post_id').reset_index(drop=True)
+    b = b.sort_values('post_id').reset_index(drop=True)[a.columns]
+    pd.testing.assert_frame_equal(a, b, check_dtype=False)
+
+
+def test_disk_store_round_trip_survives_restart(tmp_path, load_sample):
+    ig = load_sample('instagram')
+    DiskStore(str(tmp_path)).save('instagram', ig)
+
+    reopened = DiskStore(str(tmp_path))
+    assert reopened.count('instagram') == len(ig)
+    _same_rows(ig, reopened.load('instagram', with_cold=True))
+
+
+def test_disk_store_reads_only_overlapping_months(tmp_path):
+    df = pd.DataFrame({
+        'post_id': ['a', 'b', 'c', 'd'],
+        'publish_time': pd.to_datetime(['2026-01-05', '2026-02-10', '2026-03-15', None]),
+        'reach': [1, 2, 3, 4],
+    })
+    store = DiskStore(str(tmp_path))
+    store.save('facebook', df)
+
+    window = store.load_range('facebook', datetime(2026, 2, 1), datetime(2026, 2, 28, 23, 59, 59))
+    assert window['post_id'].tolist() == ['b']
+    assert store.count('facebook') == 4
+
+
+def test_clear_empties_both_backends(tmp_path, load_sample):
+    df = load_sample('stories')
+    for store in (MemoryStore(), DiskStore(str(tmp_path))):
+        store.save('stories', df)
+        store.clear()
+        assert store.count('stories') == 0
+        assert store.load('stories').empty
+
+
+def test_upsert_counts_and_touches_only_changed_rows(tmp_path, load_sample):
+    ig = load_sample('instagram')
+    for store in (MemoryStore(), DiskStore(str(tmp_path))):
+        counts, _, _ = store.upsert('instagram', ig)
+        assert counts == {"inserted": len(ig), "updated": 0, "unchanged": 0}
+
+        edited = ig.copy()
+        edited.loc[0, 'reach'] = edited.loc[0, 'reach'] + 1
+        new_row = ig.iloc[[1]].assign(post_id='new-post')
+        counts, removed, added = store.upsert('instagram', pd.concat([edited, new_row]))
+
+        assert counts == {"inserted": 1, "updated": 1, "unchanged": len(ig) - 1}
+        assert removed['post_id'].tolist() == [ig.loc[0, 'post_id']]
+        assert sorted(added['post_id'].astype(str)) == sorted([str(ig.loc[0, 'post_id']), 'new-post'])
+        stored = store.load('instagram')
+        assert len(stored) == len(ig) + 1
+        assert stored['publish_time'].is_monotonic_increasing
+
+
+def test_disk_upsert_survives_restart(tmp_path, load_sample):
+    ig = load_sample('instagram')
+    store = DiskStore(str(tmp_path))
+    store.upsert('instagram', ig.iloc[:5])
+    store.upsert('instagram', ig.iloc[3:])
+
+    _same_rows(ig, DiskStore(str(tmp_path)).load('instagram', with_cold=True))
+
+
+def test_disk_lineage_is_shared_until_the_store_starts_over(tmp_path, load_sample):
+    ig = load_sample('instagram')
+    store = DiskStore(str(tmp_path))
+    store.save('instagram', ig)
+    assert store.snapshot().lineage and DiskStore(str(tmp_path)).snapshot().lineage == store.lineage
+
+    # A wiped STORE_PATH counts versions from 0 again, under a new lineage
+    fresh = DiskStore(str(tmp_path / 'wiped'))
+    fresh.save('instagram', ig)
+    assert fresh.version == store.version and fresh.lineage != store.lineage
+
+
+def test_numeric_ids_appended_to_text_ids_read_back_as_text(tmp_path, load_sample):
+    ig = load_sample('instagram').sort_values('publish_time').reset_index(drop=True)
+    first = ig.iloc[[0, 1]].assign(post_id=['123', 'abc'])
+    later = ig.iloc[[-1, 0]].assign(post_id=np.array([999, 123], dtype='int64'))
+    assert first['publish_time'].dt.month.iloc[0] != later['publish_time'].dt.month.iloc[0]
+    for store in (MemoryStore(), DiskStore(str(tmp_path))):
+        store.save('instagram', first)
+        store.upsert('instagram', later)
+        snapshot = store.snapshot()
+        for table in (snapshot.load('instagram'), snapshot.load('instagram', with_cold=True),
+                      snapshot.load_range('instagram', datetime(2000, 1, 1), datetime(2100, 1, 1))):
+            assert sorted(table['post_id'].tolist()) == ['123', '999', 'abc']
+        rows = snapshot.attach_cold('instagram', snapshot.load('instagram'))
+        assert rows['permalink'].notna().all()
@@ -0,0 +1,197 @@
+import asyncio
+import base64
+import gzip
+import json
+import os
+import sys
+
+import httpx
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from sync import (SheetSyncer, SyncLedger, build_sync_sections, chunk_checksums, delta_sections, encode_chunk,
+                  plan_chunks, removed_keys, section_checksums)
+
+
+class FakeAppsScript:
+    """Offline stand-in for the Apps Script web app (an ASGI app driven via httpx).
+
+    `script` lists what successive requests get: an int status code (503 ->
+    transient failure), 'html' for a sign-in page, 'error' for doPost's own
+    error JSON, 'lost' for a chunk written whose answer never arrives (503
+    after writing), or 'ok'. `delay` adds latency to every response. Like
+    doPost, a chunk whose sync_id/chunk_index was already written is
+    acknowledged without writing its rows (to `written`) again.
+    """
+
+    def __init__(self, script, delay=0.0):
+        self.script = list(script)
+        self.delay = delay
+        self.received = []
+        self.applied = set()
+        self.written = []
+
+    def _apply(self, chunk):
+        chunk_id = (chunk.get('sync_id'), chunk.get('chunk_index'))
+        if chunk_id in self.applied:
+            return True
+        self.applied.add(chunk_id)
+        self.written += [row for entry in chunk.get('sections', {}).values() for row in entry['rows']]
+        return False
+
+    async def __call__(self, scope, receive, send):
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        received = json.loads(body)
+        if received.get('encoding') == 'gzip/base64':
+            received = json.loads(gzip.decompress(base64.b64decode(received['data'])))
+        self.received.append(received)
+        await asyncio.sleep(self.delay)
+
+        step = self.script.pop(0) if self.script else 'ok'
+        if step in ('ok', 'lost'):
+            duplicate = self._apply(received)
+        if step == 'ok':
+            status, ctype, payload = 200, b'application/json', json.dumps({"status": "success", "duplicate": duplicate}).encode()
+        elif step == 'lost':
+            status, ctype, payload = 503, b'text/plain', b'unavailable'
+        elif step == 'error':
+            status, ctype, payload = 200, b'application/json', json.dumps({"status": "error", "message": "boom"}).encode()
+        elif step == 'html':
+            status, ctype, payload = 200, b'text/html', b'<html>Sign in</html>'
+        else:
+            status, ctype, payload = step, b'text/plain', b'unavailable'
+        await send({'type': 'http.response.start', 'status': status, 'headers': [(b'content-type', ctype)]})
+        await send({'type': 'http.response.body', 'body': payload})
+
+
+def _run_job(fake, chunks=None, on_chunk=None, **kwargs):
+    async def go():
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake), base_url='http://script.local')
+        syncer = SheetSyncer(client=client, backoff=0.001, **kwargs)
+        payload = chunks or [encode_chunk({"week_label": "1st Jan - 7th Jan"})]
+        job = syncer.submit('http://script.local/exec', payload, on_chunk=on_chunk)
+        assert job['status'] == 'queued'
+        done = await syncer.wait(job['job_id'])
+        await syncer.close()
+        return done
+    return asyncio.run(go())
+
+
+def test_sync_succeeds_after_transient_failures():
+    fake = FakeAppsScript([503, 429, 'ok'])
+    job = _run_job(fake, retries=3)
+    assert job['status'] == 'succeeded'
+    assert job['attempts'] == 3
+    assert fake.received[-1]['week_label'] == '1st Jan - 7th Jan'
+
+
+def test_sync_gives_up_after_retries():
+    job = _run_job(FakeAppsScript([503] * 5), retries=2)
+    assert job['status'] == 'failed'
+    assert job['attempts'] == 3
+
+
+def test_html_and_script_errors_are_not_retried():
+    job = _run_job(FakeAppsScript(['html']), retries=3)
+    assert (job['status'], job['attempts']) == ('failed', 1)
+    assert 'Invalid JSON' in job['error']
+
+    job = _run_job(FakeAppsScript(['error']), retries=3)
+    assert job['status'] == 'failed'
+    assert 'boom' in job['error']
+
+
+def test_slow_script_times_out():
+    job = _run_job(FakeAppsScript(['ok'], delay=0.5), retries=0, timeout=0.05)
+    assert job['status'] == 'failed'
+    assert 'Timed Out' in job['error']
+
+
+def _posts(n, start=0):
+    return [{"post_id": str(i), "views": i, "permalink": "https://example.com/p/" + "x" * 50} for i in range(start, start + n)]
+
+
+def test_plan_chunks_bounds_size_and_marks_sections():
+    sections = {"instagram_posts": _posts(40), "facebook_posts": _posts(3), "instagram_stories": []}
+    chunks = plan_chunks("wk", "append", sections, {"total_reach": 1}, max_bytes=1000)
+    assert len(chunks) > 1
+    assert all(len(json.dumps(c["sections"])) < 1500 for c in chunks)
+    assert [c["chunk_index"] for c in chunks] == list(range(len(chunks)))
+    assert "overall_stats" in chunks[-1] and "overall_stats" not in chunks[0]
+
+    ig = [c["sections"]["instagram_posts"] for c in chunks if "instagram_posts" in c["sections"]]
+    assert ig[0]["first"] and not any(e["first"] for e in ig[1:])
+    assert ig[-1]["last"] and not any(e["last"] for e in ig[:-1])
+    assert [r["post_id"] for e in ig for r in e["rows"]] == [str(i) for i in range(40)]
+
+    fake = FakeAppsScript([])
+    job = _run_job(fake, chunks=[encode_chunk(c) for c in chunks])
+    assert job['status'] == 'succeeded'
+    assert job['chunks_sent'] == len(chunks)
+    assert [c["chunk_index"] for c in fake.received] == list(range(len(chunks)))
+
+
+def test_delta_sections_against_ledger(tmp_path):
+    sections = {"instagram_posts": _posts(5), "facebook_stories": [{"date": "2024-01-01", "views": 3}]}
+    ledger = SyncLedger(str(tmp_path / "ledger.json"))
+    ledger.commit("wk", section_checksums(sections))
+
+    resync = {"instagram_posts": _posts(5) + _posts(1, start=5), "facebook_stories": [{"date": "2024-01-01", "views": 4}]}
+    resync["instagram_posts"][2]["views"] = 99
+    delta = delta_sections(resync, SyncLedger(str(tmp_path / "ledger.json")).get("wk"))
+    assert [r["post_id"] for r in delta["instagram_posts"]] == ["2", "5"]
+    assert delta["facebook_stories"] == [{"date": "2024-01-01", "views": 4}]
+    assert plan_chunks("wk", "upsert", delta_sections(sections, ledger.get("wk")), None) == []
+
+
+def test_retried_chunk_that_was_already_written_is_not_written_again():
+    chunks = plan_chunks("wk", "append", {"instagram_posts": _posts(20)}, None, max_bytes=500)
+    fake = FakeAppsScript(['ok', 'lost'])
+    job = _run_job(fake, chunks=[encode_chunk(c) for c in chunks], retries=2)
+    assert job['status'] == 'succeeded' and job['attempts'] == len(chunks) + 1
+    assert [c["chunk_index"] for c in fake.received][1:3] == [1, 1]
+    assert [r["post_id"] for r in fake.written] == [str(i) for i in range(20)]
+
+
+def test_ledger_keeps_the_chunks_sent_before_a_failure(tmp_path):
+    sections = {"instagram_posts": _posts(20)}
+    chunks = plan_chunks("wk", "append", sections, {"total_reach": 1}, max_bytes=500)
+    ledger = SyncLedger(str(tmp_path / "ledger.json"))
+    job = _run_job(FakeAppsScript(['ok', 'error']), chunks=[encode_chunk(c) for c in chunks],
+                   on_chunk=lambda i: ledger.update("wk", chunk_checksums(chunks[i])))
+    assert (job['status'], job['chunks_sent']) == ('failed', 1)
+
+    # The next sync sends only the rows the failed job did not get through
+    sent = [r["post_id"] for r in chunks[0]["sections"]["instagram_posts"]["rows"]]
+    rest = delta_sections(sections, SyncLedger(str(tmp_path / "ledger.json")).get("wk"))
+    assert [r["post_id"] for r in rest["instagram_posts"]] == [str(i) for i in range(len(sent), 20)]
+    assert '_overall' not in ledger.get("wk")
+
+
+def test_reach_edited_on_the_dashboard_is_synced():
+    post = {"post_id": "7", "reach": 0, "total_engagement": 50, "engagement_rate": 0.0}
+    report = {"instagram": {"posts": [post]}, "facebook": {"posts": [{**post, "post_id": "8"}]}, "stories": {"data": []}}
+    sections = build_sync_sections(report, None)
+    edited = build_sync_sections(report, None, {"7": "1000"})
+    assert edited["instagram_posts"] == [{**post, "reach": 1000, "engagement_rate": 0.05}]
+    assert edited["facebook_posts"] == sections["facebook_posts"]
+
+    # The edit changes the row's checksum, so a re-sync sends it
+    delta = delta_sections(edited, section_checksums(sections))
+    assert [r["post_id"] for r in delta["instagram_posts"]] == ["7"] and delta["facebook_posts"] == []
+
+
+def test_rows_gone_since_the_last_sync_are_sent_for_removal():
+    previous = section_checksums({"instagram_posts": _posts(4), "facebook_stories": [{"date": "2024-01-01"}]})
+    sections = {"instagram_posts": _posts(2) + _posts(1, start=3), "facebook_stories": [{"date": "2024-01-01"}]}
+    removed = removed_keys(sections, previous)
+    assert removed == {"instagram_posts": ["2"]}
+
+    # Nothing else changed: one chunk carries only the removal
+    chunks = plan_chunks("wk", "upsert", delta_sections(sections, previous), None, removed=removed)
+    assert [(c["sections"], c["removed"]) for c in chunks] == [({}, {"instagram_posts": ["2"]})]
+    assert removed_keys(sections, section_checksums(sections)) == {}
@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from store import DiskStore
+from workspace import DEFAULT_ACCOUNT, WorkspaceRegistry
+
+PLATFORMS = ['facebook', 'instagram', 'stories']
+
+
+def test_ingest_keeps_account_columns(load_sample):
+    fb = load_sample('facebook')
+    ig = load_sample('instagram')
+    assert set(fb['account_name']) == {'Westside'}
+    assert 'westsidestores' in set(ig['account_name'])
+    assert ig['account_id'].str.fullmatch(r'\d+').all()
+
+
+def test_accounts_are_isolated_and_persisted(tmp_path, load_sample):
+    registry = WorkspaceRegistry('disk', str(tmp_path), PLATFORMS)
+    ig = load_sample('instagram')
+    registry.get('brand-a', create=True).store.save('instagram', ig)
+    registry.get('brand-b', create=True).store.save('instagram', ig.iloc[:2])
+
+    registry.get('brand-b').clear()
+    reopened = WorkspaceRegistry('disk', str(tmp_path), PLATFORMS)
+    assert reopened.names() == ['brand-a', 'brand-b', DEFAULT_ACCOUNT]
+    assert reopened.get('brand-a').store.count('instagram') == len(ig)
+    assert reopened.get('brand-b').store.count('instagram') == 0
+    assert reopened.get('brand-c') is None
+    assert {p['account_name'] for p in reopened.get('brand-a').profiles()} == set(ig['account_name'])
+
+    for bad in ['../etc', '', 'instagram']:
+        with pytest.raises(ValueError):
+            reopened.get(bad, create=True)
+
+
+def test_single_tenant_layout_moves_to_default(tmp_path, load_sample):
+    DiskStore(str(tmp_path)).save('stories', load_sample('stories'))
+    registry = WorkspaceRegistry('disk', str(tmp_path), PLATFORMS)
+    assert registry.get(DEFAULT_ACCOUNT).store.count('stories') > 0
+    assert not os.path.exists(tmp_path / 'stories')